@@ -1,14 +1,26 @@
 # app/__init__.py
+import os
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf.csrf import CSRFProtect, generate_csrf
 from flask_mail import Mail
+from flask_migrate import Migrate
+
+from app.database import RoutingSession
 
-db = SQLAlchemy()
+# Session routée : lectures des routes @lecture_seule vers le réplica
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 csrf = CSRFProtect()
 mail = Mail()
+migrate = Migrate()
 
-def create_app():
+def create_app(prechauffer=None):
+    """
+    prechauffer : gabarits compilés, pool de connexions ouvert et index
+    mémoire construits avant le premier visiteur (voir app/demarrage.py) ;
+    None = config PRECHAUFFAGE.
+    """
     app = Flask(__name__)
 
     # 1) Charger la config (config.py -> class Config)
@@ -22,10 +34,38 @@ def create_app():
     app.url_map.strict_slashes = False
 
     # 3) Initialiser extensions
+    # Pool de connexions (DB_*) et réplica éventuel, avant la création des moteurs
+    from app import database
+    database.configurer(app)
     db.init_app(app)
+    # render_as_batch : ALTER TABLE compatibles SQLite (recopie de table) ;
+    # dossier absolu : systemd, cron ou gunicorn --chdir ne partent pas du dépôt
+    migrate.init_app(
+        app, db, render_as_batch=True,
+        directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations"),
+    )
     csrf.init_app(app)
     mail.init_app(app)
 
+    # Sessions côté serveur : le cookie ne porte qu'un identifiant (+ CLI flask sessions ...)
+    from app import sessions
+    sessions.init_app(app)
+
+    # Mesures par requête (durée, SQL, rendu) exposées sur /metrics
+    from app.metrics import metrics
+    metrics.init_app(app)
+
+    from app.distance import distance_provider
+    distance_provider.init_app(app)
+
+    # Cache des pages publiques (+ CLI flask cache ...)
+    from app.cache import response_cache
+    response_cache.init_app(app)
+
+    # Fichiers statiques à empreinte (+ CLI flask assets ...)
+    from app.assets import assets
+    assets.init_app(app)
+
     # 4) Logs utiles
     app.logger.info(f"[MAIL] DEFAULT_SENDER={app.config.get('MAIL_DEFAULT_SENDER')!r}")
     app.logger.info(f"[MAIL] USERNAME={app.config.get('MAIL_USERNAME')!r}")
@@ -35,9 +75,39 @@ def create_app():
     from app.routes.main import main as main_blueprint
     app.register_blueprint(main_blueprint)
 
-    # 6) CSRF token dispo dans les templates
+    from app.routes.api import api as api_blueprint
+    csrf.exempt(api_blueprint)
+    app.register_blueprint(api_blueprint)
+
+    # 6) Gabarits d'emails (compilés au démarrage) + CLI flask emails ...
+    from app import emails
+    emails.init_app(app)
+
+    # Photos : helpers picture()/srcset() + CLI flask images ...
+    from app import images
+    images.init_app(app)
+
+    # CLI flask import vehicules|forfaits fichier.csv
+    from app import importation
+    importation.init_app(app)
+
+    # CLI flask stats rebuild
+    from app import analytics
+    analytics.init_app(app)
+
+    # CLI flask schema upgrade, flask indexes ... (migrations : flask db ...)
+    from app import schema
+    schema.init_app(app)
+
+    # 7) CSRF token dispo dans les templates
     @app.context_processor
     def inject_csrf_token():
         return dict(csrf_token=generate_csrf)
 
+    # 8) Sondes /healthz, /readyz + préchauffage (en dernier : tout est enregistré)
+    from app.demarrage import prechauffage
+    if prechauffer is None:
+        prechauffer = app.config.get("PRECHAUFFAGE", False)
+    prechauffage.init_app(app, prechauffer=prechauffer)
+
     return app
@@ -0,0 +1,273 @@
+"""
+Statistiques des réservations, lues dans des agrégats maintenus au fil de
+l'eau plutôt que recalculées par GROUP BY sur toute la table :
+
+  stat_jour          jour de course × véhicule × statut
+  stat_trajet_mois   mois × trajet (adresses normalisées) × statut
+
+Chaque changement de statut (création, validation, annulation, fin,
+suppression) appelle transition() avant le commit : la ligne de l'ancien
+statut est décrémentée, celle du nouveau incrémentée, dans la même
+transaction que la réservation (INSERT ... ON CONFLICT DO UPDATE).
+
+Reconstruction complète (nouvelle base, correction) : flask stats rebuild
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import case, func
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models.models import Reservation, StatJour, StatTrajetMois, Trajet, Vehicule
+from app.pricing.engine import PricingError, Trip, quote
+from app.utils.adresses import normaliser_adresse
+
+__all__ = ["estimer_prix", "rebuild", "tableau_de_bord", "transition"]
+
+# Statuts comptés dans le chiffre d'affaires et l'occupation de la flotte
+STATUTS_REALISES = ("Confirmée", "Terminée")
+STATUT_ANNULE = "Annulée"
+
+
+def estimer_prix(r, vehicule=None):
+    """
+    Devis indicatif d'une réservation (forfait ou règle kilométrique sur la
+    distance du trajet déjà calculée) ; None si aucun tarif ne s'applique.
+    """
+    from app.utils.fare_index import fare_index
+
+    ruleset = fare_index.ruleset()
+    vehicule = vehicule or r.vehicule
+    trajet = r.trajet
+    trip = Trip(
+        r.adresse_depart, r.adresse_arrivee, r.date_heure,
+        ruleset.categorie_id(vehicule.type if vehicule else None),
+        trajet.distance_km if trajet else None,
+        trajet.duree_estimee_min if trajet else None,
+    )
+    try:
+        return quote(trip, ruleset).prix
+    except PricingError:
+        return None
+
+
+# ========================
+# Mise à jour incrémentale
+# ========================
+def _mesures(date_heure, vehicule_id, depart, arrivee, prix, distance_km, duree_min):
+    """Clés et mesures d'une réservation dans chaque agrégat."""
+    duree = duree_min or current_app.config.get("DISPONIBILITE_DUREE_DEFAUT_MIN", 60)
+    km = distance_km or 0.0
+    ca = prix or 0
+    return [
+        (StatJour,
+         {"jour": date_heure.date(), "vehicule_id": vehicule_id},
+         {"nb": 1, "minutes": int(duree), "km": km, "ca_estime": ca}),
+        (StatTrajetMois,
+         {"mois": date_heure.strftime("%Y-%m"),
+          "depart": normaliser_adresse(depart)[:200],
+          "arrivee": normaliser_adresse(arrivee)[:200]},
+         {"nb": 1, "km": km, "ca_estime": ca}),
+    ]
+
+
+def _incrementer(modele, cles, deltas):
+    """Ajoute `deltas` à la ligne `cles` (créée au besoin)."""
+    dialecte = db.session.get_bind().dialect.name
+    if dialecte in ("sqlite", "postgresql"):
+        if dialecte == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(modele).values(**cles, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(cles),
+            set_={k: getattr(modele, k) + stmt.excluded[k] for k in deltas},
+        )
+        db.session.execute(stmt)
+        return
+    # Autres bases : UPDATE, puis INSERT si la ligne n'existe pas encore
+    filtre = [getattr(modele, k) == v for k, v in cles.items()]
+    maj = db.session.query(modele).filter(*filtre).update(
+        {getattr(modele, k): getattr(modele, k) + v for k, v in deltas.items()},
+        synchronize_session=False,
+    )
+    if not maj:
+        db.session.execute(modele.__table__.insert().values(**cles, **deltas))
+
+
+def transition(r, ancien, nouveau):
+    """
+    Reporte un changement de statut de `r` dans les agrégats (ancien=None :
+    création ; nouveau=None : suppression). À appeler avant le commit, et
+    avant db.session.delete(r) pour une suppression.
+    """
+    if ancien == nouveau:
+        return
+    trajet = r.trajet
+    mesures = _mesures(
+        r.date_heure, r.vehicule_id, r.adresse_depart, r.adresse_arrivee, r.prix_estime,
+        trajet.distance_km if trajet else None, trajet.duree_estimee_min if trajet else None,
+    )
+    for statut, signe in ((ancien, -1), (nouveau, 1)):
+        if statut is None:
+            continue
+        for modele, cles, valeurs in mesures:
+            _incrementer(modele, dict(cles, statut=statut), {k: signe * v for k, v in valeurs.items()})
+
+
+# ========================
+# Reconstruction complète
+# ========================
+def rebuild(paquet=1000):
+    """
+    Recalcule tous les agrégats depuis les réservations (lecture par
+    paquets) ; les devis manquants sont estimés au passage.
+    Retourne le nombre de réservations lues.
+    """
+    # Devis des réservations antérieures au champ prix_estime. Query.yield_per
+    # (et non execution_options) : Query dédoublonne sinon ses entités, ce
+    # que yield_per refuse ; selectinload charge trajets et véhicules par paquet
+    manquants = (
+        Reservation.query.filter(Reservation.prix_estime.is_(None))
+        .options(selectinload(Reservation.trajet), selectinload(Reservation.vehicule))
+        .yield_per(paquet)
+    )
+    prix = {r.id: estimer_prix(r) for r in manquants}
+    for rid, p in prix.items():
+        if p is not None:
+            db.session.query(Reservation).filter_by(id=rid).update({"prix_estime": p}, synchronize_session=False)
+
+    totaux = {StatJour: defaultdict(lambda: defaultdict(float)),
+              StatTrajetMois: defaultdict(lambda: defaultdict(float))}
+    lignes = (
+        db.session.query(
+            Reservation.date_heure, Reservation.vehicule_id, Reservation.adresse_depart,
+            Reservation.adresse_arrivee, Reservation.prix_estime, Reservation.statut,
+            Trajet.distance_km, Trajet.duree_estimee_min,
+        )
+        .outerjoin(Trajet, Trajet.reservation_id == Reservation.id)
+        .execution_options(yield_per=paquet)
+    )
+    n = 0
+    for date_heure, vid, depart, arrivee, prix_estime, statut, km, duree in lignes:
+        n += 1
+        for modele, cles, valeurs in _mesures(date_heure, vid, depart, arrivee, prix_estime, km, duree):
+            cle = tuple(sorted(dict(cles, statut=statut).items()))
+            for k, v in valeurs.items():
+                totaux[modele][cle][k] += v
+
+    for modele, lignes_modele in totaux.items():
+        db.session.query(modele).delete(synchronize_session=False)
+        entiers = {"nb", "minutes", "ca_estime"}
+        db.session.bulk_insert_mappings(modele, [
+            dict(cle, **{k: int(v) if k in entiers else v for k, v in valeurs.items()})
+            for cle, valeurs in lignes_modele.items()
+        ])
+    db.session.commit()
+    return n
+
+
+# ========================
+# Lecture (tableau de bord)
+# ========================
+def tableau_de_bord(du, au, top=15):
+    """
+    Indicateurs sur [du, au] (dates incluses), lus dans les agrégats :
+    réservations par jour et par statut, taux d'annulation, chiffre
+    d'affaires estimé par trajet, occupation par véhicule.
+    """
+    realises = StatJour.statut.in_(STATUTS_REALISES)
+
+    par_jour = defaultdict(dict)
+    for jour, statut, nb in (
+        db.session.query(StatJour.jour, StatJour.statut, func.sum(StatJour.nb))
+        .filter(StatJour.jour.between(du, au))
+        .group_by(StatJour.jour, StatJour.statut)
+    ):
+        if nb:
+            par_jour[jour][statut] = int(nb)
+    jours = []
+    for i in range((au - du).days + 1):
+        j = du + timedelta(days=i)
+        jours.append({"jour": j, "statuts": par_jour.get(j, {}), "total": sum(par_jour.get(j, {}).values())})
+
+    total, annulees, ca = db.session.query(
+        func.coalesce(func.sum(StatJour.nb), 0),
+        func.coalesce(func.sum(case((StatJour.statut == STATUT_ANNULE, StatJour.nb), else_=0)), 0),
+        func.coalesce(func.sum(case((realises, StatJour.ca_estime), else_=0)), 0),
+    ).filter(StatJour.jour.between(du, au)).one()
+
+    mois = (du.strftime("%Y-%m"), au.strftime("%Y-%m"))
+    trajets = (
+        db.session.query(
+            StatTrajetMois.depart, StatTrajetMois.arrivee,
+            func.sum(StatTrajetMois.nb).label("nb"),
+            func.sum(StatTrajetMois.ca_estime).label("ca"),
+        )
+        .filter(StatTrajetMois.mois.between(*mois), StatTrajetMois.statut.in_(STATUTS_REALISES))
+        .group_by(StatTrajetMois.depart, StatTrajetMois.arrivee)
+        .having(func.sum(StatTrajetMois.nb) > 0)
+        .order_by(func.sum(StatTrajetMois.ca_estime).desc())
+        .limit(top)
+        .all()
+    )
+
+    # Occupation : minutes de course réalisées / heures de service de la période
+    minutes_service = ((au - du).days + 1) * current_app.config.get("STATS_HEURES_SERVICE", 12) * 60
+    occupes = dict(
+        db.session.query(StatJour.vehicule_id, func.sum(StatJour.minutes))
+        .filter(StatJour.jour.between(du, au), realises)
+        .group_by(StatJour.vehicule_id)
+        .all()
+    )
+    flotte = [
+        {
+            "vehicule": v,
+            "minutes": int(occupes.get(v.id) or 0),
+            "taux": min(1.0, (occupes.get(v.id) or 0) / minutes_service) if minutes_service else 0.0,
+        }
+        for v in db.session.query(Vehicule.id, Vehicule.marque, Vehicule.modele, Vehicule.immatriculation)
+        .order_by(Vehicule.marque, Vehicule.modele)
+    ]
+
+    return {
+        "jours": jours,
+        "max_jour": max((j["total"] for j in jours), default=0),
+        "total": int(total),
+        "annulees": int(annulees),
+        "taux_annulation": (annulees / total) if total else 0.0,
+        "ca_estime": int(ca),
+        "trajets": trajets,
+        "flotte": flotte,
+        "taux_flotte": (sum(f["minutes"] for f in flotte) / (minutes_service * len(flotte))) if flotte else 0.0,
+    }
+
+
+def periode_defaut(jours=30):
+    au = date.today()
+    return au - timedelta(days=jours - 1), au
+
+
+# ========================
+# CLI : flask stats ...
+# ========================
+stats_cli = AppGroup("stats", help="Statistiques des réservations.")
+
+
+@stats_cli.command("rebuild")
+def rebuild_command():
+    """Recalcule tous les agrégats depuis la table des réservations."""
+    n = rebuild()
+    click.echo(
+        f"{n} réservation(s) agrégée(s) : {StatJour.query.count()} ligne(s) stat_jour, "
+        f"{StatTrajetMois.query.count()} ligne(s) stat_trajet_mois"
+    )
+
+
+def init_app(app):
+    app.cli.add_command(stats_cli)
@@ -0,0 +1,219 @@
+"""
+Fichiers statiques à empreinte de contenu, sans étape de build.
+
+Au démarrage, chaque fichier de app/static est haché ; url_for("static", ...)
+produit alors une URL à empreinte (css/main.css -> css/main.3f2a9c1b7e.css),
+servie avec Cache-Control: public, max-age=1 an, immutable. Un fichier
+modifié change d'URL : les navigateurs ne revalident plus rien.
+
+Les fichiers texte (CSS, JS, SVG...) ont des copies précompressées gzip et,
+si le paquet `brotli` est installé, br, envoyées selon Accept-Encoding.
+
+Les gabarits n'ont rien à changer : {{ url_for('static', filename=...) }}.
+Les fichiers ajoutés après le démarrage (photos importées) sont hachés à
+leur première URL. CLI : flask assets build
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from threading import Lock
+
+import click
+from flask import current_app, request, send_file
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optionnel : gzip seul
+    brotli = None
+
+__all__ = ["AssetManifest", "assets"]
+
+COMPRESSIBLES = {".css", ".js", ".svg", ".json", ".txt", ".map", ".html", ".xml"}
+EMPREINTE = re.compile(r"^(?P<base>.+)\.(?P<empreinte>[0-9a-f]{10})(?P<ext>\.[^./]+)$")
+UN_AN = 365 * 24 * 3600
+
+
+def _empreinte(path):
+    h = hashlib.blake2b(digest_size=5)
+    with open(path, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def _avec_empreinte(filename, empreinte):
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{empreinte}{ext}"
+
+
+def _ecrire(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class AssetManifest:
+    def __init__(self):
+        self.static_folder = None
+        self.cache_dir = None
+        self.max_age = UN_AN
+        self.verifier = False
+        self._urls = {}      # filename -> filename à empreinte
+        self._fichiers = {}  # filename à empreinte -> (filename, mtime)
+        self._lock = Lock()
+
+    def init_app(self, app):
+        if not app.config.get("ASSETS_FINGERPRINT", True):
+            return
+        self.static_folder = app.static_folder
+        self.cache_dir = app.config.get("ASSETS_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "dstravel_assets"
+        )
+        self.max_age = app.config.get("ASSETS_MAX_AGE", UN_AN)
+        # En debug, un fichier modifié est re-haché à sa prochaine URL
+        self.verifier = app.debug
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.build()
+
+        app.extensions["assets"] = self
+        app.url_defaults(self._url_defaults)
+        app.view_functions["static"] = self.send_static_file
+        app.cli.add_command(assets_cli)
+
+    # ------------------------
+    # Manifeste
+    # ------------------------
+    def build(self):
+        """(Re)hache tout le dossier statique et prépare les copies compressées."""
+        urls, fichiers = {}, {}
+        for racine, _, noms in os.walk(self.static_folder):
+            for nom in noms:
+                path = os.path.join(racine, nom)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, "/")
+                hashed = _avec_empreinte(filename, _empreinte(path))
+                urls[filename] = hashed
+                fichiers[hashed] = (filename, os.path.getmtime(path))
+                self._compresser(path, hashed)
+        with self._lock:
+            self._urls, self._fichiers = urls, fichiers
+        return urls
+
+    def _ajouter(self, filename):
+        path = os.path.join(self.static_folder, filename)
+        if not os.path.isfile(path):
+            return None
+        hashed = _avec_empreinte(filename, _empreinte(path))
+        self._compresser(path, hashed)
+        with self._lock:
+            self._urls[filename] = hashed
+            self._fichiers[hashed] = (filename, os.path.getmtime(path))
+        return hashed
+
+    def url(self, filename):
+        """Nom à empreinte de `filename` (relatif à static/), inchangé s'il n'existe pas."""
+        hashed = self._urls.get(filename)
+        if hashed is not None and self.verifier:
+            try:
+                if os.path.getmtime(os.path.join(self.static_folder, filename)) != self._fichiers[hashed][1]:
+                    hashed = None
+            except OSError:
+                hashed = None
+        if hashed is None:
+            hashed = self._ajouter(filename)
+        return hashed or filename
+
+    def _url_defaults(self, endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = self.url(values["filename"])
+
+    # ------------------------
+    # Copies compressées
+    # ------------------------
+    def _variantes(self, hashed):
+        cle = hashed.replace("/", "__")
+        return {
+            "br": os.path.join(self.cache_dir, cle + ".br"),
+            "gzip": os.path.join(self.cache_dir, cle + ".gz"),
+        }
+
+    def _compresser(self, path, hashed):
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLES:
+            return
+        variantes = self._variantes(hashed)
+        if os.path.exists(variantes["gzip"]) and (brotli is None or os.path.exists(variantes["br"])):
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        # mtime=0 : sortie identique d'un démarrage à l'autre
+        _ecrire(variantes["gzip"], gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _ecrire(variantes["br"], brotli.compress(data, quality=11))
+
+    # ------------------------
+    # Service
+    # ------------------------
+    def send_static_file(self, filename):
+        """Remplace la vue `static` de Flask : empreinte -> fichier, en-têtes immuables."""
+        entree = self._fichiers.get(filename)
+        if entree is None:
+            m = EMPREINTE.match(filename)
+            if m is None or self.verifier:
+                return current_app.send_static_file(filename)
+            # Empreinte inconnue (ancienne version, autre worker) : fichier
+            # courant, sans cache long puisque le contenu peut différer
+            return current_app.send_static_file(m.group("base") + m.group("ext"))
+
+        source = entree[0]
+        resp = None
+        if os.path.splitext(source)[1].lower() in COMPRESSIBLES:
+            acceptes = request.accept_encodings
+            for encodage, path in self._variantes(filename).items():
+                if acceptes[encodage] and os.path.exists(path):
+                    resp = send_file(path, mimetype=self._mimetype(source), conditional=True,
+                                     etag=f"{filename}-{encodage}")
+                    resp.headers["Content-Encoding"] = encodage
+                    break
+            if resp is None:
+                resp = current_app.send_static_file(source)
+            resp.vary.add("Accept-Encoding")
+        else:
+            resp = current_app.send_static_file(source)
+
+        resp.cache_control.public = True
+        resp.cache_control.max_age = self.max_age
+        resp.cache_control.immutable = True
+        resp.cache_control.no_cache = None
+        return resp
+
+    @staticmethod
+    def _mimetype(filename):
+        return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+assets = AssetManifest()
+
+
+# ========================
+# CLI : flask assets ...
+# ========================
+assets_cli = AppGroup("assets", help="Fichiers statiques à empreinte.")
+
+
+@assets_cli.command("build")
+@click.option("-v", "--verbose", is_flag=True, help="Affiche chaque fichier.")
+def build_command(verbose):
+    """Re-hache app/static et génère les copies gzip/br manquantes."""
+    urls = assets.build()
+    if verbose:
+        for filename, hashed in sorted(urls.items()):
+            click.echo(f"{filename} -> {hashed}")
+    compresses = sum(1 for f in urls if os.path.splitext(f)[1].lower() in COMPRESSIBLES)
+    click.echo(
+        f"{len(urls)} fichier(s), {compresses} compressé(s) "
+        f"(gzip{', br' if brotli is not None else ''}) dans {assets.cache_dir}"
+    )
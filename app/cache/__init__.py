@@ -0,0 +1,161 @@
+"""
+Cache des pages publiques et de fragments de gabarits.
+
+    @main.route("/")
+    @response_cache.page("vehicules", "tarifs")
+    def home(): ...
+
+    {% call fragment("accueil_vehicules", "vehicules") %} ... {% endcall %}
+
+    response_cache.invalidate("vehicules")   # après une écriture admin
+
+Chaque étiquette (tag) a une version stockée dans le backend ; elle fait
+partie de la clé des entrées, donc invalider une étiquette revient à en
+changer la version (les anciennes entrées expirent d'elles-mêmes). Avec un
+backend partagé (filesystem, redis) l'invalidation vaut pour tous les
+workers ; avec "memory", les autres workers attendent RESPONSE_CACHE_TTL.
+
+Les pages servies depuis le cache portent ETag et Last-Modified : un client
+qui revalide reçoit un 304 sans corps. Pas de cache pour l'admin connecté
+ni quand des messages flash sont en attente (contenu propre à la session).
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from uuid import uuid4
+
+import click
+from flask import Response, has_request_context, make_response, request, session
+from flask.cli import AppGroup
+from markupsafe import Markup
+
+from app.cache.backends import BACKENDS, CacheBackend, NullBackend, register_backend
+
+__all__ = ["CacheBackend", "ResponseCache", "register_backend", "response_cache"]
+
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = NullBackend()
+        self.ttl = 300
+
+    def init_app(self, app):
+        name = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        if name not in BACKENDS:
+            raise ValueError(f"RESPONSE_CACHE_BACKEND inconnu : {name}")
+        self.backend = BACKENDS[name](app.config)
+        self.ttl = app.config.get("RESPONSE_CACHE_TTL", 300)
+        app.extensions["response_cache"] = self
+        app.jinja_env.globals["fragment"] = self.fragment
+        app.cli.add_command(cache_cli)
+
+    # ------------------------
+    # Étiquettes
+    # ------------------------
+    def _versions(self, tags):
+        if not tags:
+            return "-"
+        versions = self.backend.get_many([f"tag:{t}" for t in tags])
+        for i, (tag, version) in enumerate(zip(tags, versions)):
+            if version is None:
+                versions[i] = uuid4().hex[:12]
+                self.backend.set(f"tag:{tag}", versions[i])
+        return ".".join(versions)
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set(f"tag:{tag}", uuid4().hex[:12])
+
+    def clear(self):
+        self.backend.clear()
+
+    # ------------------------
+    # Pages
+    # ------------------------
+    @staticmethod
+    def _cacheable():
+        return (
+            request.method in ("GET", "HEAD")
+            and not session.get("admin_logged_in")
+            and not session.get("_flashes")
+        )
+
+    @staticmethod
+    def _cle_requete():
+        args = sorted(request.args.items(multi=True))
+        return request.path + ("?" + "&".join(f"{k}={v}" for k, v in args) if args else "")
+
+    def page(self, *tags, ttl=None):
+        """Décorateur de vue : réponse complète mise en cache, invalidée par `tags`."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if isinstance(self.backend, NullBackend) or not self._cacheable():
+                    return view(*args, **kwargs)
+                key = f"page:{self._versions(tags)}:{self._cle_requete()}"
+                raw = self.backend.get(key)
+                if raw is not None:
+                    entry = json.loads(raw)
+                    resp = Response(entry["body"], mimetype=entry["mimetype"])
+                    resp.headers["X-Cache"] = "HIT"
+                else:
+                    resp = make_response(view(*args, **kwargs))
+                    if resp.status_code != 200 or resp.direct_passthrough or not self._cacheable():
+                        return resp
+                    body = resp.get_data()
+                    entry = {
+                        "body": body.decode("utf-8"),
+                        "mimetype": resp.mimetype,
+                        "etag": hashlib.blake2b(body, digest_size=12).hexdigest(),
+                        "modifie": int(time.time()),
+                    }
+                    self.backend.set(key, json.dumps(entry), ttl or self.ttl)
+                    resp.headers["X-Cache"] = "MISS"
+                resp.set_etag(entry["etag"])
+                resp.last_modified = datetime.fromtimestamp(entry["modifie"], timezone.utc)
+                # Revalidation à chaque visite (304 si inchangée)
+                resp.cache_control.no_cache = True
+                return resp.make_conditional(request)
+            return wrapper
+        return decorator
+
+    # ------------------------
+    # Fragments (gabarits)
+    # ------------------------
+    def fragment(self, nom, *tags, ttl=None, caller=None):
+        """
+        Bloc {% call fragment(nom, *tags) %}...{% endcall %} : le contenu
+        n'est rendu (et ses requêtes exécutées) qu'en l'absence de cache.
+        Clé propre à la vue appelante : un même gabarit rendu par deux vues
+        avec des données différentes ne partage pas ses fragments.
+        """
+        vue = request.endpoint if has_request_context() else None
+        key = f"frag:{self._versions(tags)}:{vue}:{nom}"
+        html = self.backend.get(key)
+        if html is None:
+            html = str(caller())
+            self.backend.set(key, html, ttl or self.ttl)
+        return Markup(html)
+
+
+response_cache = ResponseCache()
+
+
+# ========================
+# CLI : flask cache ...
+# ========================
+cache_cli = AppGroup("cache", help="Cache des pages publiques.")
+
+
+@cache_cli.command("clear")
+@click.argument("tags", nargs=-1)
+def clear_command(tags):
+    """Vide le cache (ou invalide seulement les étiquettes données)."""
+    if tags:
+        response_cache.invalidate(*tags)
+        click.echo(f"Étiquette(s) invalidée(s) : {', '.join(tags)}")
+    else:
+        response_cache.clear()
+        click.echo("Cache vidé")
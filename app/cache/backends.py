@@ -0,0 +1,202 @@
+"""
+Backends de stockage du cache de pages.
+
+Un backend stocke des chaînes sous une clé avec une durée de vie :
+get(cle) -> str | None, set(cle, valeur, ttl), delete(cle).
+"""
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class CacheBackend:
+    name = "base"
+
+    def __init__(self, config=None):
+        self.config = config or {}
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        return [self.get(k) for k in keys]
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class NullBackend(CacheBackend):
+    """Cache désactivé."""
+    name = "none"
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """LRU en mémoire, propre à chaque processus (RESPONSE_CACHE_SIZE entrées)."""
+    name = "memory"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.maxsize = self.config.get("RESPONSE_CACHE_SIZE", 512)
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemBackend(CacheBackend):
+    """
+    Un fichier par clé dans RESPONSE_CACHE_DIR, partagé entre les workers
+    d'une même machine. Première ligne : expiration (epoch, 0 = jamais).
+    """
+    name = "filesystem"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.folder = self.config.get("RESPONSE_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "dstravel_page_cache"
+        )
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.folder, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                expires = float(f.readline() or 0)
+                if expires and expires < time.time():
+                    raise FileNotFoundError
+                return f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else 0
+        # Écriture atomique : un lecteur voit l'ancien ou le nouveau fichier
+        fd, tmp = tempfile.mkstemp(dir=self.folder)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{expires}\n{value}")
+        os.replace(tmp, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.folder):
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Tout client compatible Redis (get / mget / set(ex=) / delete / scan_iter),
+    partagé entre machines : redis.Redis (RESPONSE_CACHE_URL) ou FakeRedis.
+    """
+    name = "redis"
+    prefix = "dstravel:cache:"
+
+    def __init__(self, config=None, client=None):
+        super().__init__(config)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("RESPONSE_CACHE_BACKEND=redis : installer le paquet redis")
+            client = redis.Redis.from_url(self.config.get("RESPONSE_CACHE_URL") or "redis://localhost:6379/0")
+        self.client = client
+
+    @staticmethod
+    def _decode(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def get(self, key):
+        return self._decode(self.client.get(self.prefix + key))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [self._decode(v) for v in self.client.mget([self.prefix + k for k in keys])]
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class FakeRedisBackend(RedisBackend):
+    """Backend Redis adossé à un faux serveur en mémoire (dev, tests)."""
+    name = "fakeredis"
+
+    def __init__(self, config=None):
+        from app.cache.fake_redis import FakeRedis
+        super().__init__(config, client=FakeRedis())
+
+
+BACKENDS = {
+    cls.name: cls for cls in (
+        NullBackend, MemoryBackend, FileSystemBackend, RedisBackend, FakeRedisBackend,
+    )
+}
+
+
+def register_backend(cls):
+    """Enregistre un backend supplémentaire (sélectionnable via RESPONSE_CACHE_BACKEND)."""
+    BACKENDS[cls.name] = cls
+    return cls
@@ -0,0 +1,61 @@
+"""
+Faux client Redis en mémoire : le sous-ensemble de commandes utilisé par
+RedisBackend (get, mget, set ex/nx, delete, scan_iter, ping, flushdb).
+Les valeurs sont rendues en bytes, comme redis-py.
+"""
+import fnmatch
+import time
+from threading import Lock
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+        self._lock = Lock()
+
+    def _vivant(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires and expires < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _bytes(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode("utf-8")
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        with self._lock:
+            return self._vivant(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._vivant(k) for k in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._vivant(key) is not None:
+                return None
+            self._data[key] = (self._bytes(value), time.monotonic() + ex if ex else None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for k in keys if self._data.pop(k, None) is not None)
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            keys = [k for k in self._data if fnmatch.fnmatchcase(k, match)]
+        return iter(keys)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
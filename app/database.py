@@ -0,0 +1,157 @@
+"""
+Moteurs SQLAlchemy : options de pool par environnement et routage des
+lectures vers un réplica.
+
+Pool (par processus) : DB_POOL_SIZE connexions gardées, DB_MAX_OVERFLOW en
+pointe, attente DB_POOL_TIMEOUT s, recyclage après DB_POOL_RECYCLE s,
+vérification à l'emprunt (DB_POOL_PRE_PING). Sous Postgres, une instruction
+est interrompue après DB_STATEMENT_TIMEOUT_MS ms (0 = jamais). Connexions
+ouvertes au plus : workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW) par base, à
+garder sous la limite du serveur.
+
+Réplica (DATABASE_REPLICA_URL, même schéma que la base principale) : les
+routes marquées @lecture_seule y lisent ; tout le reste, et toute écriture
+(flush, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE), va à la base
+principale. Après une écriture, la session du visiteur lit la base
+principale pendant DB_REPLICA_DELAI s (lire ses propres écritures malgré le
+retard de réplication). Sans réplica configuré, tout va à la base principale.
+
+Essai local avec deux fichiers SQLite :
+    DATABASE_URL=sqlite:///principale.db DATABASE_REPLICA_URL=sqlite:///replica.db
+    flask replica sync      # copie la base principale dans le réplica
+    flask replica status
+"""
+import sqlite3
+import time
+from contextlib import closing
+from functools import wraps
+
+import click
+from flask import current_app, g, has_request_context, session
+from flask.cli import AppGroup
+from flask_sqlalchemy.session import Session
+from sqlalchemy import UpdateBase, make_url, text
+
+__all__ = ["REPLICA", "RoutingSession", "configurer", "lecture_seule", "options_moteur"]
+
+# Clé de bind du réplica (SQLALCHEMY_BINDS)
+REPLICA = "replica"
+# Clé de session : lectures sur la base principale jusqu'à cet instant (epoch)
+CLE_PRINCIPALE = "_bd_principale_jusqua"
+DELAI_DEFAUT = 10
+
+
+def options_moteur(url, config):
+    """Options create_engine pour `url` d'après les clés DB_* de la config."""
+    url = make_url(url)
+    options = {"pool_pre_ping": config.get("DB_POOL_PRE_PING", True)}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # Base en mémoire : connexion unique (StaticPool), pas de réglage de pool
+        return options
+    options.update(
+        pool_size=config.get("DB_POOL_SIZE", 5),
+        max_overflow=config.get("DB_MAX_OVERFLOW", 5),
+        pool_timeout=config.get("DB_POOL_TIMEOUT", 10),
+        pool_recycle=config.get("DB_POOL_RECYCLE", 1800),
+    )
+    timeout = config.get("DB_STATEMENT_TIMEOUT_MS", 0)
+    if timeout and url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"options": f"-c statement_timeout={int(timeout)}"}
+    return options
+
+
+def configurer(app):
+    """Options des moteurs et bind du réplica ; à appeler avant db.init_app."""
+    config = app.config
+    options = options_moteur(config["SQLALCHEMY_DATABASE_URI"], config)
+    # Les options explicites de SQLALCHEMY_ENGINE_OPTIONS restent prioritaires
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {**options, **config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+    replica = config.get("DATABASE_REPLICA_URL")
+    if replica:
+        config.setdefault("SQLALCHEMY_BINDS", {})[REPLICA] = {"url": replica, **options_moteur(replica, config)}
+    app.after_request(_apres_requete)
+    app.cli.add_command(replica_cli)
+
+
+# ========================
+# Routage
+# ========================
+def lecture_seule(f):
+    """Route dont les lectures peuvent aller au réplica."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        g._bd_lecture_seule = True
+        return f(*args, **kwargs)
+    return wrapper
+
+
+def _principale_exigee():
+    return session.get(CLE_PRINCIPALE, 0) > time.time()
+
+
+class RoutingSession(Session):
+    """Session de db : lectures des routes @lecture_seule vers le réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            ecriture = self._flushing or isinstance(clause, UpdateBase) or (
+                getattr(clause, "_for_update_arg", None) is not None
+            )
+            if ecriture:
+                g._bd_ecriture = True
+            elif (
+                g.get("_bd_lecture_seule") and not g.get("_bd_ecriture")
+                and REPLICA in self._db.engines and not _principale_exigee()
+            ):
+                return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _apres_requete(response):
+    if g.get("_bd_ecriture") and current_app.config.get("DATABASE_REPLICA_URL"):
+        session[CLE_PRINCIPALE] = time.time() + current_app.config.get("DB_REPLICA_DELAI", DELAI_DEFAUT)
+    return response
+
+
+# ========================
+# CLI
+# ========================
+replica_cli = AppGroup("replica", help="Réplica en lecture.")
+
+
+def _moteurs():
+    from app import db
+    return {"principale": db.engines[None], **({REPLICA: db.engines[REPLICA]} if REPLICA in db.engines else {})}
+
+
+@replica_cli.command("status")
+def status_command():
+    """Joignabilité des bases et état du pool."""
+    moteurs = _moteurs()
+    if REPLICA not in moteurs:
+        click.echo("Aucun réplica (DATABASE_REPLICA_URL) : tout va à la base principale.")
+    for nom, engine in moteurs.items():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            etat = "✅"
+        except Exception as e:
+            etat = f"⚠️ {e.__class__.__name__}: {e}"
+        click.echo(f"{nom:10s} {engine.url.render_as_string(hide_password=True)}  {etat}")
+        click.echo(f"{'':10s} {engine.pool.status()}")
+
+
+@replica_cli.command("sync")
+def sync_command():
+    """Copie la base principale dans le réplica (SQLite uniquement, essais locaux)."""
+    moteurs = _moteurs()
+    if REPLICA not in moteurs:
+        raise click.ClickException("DATABASE_REPLICA_URL non défini")
+    principale, replica = moteurs["principale"], moteurs[REPLICA]
+    if {principale.url.get_backend_name(), replica.url.get_backend_name()} != {"sqlite"}:
+        raise click.ClickException("Hors SQLite, la réplication est assurée par le serveur de base de données")
+    replica.dispose()
+    with closing(sqlite3.connect(principale.url.database)) as source, \
+            closing(sqlite3.connect(replica.url.database)) as cible:
+        source.backup(cible)
+    click.echo(f"✅ {principale.url.database} → {replica.url.database}")
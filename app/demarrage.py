@@ -0,0 +1,169 @@
+"""
+Démarrage à froid : le processus est préparé avant son premier visiteur.
+
+    app = create_app(prechauffer=True)      # ou PRECHAUFFAGE=1
+
+Étapes, dans un fil en tâche de fond (PRECHAUFFAGE_SYNCHRONE=1 : create_app
+attend la fin) :
+  - gabarits : compilation de tous les gabarits des pages,
+  - connexions : PRECHAUFFAGE_CONNEXIONS connexions du pool ouvertes,
+  - tarifs, flotte, disponibilites, lieux : index mémoire construits,
+  - pages : PRECHAUFFAGE_PAGES servies une fois en interne (table de
+    routage, cache des pages).
+Une étape en échec est journalisée sans bloquer les suivantes.
+
+Sondes (sans session ni CSRF) :
+    /healthz  200 une fois le préchauffage terminé, 503 avant
+    /readyz   200 si le préchauffage a réussi et que les bases répondent
+
+Le schéma n'est pas touché au démarrage d'un worker : c'est une étape du
+déploiement, avant gunicorn (flask --app run schema upgrade). Avec
+gunicorn --preload, le fil de préchauffage resterait dans le processus
+maître : préchauffer alors depuis le hook post_fork.
+"""
+import threading
+import time
+
+from flask import current_app, jsonify
+from sqlalchemy import text
+
+__all__ = ["Prechauffage", "prechauffage"]
+
+CONNEXIONS_DEFAUT = 2
+
+
+def _gabarits():
+    env = current_app.jinja_env
+    # Gabarits d'emails : environnement séparé, compilés par email_renderer
+    noms = env.list_templates(filter_func=lambda n: n.endswith(".html") and not n.startswith("emails/"))
+    for nom in noms:
+        env.get_template(nom)
+    return len(noms)
+
+
+def _connexions():
+    from app import db
+
+    n = current_app.config.get("PRECHAUFFAGE_CONNEXIONS", CONNEXIONS_DEFAUT)
+    # Ouvertes ensemble puis rendues : le pool (base principale et réplica)
+    # les garde pour les requêtes
+    connexions = [engine.connect() for engine in db.engines.values() for _ in range(n)]
+    try:
+        for conn in connexions:
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connexions:
+            conn.close()
+    return len(connexions)
+
+
+def _tarifs():
+    from app.utils.fare_index import fare_index
+    fare_index.rebuild()
+
+
+def _flotte():
+    from app.utils.fleet_index import fleet_index
+    fleet_index.rebuild()
+
+
+def _disponibilites():
+    from app.utils.availability import availability_index
+    availability_index.rebuild()
+
+
+def _lieux():
+    from app.utils.places import places_index
+    places_index.rebuild()
+
+
+def _pages():
+    client = current_app.test_client()
+    pages = current_app.config.get("PRECHAUFFAGE_PAGES", ("/",))
+    for page in pages:
+        client.get(page)
+    return len(pages)
+
+
+ETAPES = (
+    ("gabarits", _gabarits),
+    ("connexions", _connexions),
+    ("tarifs", _tarifs),
+    ("flotte", _flotte),
+    ("disponibilites", _disponibilites),
+    ("lieux", _lieux),
+    ("pages", _pages),
+)
+
+
+class Prechauffage:
+    def __init__(self):
+        self.termine = threading.Event()
+        self.echecs = []
+        self.durees = {}   # étape -> millisecondes
+        self._fil = None
+
+    def init_app(self, app, prechauffer=False):
+        app.add_url_rule("/healthz", "healthz", self.healthz)
+        app.add_url_rule("/readyz", "readyz", self.readyz)
+        app.extensions["prechauffage"] = self
+        if not prechauffer:
+            # Rien à préparer : prêt d'emblée
+            self.termine.set()
+            return
+        if app.config.get("PRECHAUFFAGE_SYNCHRONE"):
+            self.executer(app)
+        else:
+            self.demarrer(app)
+
+    def demarrer(self, app):
+        """Préchauffage en tâche de fond ; les sondes répondent 503 d'ici là."""
+        self.termine.clear()
+        self._fil = threading.Thread(target=self.executer, args=(app,), name="prechauffage", daemon=True)
+        self._fil.start()
+
+    def executer(self, app):
+        self.termine.clear()
+        echecs, durees = [], {}
+        debut = time.perf_counter()
+        with app.app_context():
+            for nom, etape in ETAPES:
+                t = time.perf_counter()
+                try:
+                    etape()
+                except Exception:
+                    app.logger.exception(f"⚠️ [DEMARRAGE] Étape {nom} en échec")
+                    echecs.append(nom)
+                durees[nom] = round((time.perf_counter() - t) * 1000, 1)
+        self.echecs, self.durees = echecs, durees
+        self.termine.set()
+        app.logger.info(
+            f"🔥 [DEMARRAGE] Préchauffage terminé en {(time.perf_counter() - debut) * 1000:.0f} ms "
+            f"({', '.join(f'{n} {ms:g} ms' for n, ms in durees.items())})"
+        )
+
+    # ------------------------
+    # Sondes
+    # ------------------------
+    def healthz(self):
+        if not self.termine.is_set():
+            return jsonify(statut="demarrage"), 503
+        return jsonify(statut="ok")
+
+    def readyz(self):
+        if not self.termine.is_set():
+            return jsonify(statut="demarrage"), 503
+        from app import db
+        try:
+            for engine in db.engines.values():
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+        except Exception:
+            current_app.logger.exception("⚠️ [DEMARRAGE] Base injoignable")
+            return jsonify(statut="base injoignable"), 503
+        if self.echecs:
+            return jsonify(statut="degrade", echecs=self.echecs), 503
+        return jsonify(statut="pret", etapes=self.durees)
+
+
+prechauffage = Prechauffage()
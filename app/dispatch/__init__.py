@@ -0,0 +1,8 @@
+from app.dispatch.solveur import (
+    Course, Engins, Parametres, Plan, affectation, cout, evaluer, matrice_km, optimiser,
+)
+
+__all__ = [
+    "Course", "Engins", "Parametres", "Plan", "affectation", "cout", "evaluer",
+    "matrice_km", "optimiser",
+]
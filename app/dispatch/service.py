@@ -0,0 +1,212 @@
+"""
+Couche I/O du dispatch : charge les réservations d'une journée et la flotte,
+délègue au solveur, puis applique le plan retenu en base.
+
+Réservations « Confirmée » : réaffectables. « En attente » : gardent leur
+véhicule (le client ne l'a pas encore vu confirmé) mais l'occupent.
+Positions : gazetteer local (adresses de départ et d'arrivée) ; durée :
+Trajet.duree_estimee_min, sinon DISPONIBILITE_DUREE_DEFAUT_MIN.
+"""
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app import analytics, db
+from app.cache import response_cache
+from app.dispatch.solveur import Course, Engins, Parametres, cout, evaluer, optimiser
+from app.distance.gazetteer import geocoder
+from app.utils.availability import (
+    DEFAULT_DUREE_MIN, DEFAULT_TAMPON_MIN, availability_index, fin_creneau, verrouiller_creneau,
+)
+from app.utils.fleet_index import Besoin, demande, fleet_index
+
+REAFFECTABLE = "Confirmée"
+IMPOSEE = "En attente"
+
+# changements : [(reservation, ancien vehicule_id, nouveau vehicule_id)] ;
+# refus : pourquoi le plan ne sera pas appliqué (None : applicable)
+Dispatch = namedtuple("Dispatch", "jour actuel optimise changements reservations duree_ms refus")
+
+
+class PlanRefuse(Exception):
+    """Plan optimisé moins bon que le plan actuel : rien n'est modifié."""
+
+
+def _position(adresse, cache):
+    if adresse not in cache:
+        lieu = geocoder(adresse)
+        cache[adresse] = lieu[1:] if lieu else None
+    return cache[adresse]
+
+
+def parametres():
+    config = current_app.config
+    base = config.get("DISPATCH_BASE")
+    return Parametres(
+        vitesse_kmh=config.get("DISTANCE_SPEED_KMH", 40.0),
+        facteur_route=config.get("DISTANCE_ROAD_FACTOR", 1.35),
+        tampon_min=config.get("DISPONIBILITE_TAMPON_MIN", DEFAULT_TAMPON_MIN),
+        cout_vehicule_km=config.get("DISPATCH_COUT_VEHICULE_KM", 50.0),
+        km_inconnu=config.get("DISPATCH_KM_INCONNU", 10.0),
+        base=_position(base, {}) if base else None,
+    )
+
+
+def engins():
+    """Flotte de l'index des capacités, au format du solveur."""
+    f = fleet_index.flotte()
+    return Engins(f.ids, f.passagers, f.valises, f.volume, f.sieges, f.en_service)
+
+
+def reservations_du_jour(jour):
+    from app.models.models import Reservation
+
+    debut = datetime.combine(jour, datetime.min.time())
+    return (
+        Reservation.query.options(joinedload(Reservation.trajet))
+        .filter(Reservation.statut.in_((REAFFECTABLE, IMPOSEE)),
+                Reservation.date_heure >= debut,
+                Reservation.date_heure < debut + timedelta(days=1))
+        .order_by(Reservation.date_heure, Reservation.id)
+        .all()
+    )
+
+
+def courses(reservations, jour):
+    duree_defaut = current_app.config.get("DISPONIBILITE_DUREE_DEFAUT_MIN", DEFAULT_DUREE_MIN)
+    minuit = datetime.combine(jour, datetime.min.time())
+    positions = {}
+    resultat = []
+    for r in reservations:
+        debut = int((r.date_heure - minuit).total_seconds() // 60)
+        duree = (r.trajet.duree_estimee_min if r.trajet else None) or duree_defaut
+        passagers, valises, volume, sieges = demande(Besoin(
+            passagers=max(r.nb_passagers or 1, 1),
+            valises_23kg=r.nb_valises_23kg or 0,
+            valises_10kg=r.nb_valises_10kg or 0,
+            sieges_bebe=r.nb_sieges_bebe or 0,
+        ))
+        resultat.append(Course(
+            id=r.id, debut=debut, fin=debut + duree,
+            depart=_position(r.adresse_depart, positions),
+            arrivee=_position(r.adresse_arrivee, positions),
+            passagers=passagers, valises=valises, volume=volume, sieges=sieges,
+            vehicule_id=r.vehicule_id, fixe=r.statut != REAFFECTABLE,
+        ))
+    return resultat
+
+
+def plan_du_jour(jour):
+    """Plan actuel et plan optimisé des réservations de `jour` (date)."""
+    reservations = reservations_du_jour(jour)
+    t = time.perf_counter()
+    lot, flotte, p = courses(reservations, jour), engins(), parametres()
+    actuel = evaluer(lot, flotte, p)
+    optimise = optimiser(lot, flotte, p)
+    duree_ms = (time.perf_counter() - t) * 1000
+
+    # Une course intenable n'est jamais déplacée
+    intenables = set(optimise.conflits)
+    changements = []
+    for r in reservations:
+        nouveau = optimise.affectations.get(r.id)
+        if nouveau is not None and nouveau != r.vehicule_id and r.id not in intenables:
+            changements.append((r, r.vehicule_id, nouveau))
+
+    refus = None
+    if len(optimise.conflits) > len(actuel.conflits):
+        refus = "le plan optimisé laisse plus de courses intenables que le plan actuel"
+    elif cout(optimise, p) > cout(actuel, p) + 1e-6:
+        refus = "le plan optimisé coûte plus (km à vide et véhicules) que le plan actuel"
+    return Dispatch(
+        jour=jour,
+        actuel=actuel,
+        optimise=optimise,
+        changements=changements,
+        reservations={r.id: r for r in reservations},
+        duree_ms=duree_ms,
+        refus=refus if changements else None,
+    )
+
+
+def appliquer(jour):
+    """
+    Recalcule le plan de `jour` et réaffecte les réservations concernées,
+    en une transaction. PlanRefuse si le plan optimisé est moins bon que le
+    plan actuel (plus de courses intenables ou coût plus élevé). Chaque
+    nouveau créneau est contrôlé en base comme à la réservation
+    (CreneauIndisponible si une réservation est arrivée entre temps).
+    Dans les deux cas rien n'est modifié. Retourne le Dispatch appliqué.
+    """
+    d = plan_du_jour(jour)
+    if d.refus:
+        raise PlanRefuse(d.refus)
+    if not d.changements:
+        return d
+    try:
+        for r, _, nouveau in d.changements:
+            analytics.transition(r, r.statut, None)
+            r.vehicule_id = nouveau
+            analytics.transition(r, None, r.statut)
+        # Tout le plan en base avant les contrôles : les échanges de véhicules
+        # entre deux réservations ne se bloquent pas l'un l'autre
+        db.session.flush()
+        for r, _, nouveau in d.changements:
+            duree = r.trajet.duree_estimee_min if r.trajet else None
+            verrouiller_creneau(nouveau, r.date_heure, fin_creneau(r.date_heure, duree), exclure_id=r.id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    availability_index.invalidate()
+    response_cache.invalidate("reservations")
+    current_app.logger.info(
+        f"🚐 [DISPATCH] {jour:%Y-%m-%d} : {len(d.changements)} réservation(s) réaffectée(s), "
+        f"km à vide {d.actuel.km_a_vide:.0f} → {d.optimise.km_a_vide:.0f}"
+    )
+    return d
+
+
+def _resume(plan):
+    return {
+        "vehicules": len(plan.tournees),
+        "km_a_vide": round(plan.km_a_vide, 1),
+        "non_affectees": plan.non_affectees,
+        "conflits": plan.conflits,
+    }
+
+
+def en_json(d):
+    """Dispatch -> dict sérialisable (API)."""
+    return {
+        "jour": d.jour.isoformat(),
+        "duree_ms": round(d.duree_ms, 1),
+        "applicable": bool(d.changements) and d.refus is None,
+        "refus": d.refus,
+        "actuel": _resume(d.actuel),
+        "optimise": _resume(d.optimise),
+        "tournees": [
+            {
+                "vehicule_id": vid,
+                "km_a_vide": round(d.optimise.km_vehicules.get(vid, 0.0), 1),
+                "reservations": [
+                    {
+                        "id": rid,
+                        "date_heure": d.reservations[rid].date_heure.isoformat(),
+                        "depart": d.reservations[rid].adresse_depart,
+                        "arrivee": d.reservations[rid].adresse_arrivee,
+                        "statut": d.reservations[rid].statut,
+                    }
+                    for rid in ids
+                ],
+            }
+            for vid, ids in sorted(d.optimise.tournees.items())
+        ],
+        "changements": [
+            {"reservation_id": r.id, "de": ancien, "vers": nouveau}
+            for r, ancien, nouveau in d.changements
+        ],
+    }
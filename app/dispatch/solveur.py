@@ -0,0 +1,329 @@
+"""
+Affectation des courses d'une journée aux véhicules (sans accès à la base).
+
+Une course est servie par un véhicule qui la peut contenir (passagers,
+valises, volume, sièges bébé) et qui est au point de départ à l'heure :
+fin de sa course précédente + tampon + trajet à vide ≤ début. Objectif :
+kilomètres à vide, plus cout_vehicule_km par véhicule mis en service (moins
+de véhicules d'abord, puis moins de route à vide).
+
+Résolution par horizon glissant : les courses sont prises dans l'ordre
+chronologique par vagues de largeur tampon + plus courte durée ; deux
+courses d'une même vague ne peuvent pas s'enchaîner sur un véhicule, donc
+chaque vague est un problème d'affectation (algorithme hongrois) entre ses
+courses et les véhicules, avec une matrice de coûts calculée d'un bloc.
+Les courses imposées (vehicule_id + fixe) gardent leur véhicule ; les
+autres ne sont proposées qu'aux véhicules en service, et une course
+qu'aucun véhicule ne peut prendre à l'heure garde le sien (elle n'est
+jamais déplacée vers un véhicule en retard).
+
+Trajets à vide : distance à vol d'oiseau × facteur_route, à vitesse_kmh ;
+km_inconnu quand une adresse n'a pas été géocodée.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# debut, fin : minutes depuis le début de la journée ; depart, arrivee :
+# (lat, lon) ou None ; vehicule_id : affectation actuelle ; fixe : à garder
+Course = namedtuple(
+    "Course",
+    "id debut fin depart arrivee passagers valises volume sieges vehicule_id fixe",
+    defaults=(0, 0, 0, None, False),
+)
+# Capacités de la flotte (tableaux alignés, comme fleet_index.Flotte) ;
+# en_service : véhicules proposables (None = tous)
+Engins = namedtuple("Engins", "ids passagers valises volume sieges en_service", defaults=(None,))
+Parametres = namedtuple(
+    "Parametres",
+    "vitesse_kmh facteur_route tampon_min cout_vehicule_km km_inconnu base",
+    defaults=(40.0, 1.35, 30, 50.0, 10.0, None),
+)
+# affectations : {course: véhicule} ; tournees : {véhicule: [courses]} ;
+# km_vehicules : {véhicule: km à vide} ; non_affectees : courses laissées sur
+# leur véhicule faute d'autre véhicule à l'heure ; conflits : courses
+# intenables (véhicule en retard ou trop petit)
+Plan = namedtuple("Plan", "affectations tournees km_vehicules km_a_vide non_affectees conflits")
+
+RAYON_TERRE_KM = 6371.0
+INFAISABLE = 1e12
+NON_AFFECTEE = 1e9
+# Départage : à coût égal, le plus petit véhicule qui convient
+PENALITE_PLACE_KM = 0.2
+
+
+def matrice_km(lat1, lon1, lat2, lon2, facteur_route=1.0, km_inconnu=0.0):
+    """Distances routières estimées (broadcasting NumPy) ; NaN -> km_inconnu."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp = p2 - p1
+    dl = np.radians(lon2) - np.radians(lon1)
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    km = 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * facteur_route
+    return np.where(np.isnan(km), km_inconnu, km)
+
+
+def affectation(cout):
+    """
+    Affectation de coût minimal des lignes aux colonnes (n ≤ m), méthode
+    hongroise par chemins augmentants, boucle interne vectorisée.
+    Retourne la colonne de chaque ligne.
+    """
+    n, m = cout.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    ligne_de = np.zeros(m + 1, dtype=np.int64)   # colonne j (1..m) -> ligne (1..n), 0 = libre
+    chemin = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        ligne_de[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        vu = np.zeros(m + 1, dtype=bool)
+        while ligne_de[j0]:
+            vu[j0] = True
+            i0 = ligne_de[j0]
+            libres = ~vu[1:]
+            reduit = cout[i0 - 1] - u[i0] - v[1:]
+            mieux = libres & (reduit < minv[1:])
+            minv[1:][mieux] = reduit[mieux]
+            chemin[1:][mieux] = j0
+            candidats = np.where(libres, minv[1:], np.inf)
+            j1 = int(np.argmin(candidats)) + 1
+            delta = candidats[j1 - 1]
+            u[ligne_de[vu]] += delta
+            v[vu] -= delta
+            minv[1:][libres] -= delta
+            j0 = j1
+        while j0:
+            j1 = chemin[j0]
+            ligne_de[j0] = ligne_de[j1]
+            j0 = j1
+    colonnes = np.empty(n, dtype=np.int64)
+    for j in range(1, m + 1):
+        if ligne_de[j]:
+            colonnes[ligne_de[j] - 1] = j - 1
+    return colonnes
+
+
+def _points(points):
+    lat = np.array([p[0] if p else np.nan for p in points], dtype=np.float64)
+    lon = np.array([p[1] if p else np.nan for p in points], dtype=np.float64)
+    return lat, lon
+
+
+def _demandes(courses):
+    return (
+        np.array([c.passagers for c in courses], dtype=np.int32),
+        np.array([c.valises for c in courses], dtype=np.int32),
+        np.array([c.volume for c in courses], dtype=np.int32),
+        np.array([c.sieges for c in courses], dtype=np.int32),
+    )
+
+
+def compatibles(courses, engins):
+    """Matrice (courses × véhicules) : le véhicule peut-il contenir la course ?"""
+    p, va, vo, s = _demandes(courses)
+    return (
+        (engins.passagers[None, :] >= p[:, None])
+        & (engins.valises[None, :] >= va[:, None])
+        & (engins.volume[None, :] >= vo[:, None])
+        & (engins.sieges[None, :] >= s[:, None])
+    )
+
+
+def _proposables(courses, engins):
+    ok = compatibles(courses, engins)
+    return ok if engins.en_service is None else ok & engins.en_service[None, :]
+
+
+class _Etat:
+    """Position, heure de disponibilité et km à vide de chaque véhicule."""
+
+    def __init__(self, nb, p):
+        self.p = p
+        base = p.base or (np.nan, np.nan)
+        self.lat = np.full(nb, base[0])
+        self.lon = np.full(nb, base[1])
+        self.libre = np.full(nb, -np.inf)
+        self.utilise = np.zeros(nb, dtype=bool)
+        self.km = np.zeros(nb)
+
+    def approche(self, lat, lon, cols=slice(None)):
+        """km à vide jusqu'aux points (lat, lon) depuis les véhicules `cols`."""
+        km = matrice_km(
+            self.lat[cols, None], self.lon[cols, None], lat[None, :], lon[None, :],
+            self.p.facteur_route, self.p.km_inconnu,
+        )
+        # Véhicule pas encore sorti, sans base : part du premier départ
+        if self.p.base is None:
+            km = np.where(self.utilise[cols, None], km, 0.0)
+        return km
+
+    def servir(self, v, km, course):
+        self.km[v] += km
+        self.utilise[v] = True
+        # Position : arrivée de la course (départ à défaut)
+        self.lat[v], self.lon[v] = course.arrivee or course.depart or (np.nan, np.nan)
+        self.libre[v] = course.fin + self.p.tampon_min
+
+    def imposer(self, v, course, capacite_ok=True):
+        """Le véhicule v sert la course quoi qu'il arrive ; False si intenable."""
+        lat, lon = _points([course.depart])
+        km = float(self.approche(lat, lon, slice(v, v + 1))[0, 0])
+        tenable = capacite_ok and self.libre[v] + km * 60.0 / self.p.vitesse_kmh <= course.debut
+        self.servir(v, km, course)
+        return tenable
+
+    def retour_base(self):
+        if self.p.base is not None and self.utilise.any():
+            km = matrice_km(
+                self.lat, self.lon, self.p.base[0], self.p.base[1], self.p.facteur_route, self.p.km_inconnu,
+            )
+            self.km += np.where(self.utilise, km, 0.0)
+
+
+def _plan(courses, engins, etat, affectations, non_affectees, conflits):
+    etat.retour_base()
+    tournees = {}
+    for c in sorted(courses, key=lambda c: (c.debut, c.id)):
+        vid = affectations.get(c.id)
+        if vid is not None:
+            tournees.setdefault(vid, []).append(c.id)
+    km_vehicules = {int(engins.ids[k]): float(etat.km[k]) for k in np.flatnonzero(etat.utilise)}
+    return Plan(
+        affectations=affectations,
+        tournees=tournees,
+        km_vehicules=km_vehicules,
+        km_a_vide=float(etat.km.sum()),
+        non_affectees=non_affectees,
+        conflits=conflits,
+    )
+
+
+def cout(plan, p=Parametres()):
+    """Coût d'un plan : km à vide + cout_vehicule_km par véhicule utilisé."""
+    return plan.km_a_vide + p.cout_vehicule_km * len(plan.tournees)
+
+
+def optimiser(courses, engins, p=Parametres()):
+    """Plan de coût minimal (heuristique par vagues, voir en tête du module)."""
+    courses = sorted(courses, key=lambda c: (c.debut, c.id))
+    nb = len(engins.ids)
+    colonne = {int(vid): k for k, vid in enumerate(engins.ids)}
+    etat = _Etat(nb, p)
+    affectations, non_affectees, conflits = {}, [], []
+    if not courses:
+        return _plan(courses, engins, etat, affectations, non_affectees, conflits)
+
+    proposables = _proposables(courses, engins)
+    surplus = (engins.passagers[None, :] - _demandes(courses)[0][:, None]) * PENALITE_PLACE_KM
+    debuts = np.array([c.debut for c in courses], dtype=np.float64)
+    fins = np.array([c.fin for c in courses], dtype=np.float64) + p.tampon_min
+    dep_lat, dep_lon = _points([c.depart for c in courses])
+    arr_lat, arr_lon = _points([c.arrivee or c.depart for c in courses])
+    vitesse = p.vitesse_kmh / 60.0
+    fenetre = p.tampon_min + max(min(c.fin - c.debut for c in courses), 1)
+    # Courses imposées (ordre chronologique) et leur véhicule
+    fixes = [(j, colonne[c.vehicule_id]) for j, c in enumerate(courses) if c.fixe and c.vehicule_id in colonne]
+    fixes_j = np.array([j for j, _ in fixes], dtype=np.int64)
+    fixes_v = np.array([v for _, v in fixes], dtype=np.int64)
+
+    def repartir(idx, apres, pris):
+        """
+        Véhicule retenu pour chaque course libre d'une vague (indices idx,
+        vague finissant à l'indice `apres`) ; None : la course garde le sien.
+        """
+        # Prochaine course imposée de chaque véhicule : il doit pouvoir la
+        # rejoindre à l'heure après la course de la vague
+        suite = fixes_j >= apres
+        vs, premiers = np.unique(fixes_v[suite], return_index=True)
+        prochaine = fixes_j[suite][premiers]
+        limite = np.full(nb, np.inf)
+        limite[vs] = debuts[prochaine]
+        vers_lat, vers_lon = np.full(nb, np.nan), np.full(nb, np.nan)
+        vers_lat[vs], vers_lon[vs] = dep_lat[prochaine], dep_lon[prochaine]
+        rejoindre = matrice_km(
+            arr_lat[idx, None], arr_lon[idx, None], vers_lat[None, :], vers_lon[None, :],
+            p.facteur_route, p.km_inconnu,
+        )
+        ensuite_a_l_heure = fins[idx, None] + rejoindre / vitesse <= limite[None, :]
+
+        # Matrice de coûts de la vague (courses × véhicules), calculée d'un bloc
+        km = etat.approche(dep_lat[idx], dep_lon[idx]).T
+        a_l_heure = etat.libre[None, :] + km / vitesse <= debuts[idx, None]
+        faisable = proposables[idx] & a_l_heure & ensuite_a_l_heure
+        cout = km + p.cout_vehicule_km * ~etat.utilise[None, :] + surplus[idx]
+
+        # Une course n'est jamais déplacée vers un véhicule en retard : sans
+        # véhicule à l'heure, elle garde le sien, qui lui est réservé. Si un
+        # véhicule ainsi réservé a été donné à une autre course de la vague,
+        # l'affectation est recalculée sans lui.
+        while True:
+            ok = faisable & ~pris[None, :]
+            colonnes = affectation(np.hstack([
+                np.where(ok, cout, INFAISABLE),
+                # Une colonne fictive par course : « non affectée »
+                np.full((len(idx), len(idx)), NON_AFFECTEE),
+            ]))
+            retenus = [int(v) if v < nb and ok[r, v] else None for r, v in enumerate(colonnes)]
+            gardes = {colonne.get(courses[j].vehicule_id) for j, v in zip(idx, retenus) if v is None}
+            reprises = gardes & set(retenus)
+            if not reprises:
+                return retenus
+            pris[list(reprises)] = True
+
+    i = 0
+    while i < len(courses):
+        k = int(np.searchsorted(debuts, debuts[i] + fenetre, side="left"))
+        vague = range(i, max(k, i + 1))
+        i = vague.stop
+
+        # Véhicule de chaque course de la vague ; les courses imposées
+        # gardent le leur, pris pour la vague
+        choix = {}
+        pris = np.zeros(nb, dtype=bool)
+        for j in vague:
+            if courses[j].fixe:
+                choix[j] = courses[j].vehicule_id
+                if (v := colonne.get(choix[j])) is not None:
+                    pris[v] = True
+        libres = np.array([j for j in vague if j not in choix], dtype=np.int64)
+        if len(libres):
+            for j, v in zip(libres, repartir(libres, vague.stop, pris)):
+                if v is None:
+                    non_affectees.append(courses[j].id)
+                    choix[j] = courses[j].vehicule_id
+                else:
+                    choix[j] = int(engins.ids[v])
+
+        # La vague est jouée dans l'ordre chronologique, comme par evaluer()
+        for j in vague:
+            c = courses[j]
+            affectations[c.id] = choix[j]
+            v = colonne.get(choix[j])
+            if v is not None and not etat.imposer(v, c, proposables[j, v]):
+                conflits.append(c.id)
+
+    return _plan(courses, engins, etat, affectations, non_affectees, conflits)
+
+
+def evaluer(courses, engins, p=Parametres()):
+    """
+    Plan actuel (vehicule_id de chaque course) mesuré comme un plan optimisé :
+    km à vide et courses intenables (véhicule trop petit, pas à l'heure ou
+    hors service).
+    """
+    courses = sorted(courses, key=lambda c: (c.debut, c.id))
+    colonne = {int(vid): k for k, vid in enumerate(engins.ids)}
+    etat = _Etat(len(engins.ids), p)
+    proposables = _proposables(courses, engins) if courses else None
+    affectations, non_affectees, conflits = {}, [], []
+    for j, c in enumerate(courses):
+        v = colonne.get(c.vehicule_id)
+        if v is None:
+            # Véhicule supprimé de la flotte
+            non_affectees.append(c.id)
+            continue
+        if not etat.imposer(v, c, proposables[j, v]):
+            conflits.append(c.id)
+        affectations[c.id] = c.vehicule_id
+    return _plan(courses, engins, etat, affectations, non_affectees, conflits)
@@ -0,0 +1,82 @@
+"""
+Fournisseur distance/durée utilisé par le calcul des tarifs.
+
+    distance_km, temps_min = get_distance_and_time("Dakar Plateau", "AIBD")
+
+Ordre de résolution : LRU mémoire -> table distance_cache -> backend
+(DISTANCE_BACKEND : "haversine" hors-ligne par défaut, ou "google").
+"""
+from flask import current_app
+
+from app.distance.backends import (
+    BACKENDS, DistanceBackend, DistanceError, register_backend,
+)
+from app.distance.cache import DBDistanceStore, TTLCache
+from app.utils.adresses import normaliser_adresse
+
+__all__ = [
+    "DistanceBackend", "DistanceError", "DistanceProvider",
+    "distance_provider", "get_distance_and_time", "register_backend",
+]
+
+
+def cle_trajet(depart, arrivee):
+    """Clé de cache : paire normalisée, ordonnée (la distance routière est
+    considérée symétrique)."""
+    a, b = normaliser_adresse(depart), normaliser_adresse(arrivee)
+    return (a, b) if a <= b else (b, a)
+
+
+class DistanceProvider:
+    def __init__(self):
+        self.memory = TTLCache()
+        self.store = None
+        self.backend = None
+        self.erreur_ttl = 60
+
+    def init_app(self, app):
+        name = app.config.get("DISTANCE_BACKEND", "haversine")
+        if name not in BACKENDS:
+            raise ValueError(f"DISTANCE_BACKEND inconnu : {name}")
+        self.backend = BACKENDS[name](app.config)
+        self.memory.maxsize = app.config.get("DISTANCE_CACHE_SIZE", 2048)
+        self.memory.ttl = app.config.get("DISTANCE_CACHE_TTL", 86400)
+        self.erreur_ttl = app.config.get("DISTANCE_ERREUR_TTL", 60)
+        self.store = DBDistanceStore()
+        app.extensions["distance_provider"] = self
+
+    def get(self, depart, arrivee):
+        key = cle_trajet(depart, arrivee)
+        if not key[0] or not key[1]:
+            raise DistanceError("Adresses manquantes")
+
+        value = self.memory.get(key)
+        if isinstance(value, DistanceError):
+            raise value
+        if value is not None:
+            return value
+
+        value = self.store.get(key)
+        if value is None:
+            try:
+                value = self.backend.distance_and_time(depart, arrivee)
+            except DistanceError as e:
+                # Échec mémorisé en LRU seulement : évite de solliciter
+                # base et backend à chaque frappe pour une adresse inconnue.
+                # Un échec passager (réseau, quota) n'est gardé que brièvement.
+                self.memory.set(key, e, ttl=None if e.definitif else self.erreur_ttl)
+                raise
+            self.store.set(key, value, source=self.backend.name)
+            current_app.logger.info(
+                f"[DISTANCE] {self.backend.name}: {key[0]} <-> {key[1]} = {value[0]:.1f} km"
+            )
+        self.memory.set(key, value)
+        return value
+
+
+distance_provider = DistanceProvider()
+
+
+def get_distance_and_time(depart, arrivee):
+    """(distance en km, durée en minutes) entre deux adresses."""
+    return distance_provider.get(depart, arrivee)
@@ -0,0 +1,118 @@
+"""
+Backends de calcul distance/durée.
+
+Un backend implémente distance_and_time(depart, arrivee) -> (km, minutes)
+et lève DistanceError si le trajet ne peut pas être estimé (definitif :
+le même appel échouera encore, ex. lieu inconnu).
+"""
+import math
+
+import requests
+
+from app.distance.gazetteer import geocoder
+
+
+class DistanceError(Exception):
+    def __init__(self, message, definitif=False):
+        super().__init__(message)
+        self.definitif = definitif
+
+
+class DistanceBackend:
+    name = "base"
+
+    def __init__(self, config=None):
+        self.config = config or {}
+
+    def distance_and_time(self, depart, arrivee):
+        raise NotImplementedError
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distance orthodromique en km."""
+    rlat1, rlat2 = math.radians(lat1), math.radians(lat2)
+    dlat = rlat2 - rlat1
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(rlat1) * math.cos(rlat2) * math.sin(dlon / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+class HaversineBackend(DistanceBackend):
+    """
+    Estimation hors-ligne : géocodage par le gazetteer local, distance à vol
+    d'oiseau corrigée d'un facteur routier, durée à vitesse moyenne urbaine.
+    """
+    name = "haversine"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.road_factor = float(self.config.get("DISTANCE_ROAD_FACTOR", 1.35))
+        self.vitesse_kmh = float(self.config.get("DISTANCE_SPEED_KMH", 40))
+
+    def distance_and_time(self, depart, arrivee):
+        a = geocoder(depart)
+        if not a:
+            raise DistanceError(f"Lieu inconnu : {depart}", definitif=True)
+        b = geocoder(arrivee)
+        if not b:
+            raise DistanceError(f"Lieu inconnu : {arrivee}", definitif=True)
+        km = haversine_km(a[1], a[2], b[1], b[2]) * self.road_factor
+        minutes = km / self.vitesse_kmh * 60
+        return km, minutes
+
+
+class GoogleMapsBackend(DistanceBackend):
+    """
+    Google Distance Matrix (HTTP). Nécessite GOOGLE_MAPS_KEY ; la session
+    HTTP est réutilisée entre les appels (keep-alive).
+    """
+    name = "google"
+    URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.api_key = self.config.get("GOOGLE_MAPS_KEY") or ""
+        self.http = requests.Session()
+
+    def distance_and_time(self, depart, arrivee):
+        if not self.api_key:
+            raise DistanceError("GOOGLE_MAPS_KEY manquant")
+        try:
+            r = self.http.get(
+                self.URL,
+                params={
+                    "origins": depart,
+                    "destinations": arrivee,
+                    "region": "sn",
+                    "language": "fr",
+                    "key": self.api_key,
+                },
+                timeout=5,
+            )
+        except requests.RequestException as e:
+            # Réseau : passager (mémorisé brièvement, voir DISTANCE_ERREUR_TTL)
+            raise DistanceError(f"Google Maps injoignable : {e}")
+        if r.status_code >= 400:
+            raise DistanceError(f"Erreur Google Maps {r.status_code}")
+        try:
+            element = r.json()["rows"][0]["elements"][0]
+        except (ValueError, KeyError, IndexError):
+            raise DistanceError("Réponse Google Maps inattendue")
+        if element.get("status") != "OK":
+            raise DistanceError(
+                f"Trajet introuvable ({element.get('status')})",
+                definitif=element.get("status") in ("NOT_FOUND", "ZERO_RESULTS"),
+            )
+        return element["distance"]["value"] / 1000.0, element["duration"]["value"] / 60.0
+
+
+BACKENDS = {
+    HaversineBackend.name: HaversineBackend,
+    GoogleMapsBackend.name: GoogleMapsBackend,
+}
+
+
+def register_backend(cls):
+    """Enregistre un backend supplémentaire (sélectionnable via DISTANCE_BACKEND)."""
+    BACKENDS[cls.name] = cls
+    return cls
@@ -0,0 +1,89 @@
+"""
+Cache à deux niveaux pour les distances :
+  1. LRU en mémoire avec expiration (par processus),
+  2. table distance_cache en base (partagée entre workers et redémarrages).
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+
+class TTLCache:
+    def __init__(self, maxsize=2048, ttl=86400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if self.ttl and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (ttl or self.ttl or 0))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DBDistanceStore:
+    """
+    Lecture/écriture directe sur la table (connexion dédiée) pour ne pas
+    interférer avec la transaction ORM de la requête en cours.
+    """
+
+    def __init__(self):
+        from app.models.models import DistanceCache
+        self.table = DistanceCache.__table__
+
+    def _cle(self, key):
+        """Clé telle que stockée : tronquée à la taille des colonnes, en lecture comme en écriture."""
+        return key[0][:self.table.c.depart_norm.type.length], key[1][:self.table.c.arrivee_norm.type.length]
+
+    def get(self, key):
+        t = self.table
+        key = self._cle(key)
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(t.c.distance_km, t.c.duree_min)
+                .where(t.c.depart_norm == key[0], t.c.arrivee_norm == key[1])
+            ).first()
+        return (row.distance_km, row.duree_min) if row else None
+
+    def set(self, key, value, source=None):
+        key = self._cle(key)
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(self.table.insert().values(
+                    depart_norm=key[0],
+                    arrivee_norm=key[1],
+                    distance_km=value[0],
+                    duree_min=value[1],
+                    source=source,
+                    created_at=datetime.utcnow(),
+                ))
+        except IntegrityError:
+            # Un autre worker a inséré la même paire entre-temps
+            pass
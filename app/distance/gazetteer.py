@@ -0,0 +1,112 @@
+"""
+Gazetteer local des lieux de la région de Dakar (coordonnées WGS84 approchées).
+
+Permet de géocoder une adresse sans appel réseau : on cherche dans
+l'adresse le plus long nom de lieu connu (ou un de ses alias).
+"""
+import re
+import unicodedata
+
+# nom canonique -> (latitude, longitude, alias...)
+PLACES = {
+    # Aéroports & gares
+    "AIBD": (14.6700, -17.0733, "aeroport aibd", "aeroport international blaise diagne",
+             "blaise diagne", "aeroport de diass", "aeroport"),
+    "Aéroport Léopold Sédar Senghor": (14.7397, -17.4902, "aeroport de yoff", "aeroport lss",
+                                       "ancien aeroport"),
+    "Gare TER Dakar": (14.6736, -17.4322, "gare de dakar", "gare ter dakar"),
+    "Gare TER Diamniadio": (14.7180, -17.1860, "gare de diamniadio"),
+    "Port de Dakar": (14.6780, -17.4250, "port autonome", "port de dakar"),
+
+    # Dakar - quartiers
+    "Dakar Plateau": (14.6708, -17.4381, "plateau", "dakar plateau", "centre-ville", "centre ville"),
+    "Dakar": (14.6928, -17.4467,),
+    "Médina": (14.6840, -17.4470, "medina"),
+    "Fann": (14.6900, -17.4650, "fann residence", "fann"),
+    "Point E": (14.6950, -17.4600, "point e"),
+    "Corniche Ouest": (14.6930, -17.4730, "corniche"),
+    "Mermoz": (14.7090, -17.4750, "mermoz"),
+    "Sacré-Cœur": (14.7200, -17.4640, "sacre coeur", "sacre-coeur"),
+    "Liberté": (14.7180, -17.4560, "liberte"),
+    "HLM": (14.7100, -17.4450, "hlm"),
+    "Grand Yoff": (14.7370, -17.4580, "grand yoff", "grand-yoff"),
+    "Ouakam": (14.7236, -17.4870, "ouakam"),
+    "Mamelles": (14.7290, -17.5020, "mamelles", "monument de la renaissance"),
+    "Almadies": (14.7458, -17.5133, "almadies", "pointe des almadies"),
+    "Ngor": (14.7500, -17.5150, "ngor"),
+    "Yoff": (14.7580, -17.4700, "yoff"),
+    "Parcelles Assainies": (14.7650, -17.4400, "parcelles assainies", "parcelles"),
+    "Patte d'Oie": (14.7470, -17.4430, "patte d'oie", "patte doie"),
+    "Hann": (14.7200, -17.4280, "hann", "hann bel air", "bel air"),
+
+    # Hôtels & repères
+    "Terrou-Bi": (14.6880, -17.4700, "terrou-bi", "terrou bi", "hotel terrou-bi"),
+    "Radisson Blu Dakar": (14.6965, -17.4740, "radisson"),
+    "King Fahd Palace": (14.7440, -17.5170, "king fahd"),
+    "Pullman Dakar Teranga": (14.6690, -17.4300, "pullman", "teranga"),
+    "UCAD": (14.6930, -17.4610, "ucad", "universite cheikh anta diop"),
+    "Stade Léopold Sédar Senghor": (14.7460, -17.4520, "stade lss", "stade leopold sedar senghor"),
+    "Gorée": (14.6670, -17.3980, "goree", "ile de goree"),
+
+    # Banlieue
+    "Pikine": (14.7550, -17.3900, "pikine"),
+    "Guédiawaye": (14.7700, -17.4000, "guediawaye"),
+    "Thiaroye": (14.7500, -17.3700, "thiaroye"),
+    "Keur Massar": (14.7830, -17.3180, "keur massar"),
+    "Rufisque": (14.7167, -17.2667, "rufisque"),
+    "Bargny": (14.6950, -17.2300, "bargny"),
+    "Diamniadio": (14.7200, -17.1830, "diamniadio"),
+    "Sébikotane": (14.7450, -17.1350, "sebikotane"),
+    "Lac Rose": (14.8400, -17.2330, "lac rose", "lac retba"),
+
+    # Petite Côte & régions
+    "Diass": (14.6667, -17.0667, "diass"),
+    "Toubab Dialaw": (14.6010, -17.1490, "toubab dialaw"),
+    "Popenguine": (14.5500, -17.1100, "popenguine"),
+    "Somone": (14.4860, -17.0830, "somone"),
+    "Saly": (14.4470, -17.0100, "saly", "saly portudal"),
+    "Mbour": (14.4200, -16.9700, "mbour"),
+    "Thiès": (14.7910, -16.9359, "thies"),
+    "Kaolack": (14.1500, -16.0667, "kaolack"),
+    "Touba": (14.8500, -15.8833, "touba"),
+    "Saint-Louis": (16.0179, -16.4896, "saint-louis", "saint louis", "st louis"),
+}
+
+_COORDS = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
+
+
+def _plier(value):
+    """Minuscules sans accents, pour la recherche dans le gazetteer."""
+    s = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+def _compiler():
+    index = {}
+    for nom, (lat, lon, *alias) in PLACES.items():
+        for a in (nom, *alias):
+            index.setdefault(_plier(a), (nom, lat, lon))
+    # Alias les plus longs en premier : "aeroport aibd" avant "aeroport"
+    motifs = sorted(index, key=len, reverse=True)
+    regex = re.compile(r"(?<!\w)(" + "|".join(re.escape(m) for m in motifs) + r")(?!\w)")
+    return index, regex
+
+
+_INDEX, _REGEX = _compiler()
+
+
+def geocoder(adresse):
+    """
+    Retourne (nom_canonique, lat, lon) pour une adresse, ou None si aucun
+    lieu connu n'y figure. Accepte aussi des coordonnées "lat,lon".
+    """
+    if not adresse:
+        return None
+    m = _COORDS.match(adresse)
+    if m:
+        lat, lon = float(m.group(1)), float(m.group(2))
+        return (f"{lat:.5f},{lon:.5f}", lat, lon)
+    found = _REGEX.search(_plier(adresse))
+    if not found:
+        return None
+    return _INDEX[found.group(1)]
@@ -0,0 +1,89 @@
+"""
+Envoi des emails via une file persistante (table email_outbox).
+
+Côté requête : enqueue_template(gabarit, destinataire, **ids) (ou
+enqueue_email(...) pour un message déjà rédigé) puis db.session.commit().
+Côté envoi : worker intégré au processus web (EMAIL_WORKER_INPROCESS=1)
+ou worker autonome : flask emails worker
+"""
+import click
+from flask.cli import AppGroup
+
+from app.emails.outbox import (
+    email_valide, enqueue_email, enqueue_reservation_emails, enqueue_template,
+)
+from app.emails.rendering import email_renderer
+
+__all__ = [
+    "email_renderer", "email_valide", "enqueue_email",
+    "enqueue_reservation_emails", "enqueue_template", "init_app",
+]
+
+emails_cli = AppGroup("emails", help="File d'envoi des emails.")
+
+
+@emails_cli.command("worker")
+@click.option("--once", is_flag=True, help="Envoyer ce qui est dû puis quitter.")
+def worker_command(once):
+    """Lance le worker d'envoi (premier plan)."""
+    from flask import current_app
+    from app.emails.worker import OutboxWorker
+
+    app = current_app._get_current_object()
+    worker = OutboxWorker(app)
+    if once:
+        worker.drain()
+        worker.stop()
+        return
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+@emails_cli.command("status")
+def status_command():
+    """Nombre d'emails par statut."""
+    from sqlalchemy import func
+    from app import db
+    from app.models.models import EmailOutbox
+
+    rows = db.session.query(EmailOutbox.statut, func.count()).group_by(EmailOutbox.statut).all()
+    for statut, n in sorted(rows):
+        click.echo(f"{statut:12s} {n}")
+
+
+@emails_cli.command("retry-dead")
+def retry_dead_command():
+    """Remet en file les emails en lettre morte."""
+    from app import db
+    from app.models.models import EmailOutbox
+
+    n = (
+        EmailOutbox.query.filter_by(statut="echec")
+        .update({"statut": "en_attente", "tentatives": 0, "prochain_essai": None})
+    )
+    db.session.commit()
+    click.echo(f"{n} email(s) remis en file")
+
+
+@emails_cli.command("fake-sendgrid")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8025, type=int)
+@click.option("--fail-first", default=0, type=int, help="Nombre de requêtes à faire échouer (503).")
+def fake_sendgrid_command(host, port, fail_first):
+    """Faux serveur SendGrid local (SENDGRID_API_URL=http://host:port)."""
+    from app.emails.fake_sendgrid import FakeSendGrid
+
+    fake = FakeSendGrid(host, port, fail_first=fail_first)
+    click.echo(f"Faux SendGrid sur {fake.url}")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"{len(fake.messages)} message(s) reçu(s)")
+
+
+def init_app(app):
+    email_renderer.init_app(app)
+    app.cli.add_command(emails_cli)
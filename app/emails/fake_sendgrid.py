@@ -0,0 +1,96 @@
+"""
+Faux serveur SendGrid local (tests, développement, benchmarks).
+
+    with FakeSendGrid(fail_first=2) as fake:
+        app.config["SENDGRID_API_URL"] = fake.url
+        ...
+        assert len(fake.messages) == 1
+
+Ou en ligne de commande : flask emails fake-sendgrid --port 8025
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeSendGrid/1.0"
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+
+        if self.path != "/v3/mail/send":
+            return self._reply(404, {"errors": [{"message": "not found"}]})
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            return self._reply(401, {"errors": [{"message": "authorization required"}]})
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(400, {"errors": [{"message": "invalid JSON"}]})
+
+        status = fake.record(payload)
+        if status >= 400:
+            return self._reply(status, {"errors": [{"message": "simulated failure"}]})
+        self._reply(202, None)
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+class FakeSendGrid:
+    """
+    fail_first : nombre de requêtes initiales répondues fail_status (test des
+    nouveaux essais). Les payloads acceptés sont conservés dans .messages.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, fail_first=0, fail_status=503):
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = []
+        self.messages = []
+        self._lock = Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, payload):
+        with self._lock:
+            self.requests.append(payload)
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                return self.fail_status
+            self.messages.append(payload)
+            return 202
+
+    def start(self):
+        self._thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,119 @@
+"""
+Mise en file des emails.
+
+enqueue_email() ajoute une ligne EmailOutbox à la session courante sans
+commit : l'email est donc persisté dans la même transaction que la
+réservation (ou rien n'est persisté). Après le commit, le worker du
+processus est réveillé.
+"""
+import json
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.models import EmailOutbox
+
+_FLAG = "email_outbox_pending"
+
+
+def email_valide(value):
+    if not value or not isinstance(value, str):
+        return False
+    value = value.strip()
+    return len(value) >= 6 and "@" in value and "." in value.split("@")[-1]
+
+
+def expediteur_par_defaut():
+    cfg = current_app.config
+    return (cfg.get("MAIL_DEFAULT_SENDER") or cfg.get("MAIL_USERNAME") or "noreply@dstravel.com").strip()
+
+
+def enqueue_email(to_email, subject, text, html=None, substitutions=None):
+    """
+    Ajoute un email à la file (sans commit). Retourne la ligne, ou None si invalide.
+
+    Les emails de même sujet/contenu sont regroupés par le worker en un seul
+    appel SendGrid ; les valeurs propres au destinataire passent alors par
+    substitutions ({"-nom-": "Awa"} remplace "-nom-" dans sujet et contenu).
+    """
+    if not email_valide(to_email):
+        current_app.logger.error(f"❌ Email destinataire invalide: {to_email!r}")
+        return None
+    sender = expediteur_par_defaut()
+    if "@" not in sender:
+        current_app.logger.error(f"❌ Expéditeur invalide: {sender}")
+        return None
+
+    msg = EmailOutbox(
+        destinataire=to_email.strip(),
+        expediteur=sender,
+        sujet=subject,
+        corps_texte=text,
+        corps_html=html,
+        substitutions=json.dumps(
+            {k: str(v) for k, v in substitutions.items()}, ensure_ascii=False
+        ) if substitutions else None,
+        statut="en_attente",
+        tentatives=0,
+        prochain_essai=datetime.utcnow(),
+    )
+    db.session.add(msg)
+    db.session.info[_FLAG] = True
+    return msg
+
+
+def enqueue_template(gabarit, to_email, **contexte):
+    """
+    Met en file un email rendu par le worker à partir du gabarit
+    templates/emails/<gabarit>.txt|.html. Le contexte ne contient que des
+    identifiants ou valeurs simples (JSON), ex. reservation_id=42.
+    """
+    if not email_valide(to_email):
+        current_app.logger.error(f"❌ Email destinataire invalide: {to_email!r}")
+        return None
+    sender = expediteur_par_defaut()
+    if "@" not in sender:
+        current_app.logger.error(f"❌ Expéditeur invalide: {sender}")
+        return None
+
+    msg = EmailOutbox(
+        destinataire=to_email.strip(),
+        expediteur=sender,
+        gabarit=gabarit,
+        contexte=json.dumps(contexte, ensure_ascii=False),
+        statut="en_attente",
+        tentatives=0,
+        prochain_essai=datetime.utcnow(),
+    )
+    db.session.add(msg)
+    db.session.info[_FLAG] = True
+    return msg
+
+
+def enqueue_reservation_emails(r):
+    """Copie admin + confirmation client d'une réservation (sans commit)."""
+    if r.id is None:
+        db.session.flush()
+    admin_email = current_app.config.get("ADMIN_EMAIL")
+    if admin_email and "@" in admin_email:
+        enqueue_template("admin_notification", admin_email, reservation_id=r.id)
+    else:
+        current_app.logger.warning("ADMIN_EMAIL non configuré - pas d'email admin envoyé")
+    if not enqueue_template("confirmation", r.client_email, reservation_id=r.id):
+        current_app.logger.warning(f"Email client invalide: {r.client_email} - pas d'email de confirmation")
+
+
+@event.listens_for(Session, "after_commit")
+def _reveiller_worker(session):
+    if not session.info.pop(_FLAG, False):
+        return
+    from app.emails.worker import wake_inprocess_worker
+    wake_inprocess_worker()
+
+
+@event.listens_for(Session, "after_rollback")
+def _oublier_file(session):
+    session.info.pop(_FLAG, None)
@@ -0,0 +1,138 @@
+"""
+Rendu des emails à partir des gabarits Jinja de templates/emails/.
+
+Chaque gabarit <nom>.txt (+ <nom>.html facultatif) est compilé une fois au
+démarrage (cache de bytecode sur disque) puis rendu une seule fois avec des
+balises SendGrid à la place des variables : {{ client_nom }} devient
+-client_nom- (texte) ou -client_nom:h- (HTML, valeur échappée). Le worker
+n'a donc plus qu'à calculer les valeurs de chaque destinataire, et tous
+les emails d'un même gabarit partagent un contenu identique, regroupable
+en un seul appel API.
+
+Au-delà de MAX_SUBSTITUTIONS_OCTETS (long commentaire, message de contact),
+les valeurs sont écrites directement dans le sujet et le corps : l'email,
+au contenu unique, part seul et sans substitutions.
+"""
+import os
+from collections import namedtuple
+
+from jinja2 import (
+    Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined,
+    meta, select_autoescape,
+)
+from markupsafe import Markup, escape
+
+from app.emails.sendgrid import MAX_SUBSTITUTIONS_OCTETS, substituer, taille_substitutions
+
+Gabarit = namedtuple("Gabarit", "sujet valeurs")
+Rendu = namedtuple("Rendu", "sujet texte html variables")
+
+
+def _tag(nom, html=False):
+    return f"-{nom}:h-" if html else f"-{nom}-"
+
+
+# ========================
+# Valeurs par destinataire
+# ========================
+def _valeurs_reservation(contexte, reservations):
+    r = reservations.get(contexte.get("reservation_id"))
+    if r is None:
+        raise LookupError(f"Réservation {contexte.get('reservation_id')} introuvable")
+    v = r.vehicule
+    return {
+        "vehicule": f"{v.marque} {v.modele}" if v else "-",
+        "client_nom": r.client_nom,
+        "client_email": r.client_email,
+        "client_telephone": r.client_telephone,
+        "adresse_depart": r.adresse_depart,
+        "adresse_arrivee": r.adresse_arrivee,
+        "date_heure": r.date_heure.strftime('%Y-%m-%d %H:%M'),
+        "vol_info": r.vol_info or '-',
+        "nb_passagers": r.nb_passagers,
+        "nb_valises_23kg": r.nb_valises_23kg or 0,
+        "nb_valises_10kg": r.nb_valises_10kg or 0,
+        "nb_sieges_bebe": r.nb_sieges_bebe or 0,
+        "poids_enfants": r.poids_enfants or '-',
+        "paiement": r.paiement,
+        "commentaires": r.commentaires or '-',
+    }
+
+
+def _valeurs_contexte(contexte, reservations):
+    return contexte
+
+
+GABARITS = {
+    "confirmation": Gabarit("Confirmation de votre réservation - DS Travel", _valeurs_reservation),
+    "admin_notification": Gabarit("Nouvelle réservation - DS Travel", _valeurs_reservation),
+    "contact_admin": Gabarit("Message du formulaire – -nom-", _valeurs_contexte),
+    "contact_confirmation": Gabarit("Confirmation – SD Travel", _valeurs_contexte),
+}
+
+
+class EmailRenderer:
+    def __init__(self):
+        self.env = None
+        self.rendus = {}
+
+    def init_app(self, app):
+        folder = os.path.join(app.root_path, "templates", "emails")
+        cache_dir = app.config.get("EMAIL_TEMPLATE_CACHE_DIR") or os.path.join(
+            app.instance_path, "jinja_emails"
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(folder),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,
+            auto_reload=False,
+        )
+        self.rendus = {nom: self._compiler(nom, g) for nom, g in GABARITS.items()}
+        app.extensions["email_renderer"] = self
+
+    def _variables(self, nom):
+        source = self.env.loader.get_source(self.env, nom)[0]
+        return meta.find_undeclared_variables(self.env.parse(source))
+
+    def _compiler(self, nom, gabarit):
+        texte_nom, html_nom = f"{nom}.txt", f"{nom}.html"
+        variables = set(self._variables(texte_nom))
+        texte = self.env.get_template(texte_nom).render(
+            {v: _tag(v) for v in variables}
+        )
+        html = None
+        if html_nom in self.env.list_templates():
+            html_vars = self._variables(html_nom)
+            variables |= html_vars
+            html = self.env.get_template(html_nom).render(
+                {v: Markup(_tag(v, html=True)) for v in html_vars}
+            )
+        return Rendu(gabarit.sujet, texte, html, frozenset(variables))
+
+    def rendre(self, nom, contexte, reservations=None):
+        """
+        (sujet, texte, html, substitutions) pour un destinataire.
+        reservations : {id: Reservation} préchargées par l'appelant.
+        """
+        rendu = self.rendus[nom]
+        valeurs = GABARITS[nom].valeurs(contexte, reservations or {})
+        substitutions = {}
+        for v in rendu.variables:
+            valeur = valeurs.get(v)
+            valeur = "" if valeur is None else str(valeur)
+            substitutions[_tag(v)] = valeur
+            if rendu.html:
+                substitutions[_tag(v, html=True)] = str(escape(valeur))
+        if taille_substitutions(substitutions) > MAX_SUBSTITUTIONS_OCTETS:
+            return (
+                substituer(rendu.sujet, substitutions),
+                substituer(rendu.texte, substitutions),
+                substituer(rendu.html, substitutions),
+                {},
+            )
+        return rendu.sujet, rendu.texte, rendu.html, substitutions
+
+
+email_renderer = EmailRenderer()
@@ -0,0 +1,94 @@
+"""
+Client HTTP SendGrid v3 avec connexions réutilisées (keep-alive).
+"""
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "https://api.sendgrid.com"
+
+
+class SendGridError(Exception):
+    def __init__(self, message, status=None, retryable=True):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class SendGridClient:
+    def __init__(self, api_key, api_url=DEFAULT_API_URL, pool_size=4, timeout=10):
+        if not api_key:
+            raise SendGridError("SENDGRID_API_KEY manquant", retryable=False)
+        self.url = api_url.rstrip("/") + "/v3/mail/send"
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.http.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+    def send(self, payload):
+        try:
+            r = self.http.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise SendGridError(f"Erreur réseau SendGrid : {e}")
+        if r.status_code >= 400:
+            # 429 et 5xx : temporaire ; autres 4xx : message rejeté définitivement
+            retryable = r.status_code == 429 or r.status_code >= 500
+            raise SendGridError(
+                f"Erreur SendGrid {r.status_code}: {r.text[:500]}",
+                status=r.status_code, retryable=retryable,
+            )
+        return r.status_code
+
+    def close(self):
+        self.http.close()
+
+
+# Limites de l'API v3 : 1000 personalizations par requête, 10 000 octets
+# de substitutions (balises + valeurs) par personalization
+MAX_PERSONALIZATIONS = 1000
+MAX_SUBSTITUTIONS_OCTETS = 10000
+
+
+def taille_substitutions(substitutions):
+    """Octets comptés par SendGrid pour les substitutions d'un destinataire."""
+    return sum(
+        len(k.encode("utf-8")) + len(v.encode("utf-8"))
+        for k, v in (substitutions or {}).items()
+    )
+
+
+def substituer(texte, substitutions):
+    """Remplace les balises comme le ferait SendGrid (en une passe : une valeur n'est jamais re-substituée)."""
+    if not texte or not substitutions:
+        return texte
+    motif = re.compile("|".join(map(re.escape, sorted(substitutions, key=len, reverse=True))))
+    return motif.sub(lambda m: substitutions[m.group(0)], texte)
+
+
+def build_payload(sender, subject, text, html=None, recipients=()):
+    """
+    Un seul appel pour plusieurs destinataires partageant sujet et contenu.
+    recipients : [(email, {"-cle-": "valeur"} ou None), ...] ; chaque
+    destinataire reçoit son propre email, balises remplacées par SendGrid.
+    """
+    content = [{"type": "text/plain", "value": text}]
+    if html:
+        content.append({"type": "text/html", "value": html})
+    personalizations = []
+    for to_email, substitutions in recipients:
+        p = {"to": [{"email": to_email}]}
+        if substitutions:
+            p["substitutions"] = substitutions
+        personalizations.append(p)
+    return {
+        "personalizations": personalizations,
+        "from": {"email": sender},
+        "subject": subject,
+        "content": content,
+    }
@@ -0,0 +1,346 @@
+"""
+Worker de la file d'emails : un thread de distribution réclame les emails
+dus en base et les confie à un pool borné de threads d'envoi partageant
+un même client SendGrid (connexions keep-alive).
+
+- Réclamation atomique (UPDATE ... WHERE statut = 'en_attente') marquée par
+  un jeton de lot : plusieurs processus peuvent drainer la même table sans
+  double envoi.
+- Regroupement : après un réveil, le worker attend EMAIL_BATCH_WINDOW
+  secondes puis envoie les emails de même expéditeur/sujet/contenu en un
+  seul appel SendGrid (jusqu'à 1000 personalizations, substitutions par
+  destinataire). Un email dont les substitutions dépassent la limite
+  SendGrid part seul, valeurs écrites dans le contenu.
+- Échec temporaire : nouvel essai avec backoff exponentiel.
+- Échec définitif ou EMAIL_MAX_ATTEMPTS atteint : statut 'echec' (lettre morte).
+- Un email resté 'envoi' après expiration du verrou (worker tué) est repris.
+  Le verrou est prolongé quand un lot est confié à un thread, et l'envoi
+  ne relit que les lignes portant encore le jeton du lot : un email repris
+  par un autre worker n'est pas envoyé deux fois.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import BoundedSemaphore, Event, Lock, Thread
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.emails.sendgrid import (
+    MAX_PERSONALIZATIONS, MAX_SUBSTITUTIONS_OCTETS, SendGridClient, SendGridError,
+    build_payload, substituer, taille_substitutions,
+)
+from app.emails.rendering import email_renderer
+from app.models.models import EmailOutbox, Reservation
+
+LEASE_SECONDS = 120
+
+
+class OutboxWorker:
+    def __init__(self, app):
+        cfg = app.config
+        self.app = app
+        self.workers = int(cfg.get("EMAIL_WORKERS", 4))
+        self.max_attempts = int(cfg.get("EMAIL_MAX_ATTEMPTS", 6))
+        self.retry_base = float(cfg.get("EMAIL_RETRY_BASE", 30))
+        self.retry_max = float(cfg.get("EMAIL_RETRY_MAX", 3600))
+        self.poll_interval = float(cfg.get("EMAIL_POLL_INTERVAL", 5))
+        self.batch_window = float(cfg.get("EMAIL_BATCH_WINDOW", 2))
+        self.batch_size = min(int(cfg.get("EMAIL_BATCH_SIZE", MAX_PERSONALIZATIONS)), MAX_PERSONALIZATIONS)
+        self.client = SendGridClient(
+            cfg.get("SENDGRID_API_KEY"),
+            api_url=cfg.get("SENDGRID_API_URL") or "https://api.sendgrid.com",
+            pool_size=self.workers,
+        )
+        self._wake = Event()
+        self._stop = Event()
+        self._slots = BoundedSemaphore(self.workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="email")
+        self._thread = None
+
+    # ------------------------
+    # Cycle de vie
+    # ------------------------
+    def start(self):
+        self._thread = Thread(target=self.run_forever, name="email-dispatch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+        self.client.close()
+
+    def wake(self):
+        self._wake.set()
+
+    def run_forever(self):
+        with self.app.app_context():
+            self.app.logger.info(f"📬 [Outbox] Worker démarré ({self.workers} threads)")
+            while not self._stop.is_set():
+                try:
+                    n = self.dispatch_once()
+                except Exception:
+                    self.app.logger.exception("💥 [Outbox] Erreur de distribution")
+                    db.session.rollback()
+                    n = 0
+                finally:
+                    db.session.remove()
+                if n == 0:
+                    woken = self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    if woken and self.batch_window:
+                        # Laisser les emails d'une même rafale s'accumuler
+                        self._stop.wait(self.batch_window)
+
+    def drain(self):
+        """Envoie tout ce qui est dû puis rend la main (CLI, tests)."""
+        with self.app.app_context():
+            while self.dispatch_once():
+                pass
+            # Attendre la fin des envois en cours
+            for _ in range(self.workers):
+                self._slots.acquire()
+            for _ in range(self.workers):
+                self._slots.release()
+
+    # ------------------------
+    # Distribution
+    # ------------------------
+    def _claim(self, limit):
+        now = datetime.utcnow()
+        dus = or_(
+            and_(EmailOutbox.statut == "en_attente",
+                 or_(EmailOutbox.prochain_essai.is_(None), EmailOutbox.prochain_essai <= now)),
+            and_(EmailOutbox.statut == "envoi", EmailOutbox.verrou_jusqua < now),
+        )
+        ids = [
+            row.id for row in
+            db.session.query(EmailOutbox.id).filter(dus)
+            .order_by(EmailOutbox.id).limit(limit).all()
+        ]
+        if not ids:
+            db.session.rollback()
+            return []
+        jeton = uuid4().hex
+        db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), dus)
+            .values(statut="envoi", lot=jeton,
+                    verrou_jusqua=now + timedelta(seconds=LEASE_SECONDS))
+        )
+        db.session.commit()
+        # Seules les lignes portant notre jeton nous reviennent
+        return (
+            EmailOutbox.query.filter_by(lot=jeton)
+            .order_by(EmailOutbox.id).all()
+        )
+
+    def _rendre(self, rows):
+        """
+        Remplit sujet/corps/substitutions des emails à gabarit (réservations
+        chargées en une requête, commit par l'appelant). Retourne les lignes
+        envoyables.
+        """
+        a_rendre = [m for m in rows if m.gabarit and m.corps_texte is None]
+        if not a_rendre:
+            return rows
+        contextes = {m.id: json.loads(m.contexte or "{}") for m in a_rendre}
+        ids_resa = {c["reservation_id"] for c in contextes.values() if c.get("reservation_id")}
+        reservations = {}
+        if ids_resa:
+            reservations = {
+                r.id: r for r in
+                Reservation.query.options(joinedload(Reservation.vehicule))
+                .filter(Reservation.id.in_(ids_resa)).all()
+            }
+
+        envoyables = []
+        for m in rows:
+            if m.id in contextes:
+                try:
+                    sujet, texte, html, subs = email_renderer.rendre(
+                        m.gabarit, contextes[m.id], reservations
+                    )
+                except Exception as e:
+                    m.statut = "echec"
+                    m.derniere_erreur = f"Rendu impossible : {e}"
+                    m.verrou_jusqua = None
+                    current_app.logger.error(f"❌ [Outbox] Rendu {m.gabarit} (email {m.id}) : {e}")
+                    continue
+                m.sujet, m.corps_texte, m.corps_html = sujet, texte, html
+                m.substitutions = json.dumps(subs, ensure_ascii=False)
+            envoyables.append(m)
+        return envoyables
+
+    def _groupes(self, rows):
+        """Découpe les lignes réclamées en lots envoyables en un seul appel."""
+        groupes = {}
+        for m in rows:
+            key = (m.expediteur, m.sujet, m.corps_texte, m.corps_html)
+            groupes.setdefault(key, []).append(m.id)
+        lots = []
+        for ids in groupes.values():
+            for i in range(0, len(ids), self.batch_size):
+                lots.append(ids[i:i + self.batch_size])
+        return lots
+
+    def dispatch_once(self):
+        """Réclame les emails dus et confie un lot par thread libre ; retourne le nombre d'emails."""
+        if not self._slots.acquire(timeout=self.poll_interval):
+            return 0
+        libres = 1
+        while libres < self.workers and self._slots.acquire(blocking=False):
+            libres += 1
+        # Places tenues et pas encore confiées à un _job : rendues quoi qu'il
+        # arrive, sinon une erreur de base bloquerait l'outbox jusqu'au redémarrage
+        tenues = libres
+        try:
+            rows = self._claim(self.batch_size * libres)
+            jeton = rows[0].lot if rows else None
+            rows = self._rendre(rows)
+            lots = self._groupes(rows)
+            db.session.commit()
+            db.session.remove()
+            for k, ids in enumerate(lots):
+                if k >= libres:
+                    self._slots.acquire()
+                    tenues += 1
+                # L'attente d'une place a pu entamer le verrou pris au _claim
+                self._prolonger(ids, jeton)
+                self._pool.submit(self._job, ids, jeton)
+                tenues -= 1
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            for _ in range(tenues):
+                self._slots.release()
+        return len(rows)
+
+    def _prolonger(self, ids, jeton):
+        db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), EmailOutbox.lot == jeton, EmailOutbox.statut == "envoi")
+            .values(verrou_jusqua=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS))
+        )
+        db.session.commit()
+
+    def _job(self, ids, jeton):
+        try:
+            with self.app.app_context():
+                self.send_batch(ids, jeton)
+        except Exception:
+            self.app.logger.exception(f"💥 [Outbox] Erreur inattendue (emails {ids[:5]}...)")
+        finally:
+            self._slots.release()
+
+    def send_batch(self, ids, jeton):
+        """Envoie les emails `ids` du lot `jeton` encore à nous (statut 'envoi', même jeton)."""
+        msgs = (
+            EmailOutbox.query.filter(
+                EmailOutbox.id.in_(ids), EmailOutbox.statut == "envoi", EmailOutbox.lot == jeton,
+            )
+            .order_by(EmailOutbox.id).all()
+        )
+        if not msgs:
+            return
+        subs = {m.id: json.loads(m.substitutions) if m.substitutions else None for m in msgs}
+        gros = [m.id for m in msgs if taille_substitutions(subs[m.id]) > MAX_SUBSTITUTIONS_OCTETS]
+        if gros and len(msgs) > 1:
+            # Refusé tel quel par SendGrid (et tout le lot avec) : chacun seul
+            reste = [m.id for m in msgs if m.id not in gros]
+            db.session.rollback()
+            if reste:
+                self.send_batch(reste, jeton)
+            for i in gros:
+                self.send_batch([i], jeton)
+            return
+        first = msgs[0]
+        if gros:
+            s = subs[first.id]
+            payload = build_payload(
+                first.expediteur, substituer(first.sujet, s),
+                substituer(first.corps_texte, s), substituer(first.corps_html, s),
+                recipients=[(first.destinataire, None)],
+            )
+        else:
+            payload = build_payload(
+                first.expediteur, first.sujet, first.corps_texte, first.corps_html,
+                recipients=[(m.destinataire, subs[m.id]) for m in msgs],
+            )
+        try:
+            self.client.send(payload)
+        except SendGridError as e:
+            if len(msgs) > 1 and not e.retryable:
+                # Un destinataire rejeté ne doit pas emporter tout le lot :
+                # on renvoie chaque email séparément.
+                db.session.rollback()
+                for m in msgs:
+                    self.send_batch([m.id], jeton)
+                return
+            for m in msgs:
+                self._echec(m, e)
+        else:
+            now = datetime.utcnow()
+            for m in msgs:
+                m.statut = "envoye"
+                m.envoye_at = now
+                m.verrou_jusqua = None
+            current_app.logger.info(
+                f"✅ [SendGrid] {len(msgs)} email(s) envoyé(s) en 1 appel: {first.sujet}"
+            )
+        db.session.commit()
+
+    def _echec(self, msg, err):
+        msg.tentatives = (msg.tentatives or 0) + 1
+        msg.derniere_erreur = str(err)[:2000]
+        msg.verrou_jusqua = None
+        if not err.retryable or msg.tentatives >= self.max_attempts:
+            msg.statut = "echec"
+            current_app.logger.error(
+                f"❌ [SendGrid] Lettre morte {msg.destinataire} après {msg.tentatives} essai(s): {err}"
+            )
+            return
+        delai = min(self.retry_base * (2 ** (msg.tentatives - 1)), self.retry_max)
+        msg.statut = "en_attente"
+        msg.prochain_essai = datetime.utcnow() + timedelta(seconds=delai)
+        current_app.logger.warning(
+            f"⏳ [SendGrid] Échec {msg.destinataire} (essai {msg.tentatives}), nouvel essai dans {delai:.0f}s: {err}"
+        )
+
+
+# ========================
+# Worker intégré au processus web
+# ========================
+_inprocess = None
+_inprocess_lock = Lock()
+
+
+def wake_inprocess_worker():
+    """Réveille (et démarre au besoin) le worker du processus courant."""
+    global _inprocess
+    app = current_app._get_current_object()
+    if not app.config.get("EMAIL_WORKER_INPROCESS", True):
+        return
+    if _inprocess is None:
+        with _inprocess_lock:
+            if _inprocess is None:
+                try:
+                    _inprocess = OutboxWorker(app).start()
+                except SendGridError as e:
+                    app.logger.error(f"❌ [Outbox] Worker non démarré : {e}")
+                    return
+    _inprocess.wake()
+
+
+def queue_depth():
+    """Nombre d'emails en attente d'envoi."""
+    return EmailOutbox.query.filter(EmailOutbox.statut.in_(("en_attente", "envoi"))).count()
+
@@ -6,7 +6,7 @@ from wtforms import (
 from wtforms.fields.datetime import DateTimeLocalField
 from wtforms.fields.simple import EmailField, TelField
 from wtforms.validators import DataRequired, Optional, Email, NumberRange,Length
-from flask_wtf.file import FileAllowed, FileField
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 
 
 
@@ -38,7 +38,7 @@ class AddVehiculeForm(FlaskForm):
     details_coffre_toit = TextAreaField('Détails du coffre de toit', validators=[Optional()])
     disponible = BooleanField('Disponible')
     photo = FileField('Photo', validators=[
-        FileAllowed(['jpg', 'jpeg', 'png', 'gif'], 'Images uniquement !')
+        FileAllowed(['jpg', 'jpeg', 'png', 'gif', 'webp'], 'Images uniquement !')
     ])
     submit = SubmitField('Ajouter')
 
@@ -104,6 +104,29 @@ class AddTarifRegleForm(FlaskForm):
     coeff_weekend = FloatField("Coeff. week-end (ex. 1.1)", validators=[Optional(), NumberRange(min=0)])
     actif = BooleanField("Actif", default=True)
     submit = SubmitField("Enregistrer la règle")
+
+
+# --------------------------
+# Formulaire de zone de forfait
+# --------------------------
+class AddZoneTarifForm(FlaskForm):
+    nom = StringField("Lieu du forfait (ex. Dakar Plateau)", validators=[DataRequired()])
+    rayon_km = FloatField("Rayon (km)", default=3.0, validators=[DataRequired(), NumberRange(min=0.1, max=100)])
+    latitude = FloatField("Latitude", validators=[Optional(), NumberRange(min=-90, max=90)])
+    longitude = FloatField("Longitude", validators=[Optional(), NumberRange(min=-180, max=180)])
+    submit = SubmitField("Enregistrer la zone")
+
+
+# --------------------------
+# Import CSV (véhicules / forfaits)
+# --------------------------
+class ImportCSVForm(FlaskForm):
+    fichier = FileField("Fichier CSV", validators=[
+        FileRequired("Choisir un fichier."),
+        FileAllowed(['csv', 'txt'], 'Fichier CSV uniquement !')
+    ])
+    simulation = BooleanField("Simulation (valider sans rien enregistrer)")
+    submit = SubmitField("Importer")
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField
 from wtforms.validators import DataRequired
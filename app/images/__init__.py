@@ -0,0 +1,147 @@
+"""
+Photos des véhicules : variantes redimensionnées AVIF / WebP / JPEG à
+l'import (app.images.pipeline) et balisage responsive dans les gabarits.
+
+    {{ picture(vehicule.image, alt="...", sizes="(max-width: 768px) 100vw, 33vw") }}
+    <img src="..." srcset="{{ srcset(vehicule.image) }}" sizes="...">
+
+Photos importées avant le pipeline : flask images backfill
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import click
+from flask import current_app, url_for
+from flask.cli import AppGroup
+from markupsafe import Markup, escape
+
+from app.images.pipeline import (
+    EXTENSIONS_SOURCES, chemin_manifeste, est_variante, traiter_fichier, traiter_image,
+)
+
+__all__ = ["enregistrer_photo", "init_app", "manifeste", "picture", "srcset"]
+
+DOSSIER_VEHICULES = "images/vehicules"
+
+
+def enregistrer_photo(fichier, prefixe=DOSSIER_VEHICULES):
+    """
+    Traite une photo importée (FileStorage) et retourne le chemin statique
+    de son JPEG par défaut, à enregistrer dans Vehicule.image.
+    """
+    dossier = os.path.join(current_app.static_folder, prefixe)
+    os.makedirs(dossier, exist_ok=True)
+    m = traiter_image(fichier.read(), dossier, prefixe)
+    current_app.logger.info(f"🖼️ Photo {fichier.filename!r} -> {m['empreinte']} ({m['largeur']}x{m['hauteur']})")
+    return m["defaut"]
+
+
+@lru_cache(maxsize=1024)
+def _lire_manifeste(static_folder, path):
+    try:
+        with open(os.path.join(static_folder, path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def manifeste(image_path):
+    """Manifeste des variantes d'une image du pipeline, sinon None."""
+    if not image_path or "://" in image_path:
+        return None
+    path = chemin_manifeste(image_path)
+    return _lire_manifeste(current_app.static_folder, path) if path else None
+
+
+def _url(image_path):
+    return image_path if "://" in image_path else url_for("static", filename=image_path)
+
+
+def srcset(image_path, mime="image/jpeg"):
+    """Valeur d'attribut srcset (vide pour une image hors pipeline)."""
+    m = manifeste(image_path)
+    if not m:
+        return ""
+    return ", ".join(f"{_url(p)} {w}w" for w, p in m["variantes"].get(mime, []))
+
+
+def picture(image_path, alt="", sizes="100vw", **attrs):
+    """
+    Balise <picture> : une <source> par format moderne et un <img> JPEG de
+    repli avec srcset. Attributs supplémentaires sur l'<img> (class_=...,
+    style=..., loading="lazy" par défaut). Image hors pipeline : simple <img>.
+    """
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    html_attrs = " ".join(
+        f'{k.rstrip("_").replace("_", "-")}="{escape(v)}"' for k, v in attrs.items() if v is not None
+    )
+    m = manifeste(image_path)
+    if not m:
+        return Markup(f'<img src="{escape(_url(image_path))}" alt="{escape(alt)}" {html_attrs}>')
+
+    sources = "".join(
+        f'<source type="{mime}" srcset="{escape(srcset(image_path, mime))}" sizes="{escape(sizes)}">'
+        for mime in m["variantes"] if mime != "image/jpeg"
+    )
+    img = (
+        f'<img src="{escape(_url(m["defaut"]))}" srcset="{escape(srcset(image_path))}" '
+        f'sizes="{escape(sizes)}" width="{m["largeur"]}" height="{m["hauteur"]}" '
+        f'alt="{escape(alt)}" {html_attrs}>'
+    )
+    return Markup(f"<picture>{sources}{img}</picture>")
+
+
+# ========================
+# CLI : flask images ...
+# ========================
+images_cli = AppGroup("images", help="Photos des véhicules.")
+
+
+@images_cli.command("backfill")
+@click.option("--dossier", default=DOSSIER_VEHICULES, show_default=True,
+              help="Dossier à traiter, relatif à static/.")
+@click.option("--workers", default=None, type=int, help="Processus (défaut : nombre de CPU).")
+def backfill_command(dossier, workers):
+    """Génère les variantes des photos existantes et met à jour Vehicule.image."""
+    from app import db
+    from app.cache import response_cache
+    from app.models.models import Vehicule
+
+    racine = os.path.join(current_app.static_folder, dossier)
+    sources = sorted(
+        os.path.join(racine, nom) for nom in os.listdir(racine)
+        if os.path.splitext(nom)[1].lower() in EXTENSIONS_SOURCES and not est_variante(nom)
+    )
+    if not sources:
+        click.echo("Aucune photo à traiter")
+        return
+
+    # Traitement CPU : un processus par cœur, sans contexte d'application
+    resultats = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(traiter_fichier, path, racine, dossier) for path in sources]
+        for fut in as_completed(futures):
+            try:
+                path, m = fut.result()
+            except Exception as e:
+                click.echo(f"❌ {e}")
+                continue
+            resultats[f"{dossier}/{os.path.basename(path)}"] = m["defaut"]
+            avant = os.path.getsize(path)
+            click.echo(f"✅ {os.path.basename(path)} ({avant // 1024} Ko) -> {m['defaut']}")
+
+    maj = 0
+    for v in Vehicule.query.filter(Vehicule.image.in_(list(resultats))):
+        v.image = resultats[v.image]
+        maj += 1
+    db.session.commit()
+    response_cache.invalidate("vehicules")
+    click.echo(f"{len(resultats)} photo(s) traitée(s), {maj} véhicule(s) mis à jour")
+
+
+def init_app(app):
+    app.jinja_env.globals.update(picture=picture, srcset=srcset)
+    app.cli.add_command(images_cli)
@@ -0,0 +1,125 @@
+"""
+Traitement des photos de véhicules (sans dépendance à Flask, utilisable
+dans un pool de processus).
+
+Une photo source donne, pour chaque largeur de LARGEURS inférieure ou égale
+à la sienne, une variante AVIF (si Pillow la gère), WebP et JPEG, sans
+métadonnées (EXIF, GPS, profils), nommée d'après l'empreinte du contenu :
+
+    <empreinte>-<largeur>.<ext>   +   <empreinte>.json (manifeste)
+
+Un même fichier importé deux fois produit donc les mêmes noms (rien n'est
+recalculé), et un nouveau contenu a toujours une nouvelle URL.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps, features
+
+LARGEURS = (320, 640, 960, 1280)
+
+# (extension, format Pillow, type MIME, options d'enregistrement)
+FORMATS = [
+    ("avif", "AVIF", "image/avif", {"quality": 55}),
+    ("webp", "WEBP", "image/webp", {"quality": 80, "method": 6}),
+    ("jpg", "JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+]
+if not features.check("avif"):
+    FORMATS = FORMATS[1:]
+
+EXTENSIONS_SOURCES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff", ".avif"}
+VARIANTE = re.compile(r"^(?P<empreinte>[0-9a-f]{16})-(?P<largeur>\d+)\.(?:avif|webp|jpg)$")
+
+
+def empreinte(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def est_variante(nom):
+    """Fichier produit par le pipeline (variante ou manifeste) ?"""
+    return bool(VARIANTE.match(nom)) or bool(re.match(r"^[0-9a-f]{16}\.json$", nom))
+
+
+def chemin_manifeste(image_path):
+    """images/vehicules/<e>-960.jpg -> images/vehicules/<e>.json, sinon None."""
+    dossier, _, nom = image_path.rpartition("/")
+    m = VARIANTE.match(nom)
+    if not m:
+        return None
+    return f"{dossier}/{m.group('empreinte')}.json" if dossier else f"{m.group('empreinte')}.json"
+
+
+def _ecrire(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _preparer(data):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    # Orientation EXIF appliquée aux pixels avant de jeter les métadonnées
+    img = ImageOps.exif_transpose(img)
+    alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if alpha else "RGB")
+    return img, alpha
+
+
+def traiter_image(data, dossier, prefixe, largeurs=LARGEURS):
+    """
+    Produit les variantes de `data` (octets de la photo) dans `dossier`.
+    prefixe : chemin statique du dossier (ex. "images/vehicules").
+    Retourne le manifeste : {"empreinte", "largeur", "hauteur",
+    "defaut": chemin JPEG, "variantes": {mime: [[largeur, chemin], ...]}}.
+    """
+    e = empreinte(data)
+    manifeste_path = os.path.join(dossier, f"{e}.json")
+    if os.path.exists(manifeste_path):
+        with open(manifeste_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    img, alpha = _preparer(data)
+    largeur, hauteur = img.size
+    cibles = sorted({min(l, largeur) for l in largeurs})
+    variantes = {mime: [] for _, _, mime, _ in FORMATS}
+
+    for cible in cibles:
+        h = max(1, round(hauteur * cible / largeur))
+        redim = img if cible == largeur else img.resize((cible, h), Image.LANCZOS)
+        for ext, fmt, mime, options in FORMATS:
+            sortie = redim
+            if fmt == "JPEG" and alpha:
+                # Pas de transparence en JPEG : fond blanc
+                fond = Image.new("RGB", redim.size, (255, 255, 255))
+                fond.paste(redim, mask=redim.getchannel("A"))
+                sortie = fond
+            buf = io.BytesIO()
+            sortie.save(buf, fmt, **options)
+            nom = f"{e}-{cible}.{ext}"
+            _ecrire(os.path.join(dossier, nom), buf.getvalue())
+            variantes[mime].append([cible, f"{prefixe}/{nom}"])
+
+    jpegs = variantes["image/jpeg"]
+    # Image par défaut (<img src>) : la plus grande variante <= 960 px
+    defaut = max((v for v in jpegs if v[0] <= 960), key=lambda v: v[0], default=jpegs[0])[1]
+    manifeste = {
+        "empreinte": e,
+        "largeur": largeur,
+        "hauteur": hauteur,
+        "defaut": defaut,
+        "variantes": variantes,
+    }
+    _ecrire(manifeste_path, json.dumps(manifeste).encode("utf-8"))
+    return manifeste
+
+
+def traiter_fichier(path, dossier, prefixe, largeurs=LARGEURS):
+    """Variante de traiter_image() à partir d'un chemin (pool de processus)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return path, traiter_image(data, dossier, prefixe, largeurs)
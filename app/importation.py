@@ -0,0 +1,394 @@
+"""
+Import en masse de véhicules et de forfaits depuis un CSV.
+
+    flask import vehicules flotte.csv [--lot 1000] [--simulation]
+    flask import forfaits grille.csv
+    /admin/import/<vehicules|forfaits>   (formulaire d'envoi)
+
+Le fichier est lu ligne à ligne (séparateur ',' ou ';', en-têtes = noms des
+champs des formulaires admin ; UTF-8, sinon Windows-1252 comme l'écrit
+Excel en français) et validé par lots. Les doublons sont
+détectés contre les clés existantes chargées une seule fois en mémoire
+(immatriculations ; couples départ/arrivée par catégorie, sens inverse
+compris pour les forfaits bidirectionnels), puis chaque lot est inséré en
+une requête multi-lignes et validé dans sa propre transaction. Le rapport
+indique, par numéro de ligne, ce qui a été refusé et pourquoi.
+"""
+import codecs
+import csv
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.models import CategorieVehicule, TarifForfait, Vehicule
+
+__all__ = ["COLONNES", "IMPORTEURS", "RapportImport", "importer"]
+
+LOT_DEFAUT = 1000
+VRAI = {"1", "true", "vrai", "oui", "yes", "o", "x"}
+FAUX = {"0", "false", "faux", "non", "no", "n", ""}
+
+
+class LigneInvalide(ValueError):
+    pass
+
+
+class RapportImport:
+    def __init__(self, type_, simulation=False):
+        self.type = type_
+        self.simulation = simulation
+        self.lignes = 0
+        self.inserees = 0
+        self.doublons = 0
+        self.erreurs = []   # [(numéro de ligne, message)]
+
+    @property
+    def refusees(self):
+        """Lignes invalides ou rejetées par la base (hors doublons)."""
+        return len(self.erreurs) - self.doublons
+
+    def erreur(self, ligne, message):
+        self.erreurs.append((ligne, message))
+
+    def resume(self):
+        verbe = "à insérer" if self.simulation else "insérée(s)"
+        return (
+            f"{self.lignes} ligne(s) lue(s) : {self.inserees} {verbe}, "
+            f"{self.doublons} doublon(s), {self.refusees} refusée(s)"
+        )
+
+
+# ========================
+# Lecture et conversion des champs
+# ========================
+class FluxCsv:
+    """
+    Lignes de texte d'un fichier binaire : UTF-8 (BOM toléré), ou
+    Windows-1252 si le fichier n'est pas de l'UTF-8 valide (CSV d'Excel en
+    français). Bascule tant qu'aucun caractère accentué n'a été lu en
+    UTF-8 ; au-delà, UnicodeDecodeError (fichier incohérent).
+    """
+    REPLI = "cp1252"
+
+    def __init__(self, binaire):
+        self.binaire = binaire
+        self.encodage = "utf-8"
+        self._ascii = True
+        self._debut = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        ligne = self.binaire.readline()
+        if not ligne:
+            raise StopIteration
+        if self._debut and ligne.startswith(codecs.BOM_UTF8):
+            ligne = ligne[len(codecs.BOM_UTF8):]
+        self._debut = False
+        try:
+            texte = ligne.decode(self.encodage)
+        except UnicodeDecodeError:
+            if self.encodage == self.REPLI or not self._ascii:
+                raise
+            self.encodage = self.REPLI
+            texte = ligne.decode(self.encodage)
+        self._ascii = self._ascii and ligne.isascii()
+        return texte
+
+    def readline(self):
+        return next(self, "")
+
+
+def lire_csv(flux):
+    """DictReader sur un flux texte ; séparateur déduit de l'en-tête."""
+    entete = flux.readline()
+    delimiter = ";" if entete.count(";") > entete.count(",") else ","
+    colonnes = [c.strip().lower() for c in next(csv.reader([entete], delimiter=delimiter), [])]
+    return csv.DictReader(flux, fieldnames=colonnes, delimiter=delimiter)
+
+
+def _texte(row, champ, requis=False):
+    v = (row.get(champ) or "").strip()
+    if requis and not v:
+        raise LigneInvalide(f"{champ} manquant")
+    return v or None
+
+
+def _entier(row, champ, requis=False, minimum=0):
+    v = _texte(row, champ, requis)
+    if v is None:
+        return None
+    try:
+        n = int(float(v.replace(" ", "").replace(",", ".")))
+    except ValueError:
+        raise LigneInvalide(f"{champ} : entier attendu ({v!r})")
+    if n < minimum:
+        raise LigneInvalide(f"{champ} : minimum {minimum}")
+    return n
+
+
+def _decimal(row, champ, minimum=0):
+    v = _texte(row, champ)
+    if v is None:
+        return None
+    try:
+        x = float(v.replace(" ", "").replace(",", "."))
+    except ValueError:
+        raise LigneInvalide(f"{champ} : nombre attendu ({v!r})")
+    if x < minimum:
+        raise LigneInvalide(f"{champ} : minimum {minimum}")
+    return x
+
+
+def _booleen(row, champ, defaut):
+    v = (row.get(champ) or "").strip().lower()
+    if not v:
+        return defaut
+    if v in VRAI:
+        return True
+    if v in FAUX:
+        return False
+    raise LigneInvalide(f"{champ} : oui/non attendu ({v!r})")
+
+
+# ========================
+# Importeurs
+# ========================
+class ImportVehicules:
+    modele = Vehicule
+    invalider = ("vehicules",)
+
+    def __init__(self, simulation=False):
+        # Comparaison sur les seuls caractères alphanumériques, sans casse
+        # ("DK-1234 A" = "dk1234a")
+        self.cles = {
+            self.cle(i) for (i,) in db.session.query(Vehicule.immatriculation)
+        }
+
+    @staticmethod
+    def cle(immatriculation):
+        return "".join(c for c in immatriculation if c.isalnum()).upper()
+
+    def convertir(self, row):
+        return {
+            "immatriculation": _texte(row, "immatriculation", requis=True),
+            "marque": _texte(row, "marque", requis=True),
+            "modele": _texte(row, "modele", requis=True),
+            "type": _texte(row, "type", requis=True),
+            "capacite_passagers": _entier(row, "capacite_passagers", requis=True, minimum=1),
+            "caracteristiques_techniques": _texte(row, "caracteristiques_techniques"),
+            "volume_coffre_bagages": _entier(row, "volume_coffre_bagages"),
+            "volume_coffre_rabattus": _entier(row, "volume_coffre_rabattus"),
+            "nb_sieges_bebe": _entier(row, "nb_sieges_bebe") or 0,
+            "nb_valises": _entier(row, "nb_valises") or 0,
+            "coffre_de_toit": _booleen(row, "coffre_de_toit", False),
+            "details_coffre_toit": _texte(row, "details_coffre_toit"),
+            "disponible": _booleen(row, "disponible", True),
+            "image": _texte(row, "image"),
+        }
+
+    def reserver(self, m):
+        """Enregistre la clé ; False si elle existe déjà (base ou fichier)."""
+        cle = self.cle(m["immatriculation"])
+        if cle in self.cles:
+            return False
+        self.cles.add(cle)
+        return True
+
+    def apres(self):
+        from app.utils.availability import availability_index
+        from app.utils.fleet_index import fleet_index
+        availability_index.invalidate()
+        fleet_index.invalidate()
+
+
+class ImportForfaits:
+    modele = TarifForfait
+    invalider = ("tarifs",)
+
+    def __init__(self, simulation=False):
+        self.simulation = simulation
+        self.categories = {
+            nom.lower(): cid for cid, nom in db.session.query(CategorieVehicule.id, CategorieVehicule.nom)
+        }
+        # (catégorie, départ, arrivée) déjà couverts, sens inverse des
+        # forfaits bidirectionnels compris (même règle que tarifs_admin)
+        self.cles = set()
+        for cid, depart, arrivee, bidir in db.session.query(
+            TarifForfait.categorie_id, TarifForfait.depart, TarifForfait.arrivee, TarifForfait.bidirectionnel
+        ):
+            self._couvrir(cid, depart, arrivee, bidir)
+
+    def _couvrir(self, cid, depart, arrivee, bidir):
+        self.cles.add((cid, depart, arrivee))
+        if bidir:
+            self.cles.add((cid, arrivee, depart))
+
+    def categorie_id(self, nom):
+        if not nom:
+            return None
+        cid = self.categories.get(nom.lower())
+        if cid is None:
+            c = CategorieVehicule(nom=nom)
+            db.session.add(c)
+            # Validée tout de suite : un lot annulé ne doit pas l'emporter
+            if self.simulation:
+                db.session.flush()
+            else:
+                db.session.commit()
+            cid = self.categories[nom.lower()] = c.id
+        return cid
+
+    def convertir(self, row):
+        depart = _texte(row, "depart", requis=True)
+        arrivee = _texte(row, "arrivee", requis=True)
+        if depart == arrivee:
+            raise LigneInvalide("départ et arrivée identiques")
+        prix = _entier(row, "prix_cfa", requis=True)
+        return {
+            "depart": depart,
+            "arrivee": arrivee,
+            "categorie_id": self.categorie_id(_texte(row, "type_vehicule") or _texte(row, "categorie")),
+            "prix_cfa": prix,
+            "distance_km": _decimal(row, "distance_km"),
+            "bidirectionnel": _booleen(row, "bidirectionnel", True),
+            "actif": _booleen(row, "actif", True),
+        }
+
+    def reserver(self, m):
+        cid, depart, arrivee = m["categorie_id"], m["depart"], m["arrivee"]
+        if (cid, depart, arrivee) in self.cles:
+            return False
+        self._couvrir(cid, depart, arrivee, m["bidirectionnel"])
+        return True
+
+    def apres(self):
+        from app.utils.fare_index import fare_index
+        from app.utils.places import places_index
+        fare_index.rebuild()
+        places_index.invalidate()
+
+
+IMPORTEURS = {"vehicules": ImportVehicules, "forfaits": ImportForfaits}
+
+# En-têtes attendus (obligatoires en premier), affichés sur la page d'import
+COLONNES = {
+    "vehicules": [
+        "immatriculation", "marque", "modele", "type", "capacite_passagers",
+        "caracteristiques_techniques", "volume_coffre_bagages", "volume_coffre_rabattus",
+        "nb_sieges_bebe", "nb_valises", "coffre_de_toit", "details_coffre_toit",
+        "disponible", "image",
+    ],
+    "forfaits": [
+        "depart", "arrivee", "prix_cfa",
+        "type_vehicule", "distance_km", "bidirectionnel", "actif",
+    ],
+}
+
+
+def _inserer(importeur, lot, rapport):
+    """Insère un lot (une requête multi-lignes, une transaction)."""
+    try:
+        db.session.bulk_insert_mappings(importeur.modele, [m for _, m in lot])
+        db.session.commit()
+        rapport.inserees += len(lot)
+        return
+    except SQLAlchemyError:
+        db.session.rollback()
+    # Lot refusé par la base (contrainte, écriture concurrente) : ligne par
+    # ligne pour attribuer l'erreur
+    for ligne, m in lot:
+        try:
+            db.session.bulk_insert_mappings(importeur.modele, [m])
+            db.session.commit()
+            rapport.inserees += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            rapport.erreur(ligne, f"refusée par la base : {getattr(e, 'orig', e)}")
+
+
+def importer(type_, flux, lot=LOT_DEFAUT, simulation=False):
+    """
+    Importe le CSV `flux` (texte) ; retourne un RapportImport. En simulation,
+    les lignes sont validées et dédoublonnées mais rien n'est écrit.
+    """
+    importeur = IMPORTEURS[type_](simulation)
+    rapport = RapportImport(type_, simulation)
+    en_cours = []
+
+    # Ligne 1 : en-tête
+    ligne = 1
+    try:
+        for ligne, row in enumerate(lire_csv(flux), start=2):
+            if not any((v or "").strip() for v in row.values() if isinstance(v, str)):
+                continue
+            rapport.lignes += 1
+            try:
+                m = importeur.convertir(row)
+            except LigneInvalide as e:
+                rapport.erreur(ligne, str(e))
+                continue
+            if not importeur.reserver(m):
+                rapport.doublons += 1
+                rapport.erreur(ligne, "doublon")
+                continue
+            if simulation:
+                rapport.inserees += 1
+                continue
+            en_cours.append((ligne, m))
+            if len(en_cours) >= lot:
+                _inserer(importeur, en_cours, rapport)
+                en_cours = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Lecture interrompue : les lignes déjà validées sont gardées
+        rapport.erreur(ligne + 1, f"fichier illisible (encodage ou format CSV) : {e}")
+
+    if en_cours:
+        _inserer(importeur, en_cours, rapport)
+    if simulation:
+        # Catégories créées pendant la validation
+        db.session.rollback()
+    elif rapport.inserees:
+        from app.cache import response_cache
+        importeur.apres()
+        response_cache.invalidate(*importeur.invalider)
+    current_app.logger.info(f"📥 Import {type_} : {rapport.resume()}")
+    return rapport
+
+
+# ========================
+# CLI : flask import ...
+# ========================
+import_cli = AppGroup("import", help="Import CSV de véhicules et de forfaits.")
+
+
+def _commande(type_):
+    @import_cli.command(type_, help=f"Importe des {type_} depuis FICHIER (CSV).")
+    @click.argument("fichier", type=click.File("rb"))
+    @click.option("--lot", default=LOT_DEFAUT, show_default=True, help="Lignes par transaction.")
+    @click.option("--simulation", is_flag=True, help="Valide sans rien écrire.")
+    def commande(fichier, lot, simulation):
+        rapport = importer(type_, FluxCsv(fichier), lot=lot, simulation=simulation)
+        for ligne, message in rapport.erreurs:
+            click.echo(f"ligne {ligne} : {message}")
+        click.echo(rapport.resume())
+        if rapport.refusees:
+            raise SystemExit(1)
+    return commande
+
+
+for _type in IMPORTEURS:
+    _commande(_type)
+
+
+def ouvrir(fichier):
+    """Flux texte sur un FileStorage envoyé par formulaire (voir FluxCsv)."""
+    return FluxCsv(fichier.stream)
+
+
+def init_app(app):
+    app.cli.add_command(import_cli)
@@ -0,0 +1,249 @@
+"""
+Mesures des requêtes HTTP, exposées au format texte Prometheus sur /metrics.
+
+Par requête : durée (histogramme par endpoint / méthode / code), nombre et
+durée des requêtes SQL (événements du moteur SQLAlchemy), temps de rendu
+des gabarits (signaux Flask). Au moment de la collecte : profondeur de la
+file d'emails (email_outbox par statut), connexions des pools SQLAlchemy.
+
+Une requête qui dépasse METRICS_SEUIL_REQUETES_SQL requêtes SQL est
+signalée dans les logs avec l'instruction la plus répétée (N+1 probable).
+
+Accès à /metrics : admin connecté, adresse de METRICS_IPS (défaut : boucle
+locale, requêtes sans X-Forwarded-For) ou en-tête
+"Authorization: Bearer <METRICS_TOKEN>". Les compteurs sont propres à
+chaque processus (comme les index mémoire) : avec plusieurs workers
+gunicorn, chaque collecte voit le worker qui la sert.
+"""
+import hmac
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from threading import Lock
+
+from flask import Response, abort, current_app, g, has_request_context, request, session
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+
+__all__ = ["Histogram", "Metrics", "metrics"]
+
+PREFIXE = "dstravel"
+SEUIL_DEFAUT = 30
+
+BORNES_DUREE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BORNES_REQUETES = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Histogramme cumulatif par jeu d'étiquettes (buckets Prometheus)."""
+
+    def __init__(self, nom, aide, bornes, etiquettes):
+        self.nom = nom
+        self.aide = aide
+        self.bornes = bornes
+        self.etiquettes = etiquettes
+        self._series = {}   # valeurs d'étiquettes -> [compte par bucket..., somme, total]
+        self._lock = Lock()
+
+    def observe(self, valeur, *labels):
+        i = bisect_left(self.bornes, valeur)
+        with self._lock:
+            serie = self._series.get(labels)
+            if serie is None:
+                serie = self._series[labels] = [0] * (len(self.bornes) + 2)
+            serie[i] += 1   # i == len(bornes) : au-delà de la dernière borne (+Inf)
+            serie[-2] += valeur
+            serie[-1] += 1
+
+    def lignes(self):
+        yield f"# HELP {self.nom} {self.aide}"
+        yield f"# TYPE {self.nom} histogram"
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for labels, serie in sorted(series.items()):
+            base = _etiquettes(self.etiquettes, labels)
+            cumul = 0
+            for borne, n in zip((*self.bornes, "+Inf"), serie):
+                cumul += n
+                yield f'{self.nom}_bucket{_etiquettes((*self.etiquettes, "le"), (*labels, borne))} {cumul}'
+            yield f"{self.nom}_sum{base} {serie[-2]:.6f}"
+            yield f"{self.nom}_count{base} {serie[-1]}"
+
+
+class Compteur:
+    def __init__(self, nom, aide, etiquettes):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = etiquettes
+        self._valeurs = defaultdict(float)
+        self._lock = Lock()
+
+    def inc(self, valeur, *labels):
+        with self._lock:
+            self._valeurs[labels] += valeur
+
+    def lignes(self):
+        yield f"# HELP {self.nom} {self.aide}"
+        yield f"# TYPE {self.nom} counter"
+        with self._lock:
+            valeurs = dict(self._valeurs)
+        for labels, v in sorted(valeurs.items()):
+            yield f"{self.nom}{_etiquettes(self.etiquettes, labels)} {v:g}"
+
+
+def _echapper(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquettes(noms, valeurs):
+    if not noms:
+        return ""
+    return "{" + ",".join(f'{n}="{_echapper(v)}"' for n, v in zip(noms, valeurs)) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.duree = Histogram(
+            f"{PREFIXE}_http_request_duration_seconds", "Durée des requêtes HTTP.",
+            BORNES_DUREE, ("endpoint", "method", "status"),
+        )
+        self.requetes_sql = Histogram(
+            f"{PREFIXE}_db_queries_per_request", "Requêtes SQL par requête HTTP.",
+            BORNES_REQUETES, ("endpoint",),
+        )
+        self.duree_sql = Compteur(
+            f"{PREFIXE}_db_query_seconds_total", "Temps passé en base (secondes).", ("endpoint",),
+        )
+        self.rendu = Histogram(
+            f"{PREFIXE}_template_render_seconds", "Temps de rendu des gabarits.",
+            BORNES_DUREE, ("template",),
+        )
+        self.n_plus_un = Compteur(
+            f"{PREFIXE}_db_query_threshold_exceeded_total",
+            "Requêtes HTTP au-delà du seuil de requêtes SQL (N+1 probable).", ("endpoint",),
+        )
+        self.seuil = SEUIL_DEFAUT
+        self._sql_branche = False
+
+    def init_app(self, app):
+        self.seuil = app.config.get("METRICS_SEUIL_REQUETES_SQL", SEUIL_DEFAUT)
+        app.before_request(self._debut)
+        app.after_request(self._fin)
+        before_render_template.connect(self._debut_rendu, app)
+        template_rendered.connect(self._fin_rendu, app)
+        if not self._sql_branche:
+            # Tous les moteurs (base principale et éventuels réplicas)
+            event.listen(Engine, "before_cursor_execute", self._avant_sql)
+            event.listen(Engine, "after_cursor_execute", self._apres_sql)
+            self._sql_branche = True
+        app.add_url_rule("/metrics", "metrics", self.vue)
+        app.extensions["metrics"] = self
+
+    # ------------------------
+    # Cycle de vie d'une requête
+    # ------------------------
+    def _debut(self):
+        g._metrics = {"debut": time.perf_counter(), "sql": 0, "sql_s": 0.0, "instructions": Counter()}
+
+    def _fin(self, response):
+        m = g.pop("_metrics", None)
+        if m is None or request.endpoint == "metrics":
+            return response
+        endpoint = request.endpoint or "404"
+        self.duree.observe(time.perf_counter() - m["debut"], endpoint, request.method, response.status_code)
+        self.requetes_sql.observe(m["sql"], endpoint)
+        self.duree_sql.inc(m["sql_s"], endpoint)
+        if self.seuil and m["sql"] > self.seuil:
+            self.n_plus_un.inc(1, endpoint)
+            instruction, n = m["instructions"].most_common(1)[0]
+            current_app.logger.warning(
+                f"⚠️ [N+1] {request.method} {request.path} : {m['sql']} requêtes SQL "
+                f"(seuil {self.seuil}), {n}× {' '.join(instruction.split())[:200]}"
+            )
+        return response
+
+    def _avant_sql(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and "_metrics" in g:
+            conn.info.setdefault("_metrics_debut", []).append(time.perf_counter())
+
+    def _apres_sql(self, conn, cursor, statement, parameters, context, executemany):
+        debuts = conn.info.get("_metrics_debut")
+        if not debuts or not has_request_context():
+            return
+        m = g.get("_metrics")
+        if m is None:
+            return
+        m["sql"] += 1
+        m["sql_s"] += time.perf_counter() - debuts.pop()
+        m["instructions"][statement] += 1
+
+    def _debut_rendu(self, sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault("_metrics_rendus", []).append(time.perf_counter())
+
+    def _fin_rendu(self, sender, template, context, **extra):
+        debuts = g.get("_metrics_rendus") if has_request_context() else None
+        if debuts:
+            self.rendu.observe(time.perf_counter() - debuts.pop(), template.name or "?")
+
+    # ------------------------
+    # Exposition
+    # ------------------------
+    def _file_emails(self):
+        from app import db
+        from app.models.models import EmailOutbox
+
+        nom = f"{PREFIXE}_email_outbox_messages"
+        yield f"# HELP {nom} Emails de la file d'envoi par statut."
+        yield f"# TYPE {nom} gauge"
+        for statut, n in db.session.query(EmailOutbox.statut, func.count()).group_by(EmailOutbox.statut):
+            yield f'{nom}{{statut="{_echapper(statut)}"}} {n}'
+
+    def _pools(self):
+        from app import db
+
+        nom = f"{PREFIXE}_db_pool_connections"
+        yield f"# HELP {nom} Connexions du pool par base (empruntées / libres)."
+        yield f"# TYPE {nom} gauge"
+        for cle, engine in db.engines.items():
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue   # StaticPool (SQLite en mémoire)
+            bind = _echapper(cle or "principale")
+            yield f'{nom}{{bind="{bind}",etat="empruntees"}} {pool.checkedout()}'
+            yield f'{nom}{{bind="{bind}",etat="libres"}} {pool.checkedin()}'
+
+    def exposition(self):
+        """Texte au format d'exposition Prometheus (version 0.0.4)."""
+        lignes = []
+        for mesure in (self.duree, self.requetes_sql, self.duree_sql, self.n_plus_un, self.rendu):
+            lignes.extend(mesure.lignes())
+        lignes.extend(self._file_emails())
+        lignes.extend(self._pools())
+        return "\n".join(lignes) + "\n"
+
+    def _autorise(self):
+        if session.get("admin_logged_in"):
+            return True
+        jeton = current_app.config.get("METRICS_TOKEN")
+        auth = request.headers.get("Authorization", "")
+        if jeton and hmac.compare_digest(auth.encode(), f"Bearer {jeton}".encode()):
+            return True
+        # Derrière un proxy local, remote_addr est celle du proxy : seules les
+        # requêtes directes comptent
+        if "X-Forwarded-For" in request.headers:
+            return False
+        return request.remote_addr in current_app.config.get("METRICS_IPS", ("127.0.0.1", "::1"))
+
+    def vue(self):
+        if not self._autorise():
+            abort(403)
+        return Response(
+            self.exposition(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+            headers={"Cache-Control": "no-store"},
+        )
+
+
+metrics = Metrics()
@@ -39,6 +39,15 @@ class Vehicule(db.Model):
     # Relations
     reservations = db.relationship('Reservation', backref='vehicule', lazy=True)
 
+    # Index partiel : seuls les véhicules disponibles sont listés côté public
+    __table_args__ = (
+        db.Index(
+            'ix_vehicule_disponible_capacite', 'capacite_passagers',
+            postgresql_where=disponible == db.true(),
+            sqlite_where=disponible == db.true(),
+        ),
+    )
+
 
 # --- Réservations ---
 class Reservation(db.Model):
@@ -69,10 +78,20 @@ class Reservation(db.Model):
     paiement = db.Column(db.String(50))
     commentaires = db.Column(db.Text)
     statut = db.Column(db.String(50), nullable=False, default="En attente")
+    # Devis indicatif au moment de la réservation (F CFA), repris par les statistiques
+    prix_estime = db.Column(db.Integer)
 
 
     # Lien vers le trajet calculé
-    trajet = db.relationship('Trajet', uselist=False, backref='reservation', lazy=True)
+    trajet = db.relationship('Trajet', uselist=False, backref='reservation', lazy=True,
+                             cascade='all, delete-orphan')
+
+    # Pagination par curseur (date_heure, id), filtres statut / véhicule
+    __table_args__ = (
+        db.Index('ix_reservation_date_heure_id', 'date_heure', 'id'),
+        db.Index('ix_reservation_statut_date_heure', 'statut', 'date_heure'),
+        db.Index('ix_reservation_vehicule_date_heure', 'vehicule_id', 'date_heure'),
+    )
 
 
 # --- Détails du trajet ---
@@ -83,7 +102,22 @@ class Trajet(db.Model):
     adresse_arrivee = db.Column(db.String(200), nullable=False)
     distance_km = db.Column(db.Float)
     duree_estimee_min = db.Column(db.Integer)
-    reservation_id = db.Column(db.Integer, db.ForeignKey('reservation.id'), nullable=False)
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservation.id'), nullable=False, index=True)
+
+
+# --- Cache persistant des distances (paire d'adresses normalisées) ---
+class DistanceCache(db.Model):
+    __tablename__ = 'distance_cache'
+    id = db.Column(db.Integer, primary_key=True)
+    depart_norm = db.Column(db.String(200), nullable=False)
+    arrivee_norm = db.Column(db.String(200), nullable=False)
+    distance_km = db.Column(db.Float, nullable=False)
+    duree_min = db.Column(db.Float, nullable=False)
+    source = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.UniqueConstraint('depart_norm', 'arrivee_norm', name='uq_distance_cache_paire'),
+    )
 
 
 # --- Tarification ---
@@ -103,6 +137,32 @@ class TarifForfait(db.Model):
     actif = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Recherche de doublons / forfaits actifs, derniers forfaits (accueil, admin)
+    __table_args__ = (
+        db.Index('ix_tarif_forfait_depart_arrivee', 'depart', 'arrivee', 'actif'),
+        db.Index('ix_tarif_forfait_created_at', 'created_at'),
+        db.Index(
+            'ix_tarif_forfait_actif_created_at', 'created_at',
+            postgresql_where=actif == db.true(),
+            sqlite_where=actif == db.true(),
+        ),
+    )
+
+
+class ZoneTarif(db.Model):
+    """
+    Zone géographique d'une extrémité de forfait (centre + rayon) : toute
+    adresse géocodée dans le cercle est tarifée comme le lieu `nom`.
+    Exemple : "Dakar Plateau", rayon 4 km -> Terrou-Bi, Médina...
+    """
+    __tablename__ = 'zone_tarif'
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(200), unique=True, nullable=False)  # extrémité de forfait
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    rayon_km = db.Column(db.Float, nullable=False, default=3.0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 
 class TarifRegle(db.Model):
     """
@@ -121,6 +181,74 @@ class TarifRegle(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# --- File d'envoi des emails (outbox) ---
+class EmailOutbox(db.Model):
+    """
+    Email en attente d'envoi, écrit dans la même transaction que l'objet
+    métier (réservation, message de contact) puis envoyé par le worker.
+    Avec un gabarit, seuls gabarit + contexte (ids) sont écrits par la
+    requête ; sujet, corps et substitutions sont remplis par le worker.
+    Statuts : en_attente -> envoi -> envoye | echec (lettre morte).
+    """
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    destinataire = db.Column(db.String(180), nullable=False)
+    expediteur = db.Column(db.String(180), nullable=False)
+    gabarit = db.Column(db.String(100))
+    contexte = db.Column(db.Text)  # JSON, ex. {"reservation_id": 42}
+    sujet = db.Column(db.String(255))
+    corps_texte = db.Column(db.Text)
+    corps_html = db.Column(db.Text)
+    substitutions = db.Column(db.Text)  # JSON {"-cle-": "valeur"} propre au destinataire
+    statut = db.Column(db.String(20), nullable=False, default="en_attente")
+    tentatives = db.Column(db.Integer, nullable=False, default=0)
+    prochain_essai = db.Column(db.DateTime, default=datetime.utcnow)
+    verrou_jusqua = db.Column(db.DateTime)
+    lot = db.Column(db.String(32))  # jeton de réclamation du worker
+    derniere_erreur = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    envoye_at = db.Column(db.DateTime)
+
+    # Réclamation par le worker : emails dus, puis relecture par jeton
+    __table_args__ = (
+        db.Index('ix_email_outbox_statut_prochain_essai', 'statut', 'prochain_essai'),
+        db.Index('ix_email_outbox_lot', 'lot'),
+    )
+
+
+# --- Sessions côté serveur (SESSION_BACKEND=database, app/sessions) ---
+class SessionServeur(db.Model):
+    __tablename__ = 'session_serveur'
+    id = db.Column(db.String(64), primary_key=True)    # identifiant porté par le cookie
+    donnees = db.Column(db.LargeBinary, nullable=False)
+    expire_le = db.Column(db.DateTime, nullable=False, index=True)
+
+
+# --- Statistiques (agrégats maintenus à chaque changement de statut) ---
+class StatJour(db.Model):
+    """Réservations par jour de course × véhicule × statut (app.analytics)."""
+    __tablename__ = 'stat_jour'
+    jour = db.Column(db.Date, primary_key=True)
+    vehicule_id = db.Column(db.Integer, primary_key=True)  # sans FK : l'historique survit au véhicule
+    statut = db.Column(db.String(50), primary_key=True)
+    nb = db.Column(db.Integer, nullable=False, default=0)
+    minutes = db.Column(db.Integer, nullable=False, default=0)  # occupation estimée du véhicule
+    km = db.Column(db.Float, nullable=False, default=0)
+    ca_estime = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StatTrajetMois(db.Model):
+    """Réservations par mois × trajet (adresses normalisées) × statut."""
+    __tablename__ = 'stat_trajet_mois'
+    mois = db.Column(db.String(7), primary_key=True)  # AAAA-MM
+    depart = db.Column(db.String(200), primary_key=True)
+    arrivee = db.Column(db.String(200), primary_key=True)
+    statut = db.Column(db.String(50), primary_key=True)
+    nb = db.Column(db.Integer, nullable=False, default=0)
+    km = db.Column(db.Float, nullable=False, default=0)
+    ca_estime = db.Column(db.Integer, nullable=False, default=0)
+
+
 # --- Notifications administratives ---
 class Notification(db.Model):
     __tablename__ = 'notification'
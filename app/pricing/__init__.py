@@ -0,0 +1,12 @@
+from app.pricing.engine import (
+    CompiledForfait, CompiledRule, DistanceRequise, PricingError, Quote,
+    Ruleset, Trip, build_ruleset, quote,
+)
+from app.pricing.batch import quote_batch
+from app.pricing.zones import CompiledZone, ZoneIndex
+
+__all__ = [
+    "CompiledForfait", "CompiledRule", "CompiledZone", "DistanceRequise",
+    "PricingError", "Quote", "Ruleset", "Trip", "ZoneIndex", "build_ruleset",
+    "quote", "quote_batch",
+]
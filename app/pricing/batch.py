@@ -0,0 +1,70 @@
+"""
+Tarification vectorisée d'un lot de trajets (même sémantique que quote()).
+
+Les forfaits sont résolus trajet par trajet (lecture de dictionnaire) ;
+les trajets au kilomètre sont regroupés par règle compilée et la formule
+est appliquée en opérations NumPy sur chaque groupe.
+"""
+import numpy as np
+
+from app.pricing.engine import (
+    FACTEUR_TEMPS_FORFAIT, HEURE_NUIT_DEBUT, HEURE_NUIT_FIN, JOUR_WEEKEND,
+    DistanceRequise, PricingError, Quote,
+)
+
+
+def quote_batch(trips, ruleset):
+    """
+    Retourne une liste alignée sur trips : Quote, ou PricingError si le
+    trajet ne peut pas être coté.
+    """
+    resultats = [None] * len(trips)
+    groupes = {}
+
+    for i, trip in enumerate(trips):
+        forfait = ruleset.forfait(trip.depart, trip.arrivee, trip.categorie_id)
+        if forfait:
+            distance_km = forfait.distance_km if forfait.distance_km is not None else trip.distance_km
+            resultats[i] = Quote(
+                prix=forfait.prix_cfa,
+                distance_km=distance_km,
+                temps_min=distance_km * FACTEUR_TEMPS_FORFAIT if distance_km is not None else None,
+                source="forfait",
+                forfait_id=forfait.id,
+                regle_id=None,
+            )
+            continue
+        regle = ruleset.regle(trip.categorie_id)
+        if not regle:
+            resultats[i] = PricingError("Aucun tarif disponible")
+        elif trip.distance_km is None:
+            resultats[i] = DistanceRequise("Distance requise pour le tarif kilométrique")
+        else:
+            groupes.setdefault(regle.id, (regle, []))[1].append(i)
+
+    for regle, idx in groupes.values():
+        dist = np.fromiter((trips[i].distance_km for i in idx), dtype=np.float64, count=len(idx))
+        heure = np.fromiter(
+            (trips[i].date_heure.hour if trips[i].date_heure else 12 for i in idx),
+            dtype=np.int8, count=len(idx),
+        )
+        jour = np.fromiter(
+            (trips[i].date_heure.weekday() if trips[i].date_heure else 0 for i in idx),
+            dtype=np.int8, count=len(idx),
+        )
+
+        prix = regle.base + regle.prix_km * dist
+        prix = np.maximum(prix, regle.minimum)
+        prix = np.where((heure >= HEURE_NUIT_DEBUT) | (heure < HEURE_NUIT_FIN), prix * regle.coeff_nuit, prix)
+        prix = np.where(jour >= JOUR_WEEKEND, prix * regle.coeff_weekend, prix)
+
+        for k, i in enumerate(idx):
+            resultats[i] = Quote(
+                prix=float(prix[k]),
+                distance_km=trips[i].distance_km,
+                temps_min=trips[i].temps_min,
+                source="regle",
+                forfait_id=None,
+                regle_id=regle.id,
+            )
+    return resultats
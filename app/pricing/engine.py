@@ -0,0 +1,200 @@
+"""
+Moteur de tarification pur : aucune I/O, aucune lecture de l'horloge.
+
+    ruleset = build_ruleset(forfaits, regles, categories)
+    q = quote(Trip("Dakar", "AIBD", datetime(2025, 10, 14, 23, 0)), ruleset)
+
+Les règles sont "compilées" une fois (valeurs numériques résolues, défauts
+appliqués, index par catégorie) ; quote() ne fait ensuite que des lectures
+de dictionnaires et quelques opérations arithmétiques.
+"""
+from collections import namedtuple
+
+from app.pricing.zones import CompiledZone, ZoneIndex
+from app.utils.adresses import normaliser_adresse
+
+HEURE_NUIT_DEBUT = 22
+HEURE_NUIT_FIN = 6
+JOUR_WEEKEND = 5          # samedi (datetime.weekday)
+FACTEUR_TEMPS_FORFAIT = 1.2  # minutes par km pour un forfait sans durée connue
+
+Trip = namedtuple(
+    "Trip", "depart arrivee date_heure categorie_id distance_km temps_min",
+    defaults=(None, None, None),
+)
+Quote = namedtuple(
+    "Quote", "prix distance_km temps_min source forfait_id regle_id",
+)
+
+
+class PricingError(Exception):
+    pass
+
+
+class DistanceRequise(PricingError):
+    """Le trajet relève du tarif kilométrique mais aucune distance n'est fournie."""
+
+
+class CompiledForfait:
+    __slots__ = ("id", "depart", "arrivee", "prix_cfa", "distance_km", "categorie_id")
+
+    def __init__(self, t):
+        self.id = t.id
+        self.depart = t.depart
+        self.arrivee = t.arrivee
+        self.prix_cfa = t.prix_cfa
+        self.distance_km = t.distance_km
+        self.categorie_id = t.categorie_id
+
+
+class CompiledRule:
+    __slots__ = ("id", "base", "prix_km", "minimum", "coeff_nuit", "coeff_weekend", "categorie_id")
+
+    def __init__(self, r):
+        self.id = r.id
+        self.base = float(r.base)
+        self.prix_km = float(r.prix_km)
+        self.minimum = float(r.minimum or 0)
+        self.coeff_nuit = float(r.coeff_nuit) if r.coeff_nuit is not None else 1.0
+        self.coeff_weekend = float(r.coeff_weekend) if r.coeff_weekend is not None else 1.0
+        self.categorie_id = r.categorie_id
+
+    def prix(self, distance_km, date_heure):
+        prix = self.base + self.prix_km * distance_km
+        if prix < self.minimum:
+            prix = self.minimum
+        if date_heure is not None:
+            if date_heure.hour >= HEURE_NUIT_DEBUT or date_heure.hour < HEURE_NUIT_FIN:
+                prix *= self.coeff_nuit
+            if date_heure.weekday() >= JOUR_WEEKEND:
+                prix *= self.coeff_weekend
+        return prix
+
+
+class Ruleset:
+    """
+    Jeu de tarifs compilé :
+      forfaits[(depart_norm, arrivee_norm)] -> {categorie_id: CompiledForfait}
+      regles[categorie_id] -> CompiledRule
+      zones : ZoneIndex des extrémités de forfait
+    La clé de catégorie None désigne un tarif valable pour toutes les catégories.
+    """
+
+    def __init__(self, forfaits, regles, premiere_regle, categories, zones=None):
+        self.forfaits = forfaits
+        self.regles = regles
+        self.premiere_regle = premiere_regle
+        self.categories = categories
+        self.zones = zones if zones is not None else ZoneIndex(())
+
+    def categorie_id(self, value):
+        """Résout un id ou un nom de CategorieVehicule ; None si inconnu."""
+        if value is None or value == "":
+            return None
+        if isinstance(value, int):
+            return value
+        s = str(value).strip()
+        if s.isdigit():
+            return int(s)
+        return self.categories.get(normaliser_adresse(s))
+
+    def forfait(self, depart, arrivee, categorie_id=None):
+        """
+        Forfait de la paire d'adresses ; à défaut, celui de la paire de zones
+        qui les contiennent (une adresse hors zone reste telle quelle).
+        """
+        a, b = normaliser_adresse(depart), normaliser_adresse(arrivee)
+        f = self._forfait((a, b), categorie_id)
+        if f is None and self.zones:
+            za = self.zones.localiser(depart) or a
+            zb = self.zones.localiser(arrivee) or b
+            if (za, zb) != (a, b):
+                f = self._forfait((za, zb), categorie_id)
+        return f
+
+    def _forfait(self, key, categorie_id):
+        par_categorie = self.forfaits.get(key)
+        if not par_categorie:
+            return None
+        if categorie_id is not None and categorie_id in par_categorie:
+            return par_categorie[categorie_id]
+        if None in par_categorie:
+            return par_categorie[None]
+        if categorie_id is None:
+            # Trajet sans catégorie : premier forfait défini pour la paire
+            return min(par_categorie.values(), key=lambda f: f.id)
+        return None
+
+    def regle(self, categorie_id=None):
+        if categorie_id is not None and categorie_id in self.regles:
+            return self.regles[categorie_id]
+        if None in self.regles:
+            return self.regles[None]
+        if categorie_id is None:
+            return self.premiere_regle
+        return None
+
+
+def build_ruleset(forfaits, regles, categories=(), zones=()):
+    """
+    Compile des lignes TarifForfait / TarifRegle / CategorieVehicule actives
+    et ZoneTarif (objets ORM ou tout objet exposant les mêmes attributs),
+    triées par id.
+    """
+    index = {}
+    # Sens direct d'abord : un forfait défini explicitement A->B
+    # l'emporte sur le sens inverse d'un forfait B->A bidirectionnel.
+    compiles = [(t, CompiledForfait(t)) for t in forfaits]
+    for t, f in compiles:
+        key = (normaliser_adresse(t.depart), normaliser_adresse(t.arrivee))
+        index.setdefault(key, {}).setdefault(f.categorie_id, f)
+    for t, f in compiles:
+        if t.bidirectionnel:
+            key = (normaliser_adresse(t.arrivee), normaliser_adresse(t.depart))
+            index.setdefault(key, {}).setdefault(f.categorie_id, f)
+
+    par_categorie = {}
+    premiere = None
+    for r in regles:
+        rule = CompiledRule(r)
+        par_categorie.setdefault(rule.categorie_id, rule)
+        if premiere is None:
+            premiere = rule
+
+    noms = {normaliser_adresse(c.nom): c.id for c in categories}
+    return Ruleset(index, par_categorie, premiere, noms, ZoneIndex(CompiledZone(z) for z in zones))
+
+
+def quote(trip, ruleset):
+    """
+    Devis déterministe pour un trajet. Les coefficients nuit/week-end sont
+    évalués sur trip.date_heure (aucun coefficient si None).
+    Lève PricingError si aucun tarif ne s'applique, DistanceRequise si le
+    tarif kilométrique s'applique sans distance fournie.
+    """
+    forfait = ruleset.forfait(trip.depart, trip.arrivee, trip.categorie_id)
+    if forfait:
+        distance_km = forfait.distance_km if forfait.distance_km is not None else trip.distance_km
+        temps_min = distance_km * FACTEUR_TEMPS_FORFAIT if distance_km is not None else None
+        return Quote(
+            prix=forfait.prix_cfa,
+            distance_km=distance_km,
+            temps_min=temps_min,
+            source="forfait",
+            forfait_id=forfait.id,
+            regle_id=None,
+        )
+
+    regle = ruleset.regle(trip.categorie_id)
+    if not regle:
+        raise PricingError("Aucun tarif disponible")
+    if trip.distance_km is None:
+        raise DistanceRequise("Distance requise pour le tarif kilométrique")
+    return Quote(
+        prix=regle.prix(trip.distance_km, trip.date_heure),
+        distance_km=trip.distance_km,
+        temps_min=trip.temps_min,
+        source="regle",
+        forfait_id=None,
+        regle_id=regle.id,
+    )
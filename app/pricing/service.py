@@ -0,0 +1,61 @@
+"""
+Couche I/O autour du moteur : récupère le jeu de tarifs compilé (index
+mémoire) et les distances (fournisseur en cache), puis délègue au moteur.
+"""
+from app.distance import get_distance_and_time
+from app.pricing.batch import quote_batch
+from app.pricing.engine import PricingError, Trip, quote
+from app.utils.fare_index import fare_index
+
+
+def _completer_distance(trip, ruleset):
+    """Ajoute distance/durée au trajet si le moteur en aura besoin."""
+    forfait = ruleset.forfait(trip.depart, trip.arrivee, trip.categorie_id)
+    if forfait is None:
+        if ruleset.regle(trip.categorie_id) is None:
+            raise PricingError("Aucun tarif disponible")
+        distance_km, temps_min = get_distance_and_time(trip.depart, trip.arrivee)
+        return trip._replace(distance_km=distance_km, temps_min=temps_min)
+    if forfait.distance_km is None:
+        # Forfait sans distance de référence : distance indicative seulement
+        try:
+            distance_km, temps_min = get_distance_and_time(trip.depart, trip.arrivee)
+            return trip._replace(distance_km=distance_km, temps_min=temps_min)
+        except Exception:
+            pass
+    return trip
+
+
+def coter(depart, arrivee, date_heure, categorie=None):
+    """
+    Devis pour un trajet. Lève PricingError si aucun tarif ne s'applique ;
+    les erreurs du fournisseur de distance sont propagées telles quelles.
+    """
+    ruleset = fare_index.ruleset()
+    trip = Trip(depart, arrivee, date_heure, ruleset.categorie_id(categorie))
+    return quote(_completer_distance(trip, ruleset), ruleset)
+
+
+def coter_lot(trajets, date_defaut):
+    """
+    trajets : liste de dict {depart, arrivee, date_heure, categorie}.
+    Retourne une liste alignée de Quote ou d'exceptions.
+    """
+    ruleset = fare_index.ruleset()
+    trips = []
+    erreurs = {}
+    for i, t in enumerate(trajets):
+        trip = Trip(
+            t["depart"], t["arrivee"], t.get("date_heure") or date_defaut,
+            ruleset.categorie_id(t.get("categorie")),
+        )
+        try:
+            trip = _completer_distance(trip, ruleset)
+        except Exception as e:
+            erreurs[i] = e
+        trips.append(trip)
+
+    resultats = quote_batch(trips, ruleset)
+    for i, e in erreurs.items():
+        resultats[i] = e
+    return resultats
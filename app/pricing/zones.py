@@ -0,0 +1,82 @@
+"""
+Zones des forfaits : rattache une adresse à l'extrémité de forfait dont la
+zone (centre + rayon) la contient, pour coter "Hôtel Terrou-Bi, Corniche
+Ouest" au forfait "Dakar Plateau".
+
+    zones = ZoneIndex([CompiledZone(z) for z in ZoneTarif.query.all()])
+    zones.localiser("Hôtel Terrou-Bi, Corniche Ouest")   # -> "dakar plateau"
+
+Géocodage hors-ligne par le gazetteer local (ou coordonnées "lat,lon").
+Index spatial en grille : coordonnées projetées en km (équirectangulaire,
+suffisant à l'échelle du pays), cellules de la taille du plus grand rayon ;
+un point n'est comparé qu'aux zones des 9 cellules qui l'entourent.
+"""
+import math
+from functools import lru_cache
+
+from app.distance.backends import haversine_km
+from app.distance.gazetteer import geocoder
+from app.utils.adresses import normaliser_adresse
+
+KM_PAR_DEGRE = 111.2
+# Marge sur la taille des cellules : erreur de la projection plane
+MARGE_CELLULE = 1.05
+
+
+class CompiledZone:
+    __slots__ = ("id", "nom", "canonique", "lat", "lon", "rayon_km")
+
+    def __init__(self, z):
+        self.id = z.id
+        self.nom = z.nom
+        self.canonique = normaliser_adresse(z.nom)
+        self.lat = float(z.latitude)
+        self.lon = float(z.longitude)
+        self.rayon_km = float(z.rayon_km)
+
+
+class ZoneIndex:
+    def __init__(self, zones):
+        self.zones = list(zones)
+        self._cellules = {}
+        if self.zones:
+            lat0 = sum(z.lat for z in self.zones) / len(self.zones)
+            self._cos0 = math.cos(math.radians(lat0))
+            self._pas = max(z.rayon_km for z in self.zones) * MARGE_CELLULE or 1.0
+            for z in self.zones:
+                self._cellules.setdefault(self._cellule(z.lat, z.lon), []).append(z)
+        # Une adresse est géocodée une fois par jeu de tarifs
+        self.localiser = lru_cache(maxsize=4096)(self._localiser)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _cellule(self, lat, lon):
+        return (
+            math.floor(lon * KM_PAR_DEGRE * self._cos0 / self._pas),
+            math.floor(lat * KM_PAR_DEGRE / self._pas),
+        )
+
+    def zone(self, lat, lon):
+        """Zone contenant le point (la plus proche de son centre si plusieurs), ou None."""
+        if not self._cellules:
+            return None
+        cx, cy = self._cellule(lat, lon)
+        meilleure, d_min = None, None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for z in self._cellules.get((cx + dx, cy + dy), ()):
+                    d = haversine_km(lat, lon, z.lat, z.lon)
+                    if d <= z.rayon_km and (d_min is None or d < d_min):
+                        meilleure, d_min = z, d
+        return meilleure
+
+    def _localiser(self, adresse):
+        """Nom canonique de la zone de `adresse` ; None si lieu inconnu ou hors zone."""
+        if not self._cellules:
+            return None
+        lieu = geocoder(adresse)
+        if lieu is None:
+            return None
+        z = self.zone(lieu[1], lieu[2])
+        return z.canonique if z else None
@@ -0,0 +1,141 @@
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, session
+
+from app.database import lecture_seule
+from app.dispatch import service as dispatch
+from app.pricing import PricingError
+from app.pricing.service import coter_lot
+from app.routes.main import parse_date, parse_datetime_local, to_int
+from app.utils.availability import available_vehicles
+from app.utils.places import places_index
+
+# ========================
+# Blueprint API (JSON, sans jeton CSRF)
+# ========================
+api = Blueprint("api", __name__, url_prefix="/api")
+
+# ========================
+# Devis en lot
+# ========================
+@api.route("/quotes/batch", methods=["POST"])
+def quotes_batch():
+    """
+    Corps JSON : {"trajets": [...]} où chaque trajet est soit un objet
+    {"depart", "arrivee", "date_heure", "categorie"}, soit un tableau
+    [depart, arrivee, date_heure, categorie].
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("trajets") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Liste de trajets attendue"}), 400
+
+    max_items = current_app.config.get("QUOTES_BATCH_MAX", 1000)
+    if len(items) > max_items:
+        return jsonify({"error": f"Maximum {max_items} trajets par lot"}), 413
+
+    trajets = []
+    for i, item in enumerate(items):
+        if isinstance(item, (list, tuple)):
+            item = dict(zip(("depart", "arrivee", "date_heure", "categorie"), item))
+        if not isinstance(item, dict):
+            return jsonify({"error": f"Trajet {i} invalide"}), 400
+        depart = str(item.get("depart") or "").strip()
+        arrivee = str(item.get("arrivee") or "").strip()
+        if not depart or not arrivee:
+            return jsonify({"error": f"Trajet {i} : adresses manquantes"}), 400
+        dt = None
+        if item.get("date_heure"):
+            dt = parse_datetime_local(str(item["date_heure"]))
+            if not dt:
+                return jsonify({"error": f"Trajet {i} : date/heure invalide"}), 400
+        trajets.append({
+            "depart": depart,
+            "arrivee": arrivee,
+            "date_heure": dt,
+            "categorie": item.get("categorie"),
+        })
+
+    resultats = []
+    for i, (t, q) in enumerate(zip(trajets, coter_lot(trajets, datetime.now()))):
+        if isinstance(q, PricingError):
+            res = {"error": str(q)}
+        elif isinstance(q, Exception):
+            res = {"error": f"Erreur distance : {q}"}
+        else:
+            res = {
+                "source": q.source,
+                "distance_km": round(q.distance_km) if q.distance_km is not None else None,
+                "temps_min": round(q.temps_min) if q.temps_min is not None else None,
+                "prix": q.prix,
+                "tarif": f"{q.prix:,.0f} F CFA",
+            }
+        res["index"] = i
+        if t["categorie"] is not None:
+            res["categorie"] = t["categorie"]
+        resultats.append(res)
+    return jsonify({"resultats": resultats})
+
+
+# ========================
+# Disponibilité des véhicules
+# ========================
+@api.route("/vehicles/available")
+def vehicles_available():
+    """
+    ?start=AAAA-MM-JJTHH:MM[&end=...][&passengers=N][&luggage=N]
+    -> {"vehicules": [ids...]} (plus petite capacité d'abord).
+    """
+    start = parse_datetime_local(request.args.get("start"))
+    if not start:
+        return jsonify({"error": "Paramètre start invalide"}), 400
+    end = None
+    if request.args.get("end"):
+        end = parse_datetime_local(request.args["end"])
+        if not end or end <= start:
+            return jsonify({"error": "Paramètre end invalide"}), 400
+    ids = available_vehicles(
+        start, end,
+        passengers=to_int(request.args.get("passengers"), default=1),
+        luggage=to_int(request.args.get("luggage"), default=0),
+    )
+    return jsonify({"vehicules": ids})
+
+# ========================
+# Dispatch du jour (admin)
+# ========================
+@api.route("/dispatch")
+@lecture_seule
+def dispatch_du_jour():
+    """
+    ?jour=AAAA-MM-JJ (aujourd'hui par défaut) -> plan actuel et plan optimisé
+    des réservations du jour : tournées par véhicule, réaffectations proposées.
+    Session admin requise.
+    """
+    if not session.get("admin_logged_in"):
+        return jsonify({"error": "Authentification requise"}), 401
+    jour = datetime.now()
+    if request.args.get("jour"):
+        jour = parse_date(request.args["jour"])
+        if not jour:
+            return jsonify({"error": "Paramètre jour invalide"}), 400
+    return jsonify(dispatch.en_json(dispatch.plan_du_jour(jour.date())))
+
+# ========================
+# Autocomplétion des adresses
+# ========================
+@api.route("/places")
+def places():
+    """
+    ?q=aer&limit=8 -> lieux connus (forfaits, réservations passées,
+    gazetteer) dont les mots commencent par ceux de q. "forfait": true
+    signale un lieu couvert par un prix fixe.
+    """
+    q = (request.args.get("q") or "").strip()
+    limit = min(max(to_int(request.args.get("limit"), default=8), 1), 20)
+    if len(q) < 2:
+        return jsonify({"q": q, "places": []})
+    resp = jsonify({"q": q, "places": [l.as_dict() for l in places_index.search(q, limit)]})
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 60
+    return resp
@@ -1,28 +1,51 @@
 import os
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
-from threading import Thread
 
 from flask import (
     Blueprint, render_template, request, session,
-    redirect, url_for, flash, current_app, jsonify
+    redirect, url_for, flash, current_app, jsonify,
+    Response, abort, stream_with_context
 )
-from werkzeug.utils import secure_filename
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import contains_eager
 
-from app import db, mail
+from app import analytics, db, mail
+from app.cache import response_cache
+from app.database import lecture_seule
+from app.dispatch import service as dispatch
 from app.forms.forms import (
     AdminLoginForm, AddVehiculeForm, ReservationForm,
-    AddTarifForfaitForm, AddTarifRegleForm, ContactForm
+    AddTarifForfaitForm, AddTarifRegleForm, AddZoneTarifForm, ContactForm, ImportCSVForm
 )
-from app.models.models import Vehicule, Reservation, TarifForfait, TarifRegle
+from app.distance import get_distance_and_time
+from app.distance.gazetteer import geocoder
+from app.emails import enqueue_email, enqueue_reservation_emails, enqueue_template
+from app.images import enregistrer_photo
+from app.sessions import regenerer
+from app import importation
+from app.models.models import (
+    CategorieVehicule, Vehicule, Reservation, TarifForfait, TarifRegle, Trajet, ZoneTarif
+)
+from app.pricing import PricingError
+from app.pricing.service import coter
+from app.utils import export
+from app.utils.adresses import normaliser_adresse
+from app.utils.availability import (
+    CreneauIndisponible, availability_index, fin_creneau, verrouiller_creneau
+)
+from app.utils.fare_index import fare_index
+from app.utils.fleet_index import Besoin, besoin_depuis, fleet_index
+from app.utils.places import places_index
 
 # ========================
 # Blueprint
 # ========================
 main = Blueprint("main", __name__)
 
+STATUTS_RESERVATION = ["En attente", "Confirmée", "Terminée", "Annulée"]
+
 # ========================
 # Helpers
 # ========================
@@ -40,6 +63,8 @@ def to_int(value, default=None):
 def parse_datetime_local(value: str):
     """
     Parse un input HTML5 type 'datetime-local' (ex: '2025-10-14T23:51').
+    Toujours naïf (heure locale, comme en base) : une heure avec fuseau
+    ('10:00Z', '10:00+02:00') est convertie en heure locale.
     """
     if not value:
         return None
@@ -50,9 +75,65 @@ def parse_datetime_local(value: str):
         except ValueError:
             pass
     try:
-        return datetime.fromisoformat(s)
+        dt = datetime.fromisoformat(s)
     except Exception:
         return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+def parse_date(value):
+    """Parse une date 'AAAA-MM-JJ' (input HTML5 type 'date')."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d")
+    except ValueError:
+        return None
+
+def encode_curseur(r):
+    return f"{r.date_heure.isoformat()}_{r.id}"
+
+def decode_curseur(value):
+    """Curseur de pagination 'date_heure_id' -> (datetime, id), ou None."""
+    if not value:
+        return None
+    dt, _, rid = value.rpartition("_")
+    try:
+        return datetime.fromisoformat(dt), int(rid)
+    except ValueError:
+        return None
+
+def garder_brouillon(vehicule_id, data):
+    """
+    Brouillon de réservation en session : champs remplis seulement, et les
+    SESSION_BROUILLONS_MAX véhicules consultés le plus récemment.
+    L'ordre de consultation est gardé à part : la session est sérialisée
+    avec des clés triées, l'ordre du dict n'y survit pas.
+    """
+    cle = str(vehicule_id)
+    drafts = session.get("reservation_drafts", {})
+    ordre = [v for v in session.get("reservation_drafts_ordre", []) if v in drafts and v != cle]
+    drafts[cle] = {k: v for k, v in data.items() if v}
+    ordre.append(cle)
+    maximum = current_app.config.get("SESSION_BROUILLONS_MAX", 5)
+    ordre = ordre[-maximum:]
+    session["reservation_drafts"] = {v: drafts[v] for v in ordre}
+    session["reservation_drafts_ordre"] = ordre
+
+def contexte_accueil():
+    """Données de home.html (accueil et résultat d'estimation)."""
+    # Requêtes non exécutées ici : les fragments du gabarit ne les
+    # déclenchent que s'ils ne sont pas déjà en cache
+    return {
+        "vehicules": Vehicule.query.filter_by(disponible=True).limit(6),
+        "transferts_populaires": (
+            TarifForfait.query.filter_by(actif=True)
+            .order_by(TarifForfait.created_at.desc())
+            .limit(8)
+        ),
+        "google_key": current_app.config.get("GOOGLE_MAPS_KEY"),
+    }
 
 def admin_required(f):
     @wraps(f)
@@ -62,84 +143,17 @@ def admin_required(f):
         return f(*args, **kwargs)
     return wrapper
 
-# ========================
-# Envoi email via SendGrid (HTTP)
-# ========================
-def _sendgrid_request(to_email, subject, text, sender, api_key):
-    if not api_key:
-        raise Exception("SENDGRID_API_KEY manquant")
-    if not sender:
-        raise Exception("MAIL_DEFAULT_SENDER manquant")
-
-    payload = {
-        "personalizations": [{"to": [{"email": to_email}]}],
-        "from": {"email": sender},
-        "subject": subject,
-        "content": [{"type": "text/plain", "value": text}],
-    }
-
-    r = requests.post(
-        "https://api.sendgrid.com/v3/mail/send",
-        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-        json=payload,
-        timeout=10,
-    )
-    if r.status_code >= 400:
-        raise Exception(f"Erreur SendGrid {r.status_code}: {r.text}")
-
-def send_via_sendgrid_async(to_email, subject, text):
-    try:
-        if not to_email or not isinstance(to_email, str):
-            current_app.logger.error(f"❌ Email destinataire invalide: {to_email}")
-            return
-        to_email = to_email.strip()
-        if len(to_email) < 6 or "@" not in to_email or "." not in to_email.split("@")[-1]:
-            current_app.logger.error(f"❌ Format email incorrect: {to_email}")
-            return
-
-        app = current_app._get_current_object()
-        api_key = (os.getenv("SENDGRID_API_KEY") or "").strip()
-        sender = (os.getenv("MAIL_DEFAULT_SENDER") or os.getenv("MAIL_USERNAME") or "noreply@dstravel.com").strip()
-        if not api_key:
-            current_app.logger.error("❌ SENDGRID_API_KEY non configuré")
-            return
-        if not sender or "@" not in sender:
-            current_app.logger.error(f"❌ Expéditeur invalide: {sender}")
-            return
-
-        def _job():
-            with app.app_context():
-                try:
-                    _sendgrid_request(to_email, subject, text, sender, api_key)
-                    app.logger.info(f"✅ [SendGrid] Email envoyé: {to_email}")
-                except Exception as e:
-                    app.logger.error(f"❌ [SendGrid] Échec envoi {to_email}: {str(e)}")
-
-        Thread(target=_job, daemon=True).start()
-        current_app.logger.info(f"🚀 [SendGrid] Envoi asynchrone démarré: {to_email}")
-    except Exception as e:
-        current_app.logger.error(f"💥 Erreur critique send_via_sendgrid_async: {e}")
-
 # ========================
 # Routes publiques
 # ========================
 @main.route("/")
+@response_cache.page("vehicules", "tarifs")
+@lecture_seule
 def home():
-    vehicules = Vehicule.query.filter_by(disponible=True).limit(6).all()
-    transferts_populaires = (
-        TarifForfait.query.filter_by(actif=True)
-        .order_by(TarifForfait.created_at.desc())
-        .limit(8).all()
-    )
-    google_key = current_app.config.get("GOOGLE_MAPS_KEY")
-    return render_template(
-        "home.html",
-        vehicules=vehicules,
-        transferts_populaires=transferts_populaires,
-        google_key=google_key,
-    )
+    return render_template("home.html", **contexte_accueil())
 
 @main.route("/a-propos")
+@response_cache.page("pages")
 def about():
     return render_template("about.html")
 
@@ -151,6 +165,7 @@ def login():
     form = AdminLoginForm()
     if form.validate_on_submit():
         if form.username.data == "admin" and form.password.data == "admin123":
+            regenerer(session)
             session["admin_logged_in"] = True
             flash("Connexion admin réussie.", "success")
             return redirect(request.args.get("next") or url_for("main.admin_dashboard"))
@@ -179,11 +194,12 @@ def admin_dashboard():
 
         image_filename = None
         if form.photo.data:
-            filename = secure_filename(form.photo.data.filename)
-            folder = os.path.join(current_app.root_path, "static/images/vehicules")
-            os.makedirs(folder, exist_ok=True)
-            form.photo.data.save(os.path.join(folder, filename))
-            image_filename = f"images/vehicules/{filename}"
+            try:
+                image_filename = enregistrer_photo(form.photo.data)
+            except Exception as e:
+                current_app.logger.warning(f"Photo refusée ({form.photo.data.filename}) : {e}")
+                flash("Photo illisible : véhicule non ajouté.", "danger")
+                return redirect(url_for("main.admin_dashboard"))
 
         v = Vehicule(
             immatriculation=form.immatriculation.data,
@@ -203,6 +219,9 @@ def admin_dashboard():
         )
         db.session.add(v)
         db.session.commit()
+        availability_index.invalidate()
+        fleet_index.invalidate()
+        response_cache.invalidate("vehicules")
         flash("Véhicule ajouté avec succès !", "success")
         return redirect(url_for("main.admin_dashboard"))
 
@@ -224,13 +243,18 @@ def modifier_vehicule(id):
 
     img = request.files.get("photo")
     if img and img.filename:
-        filename = secure_filename(img.filename)
-        folder = os.path.join(current_app.root_path, "static/images/vehicules")
-        os.makedirs(folder, exist_ok=True)
-        img.save(os.path.join(folder, filename))
-        v.image = f"images/vehicules/{filename}"
+        try:
+            v.image = enregistrer_photo(img)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Photo refusée ({img.filename}) : {e}")
+            flash("Photo illisible : véhicule non modifié.", "danger")
+            return redirect(url_for("main.admin_dashboard"))
 
     db.session.commit()
+    availability_index.invalidate()
+    fleet_index.invalidate()
+    response_cache.invalidate("vehicules")
     flash("Véhicule modifié avec succès.", "success")
     return redirect(url_for("main.admin_dashboard"))
 
@@ -240,26 +264,55 @@ def supprimer_vehicule():
     v = Vehicule.query.get_or_404(request.args.get("id"))
     db.session.delete(v)
     db.session.commit()
+    availability_index.invalidate()
+    fleet_index.invalidate()
+    response_cache.invalidate("vehicules")
     flash("Véhicule supprimé avec succès.", "success")
     return redirect(url_for("main.admin_dashboard"))
 
 # ========================
 # Réservations – Workflow client
 # ========================
+def _recherche_vehicules(args):
+    """
+    Critères de recherche (?date=&heure=&passagers=&valises=&sieges_bebe=)
+    -> (recherche, créneau ou None, véhicules adaptés classés).
+    Sans date : véhicules en service adaptés au groupe ; avec date : ceux
+    qui sont en plus libres sur ce créneau.
+    """
+    recherche = {
+        "date": args.get("date", ""),
+        "heure": args.get("heure", ""),
+        "passagers": max(to_int(args.get("passagers"), default=1), 1),
+        "valises": max(to_int(args.get("valises"), default=0), 0),
+        "sieges_bebe": max(to_int(args.get("sieges_bebe"), default=0), 0),
+    }
+    besoin = Besoin(passagers=recherche["passagers"], valises_23kg=recherche["valises"],
+                    sieges_bebe=recherche["sieges_bebe"])
+    debut = None
+    if recherche["date"]:
+        debut = parse_datetime_local(f"{recherche['date']}T{recherche['heure'] or '00:00'}")
+    if debut is None:
+        ids = fleet_index.match(besoin)
+    else:
+        ids = availability_index.available_vehicles(debut, besoin=besoin)
+    par_id = {v.id: v for v in Vehicule.query.filter(Vehicule.id.in_(ids))} if ids else {}
+    return recherche, debut, [par_id[i] for i in ids if i in par_id]
+
 @main.route("/vehicules-disponibles")
+@response_cache.page("vehicules", "reservations")
+@lecture_seule
 def vehicules_disponibles():
-    vehicules = Vehicule.query.filter_by(disponible=True).all()
-    return render_template("vehicules_disponibles.html", vehicules=vehicules)
+    recherche, debut, vehicules = _recherche_vehicules(request.args)
+    return render_template("vehicules_disponibles.html", vehicules=vehicules,
+                           recherche=recherche, creneau=debut)
 
 # ✅ vehicule_id devient optionnel pour supporter :
-# - /reservation            (formulaire rapide sans véhicule)
+# - /reservation            (recherche rapide : véhicules adaptés au groupe)
 # - /reservation/<id>       (réservation d’un véhicule précis)
 @main.route("/reservation", methods=["GET", "POST"])
 @main.route("/reservation/<int:vehicule_id>", methods=["GET", "POST"])
 def reservation_page(vehicule_id=None):
-    vehicule = Vehicule.query.get_or_404(vehicule_id) if vehicule_id is not None else None
-    google_key = current_app.config.get("GOOGLE_MAPS_KEY")
-
     # Données éventuelles provenant de la barre de réservation rapide (GET)
     quick = {
         "depart": request.args.get("depart"),
@@ -269,7 +322,23 @@ def reservation_page(vehicule_id=None):
         "passagers": request.args.get("passagers"),
     }
 
+    if vehicule_id is None:
+        recherche, debut, vehicules = _recherche_vehicules(request.args)
+        suite = {k: v for k, v in request.args.items() if k in ("depart", "arrivee", "date", "heure", "passagers")}
+        return render_template("vehicules_disponibles.html", vehicules=vehicules,
+                               recherche=recherche, creneau=debut, suite=suite)
+
+    vehicule = Vehicule.query.get_or_404(vehicule_id)
+    google_key = current_app.config.get("GOOGLE_MAPS_KEY")
+
     form = ReservationForm()
+    if request.method == "GET":
+        # Pré-remplissage depuis la recherche rapide
+        form.adresse_depart.data = form.adresse_depart.data or quick["depart"]
+        form.adresse_arrivee.data = form.adresse_arrivee.data or quick["arrivee"]
+        form.nb_passagers.data = form.nb_passagers.data or to_int(quick["passagers"])
+        if quick["date_"]:
+            form.date_heure.data = parse_datetime_local(f"{quick['date_']}T{quick['heure'] or '00:00'}")
     return render_template("reservation.html", vehicule=vehicule, form=form,
                            google_key=google_key, **quick)
 
@@ -292,11 +361,13 @@ def reservation_recap(vehicule_id):
     if not data["adresse_depart"] or not data["adresse_arrivee"]:
         flash("Merci de remplir les adresses de départ et d'arrivée.", "danger")
         return redirect(url_for("main.reservation_page", vehicule_id=vehicule_id))
+    refus = fleet_index.refus(vehicule_id, besoin_depuis(data), vehicule=v)
+    if refus:
+        flash(refus, "danger")
+        return redirect(url_for("main.reservation_page", vehicule_id=vehicule_id))
 
     # Sauvegarde brouillon en session
-    drafts = session.get("reservation_drafts", {})
-    drafts[str(vehicule_id)] = data
-    session["reservation_drafts"] = drafts
+    garder_brouillon(vehicule_id, data)
 
     return render_template("fiche_vehicule.html", vehicule=v, data=data, form=form)
 
@@ -323,88 +394,73 @@ def reserver_vehicule(vehicule_id):
         flash("Format de date/heure invalide.", "danger")
         return redirect(url_for("main.reservation_page", vehicule_id=vehicule_id))
 
+    # Capacités lues dans l'index de la flotte (pas de requête supplémentaire)
+    refus = fleet_index.refus(vehicule_id, besoin_depuis(data), vehicule=v)
+    if refus:
+        flash(refus, "danger")
+        return redirect(url_for("main.reservation_page", vehicule_id=vehicule_id))
+
     nb_passagers   = to_int(data.get("nb_passagers"), default=1)
     nb_v23         = to_int(data.get("nb_valises_23kg"), default=0)
     nb_v10         = to_int(data.get("nb_valises_10kg"), default=0)
     nb_sieges_bebe = to_int(data.get("nb_sieges_bebe"), default=0)
     poids_enfants  = (data.get("poids_enfants") or "").strip() or None
 
+    adresse_depart = (data.get("adresse_depart") or "").strip()
+    adresse_arrivee = (data.get("adresse_arrivee") or "").strip()
+    trajet = Trajet(adresse_depart=adresse_depart, adresse_arrivee=adresse_arrivee)
     try:
-        r = Reservation(
-            vehicule_id=vehicule_id,
-            client_nom=(data.get("client_nom") or "").strip(),
-            client_email=client_email,
-            client_telephone=(data.get("client_telephone") or "").strip(),
-            date_heure=dt,
-            vol_info=(data.get("vol_info") or "").strip(),
-            adresse_depart=(data.get("adresse_depart") or "").strip(),
-            adresse_arrivee=(data.get("adresse_arrivee") or "").strip(),
-            nb_passagers=nb_passagers,
-            nb_valises_23kg=nb_v23,
-            nb_valises_10kg=nb_v10,
-            nb_sieges_bebe=nb_sieges_bebe,
-            poids_enfants=poids_enfants,
-            paiement=(data.get("paiement") or "").strip(),
-            commentaires=(data.get("commentaires") or "").strip(),
-            statut="En attente",
-        )
+        distance_km, temps_min = get_distance_and_time(adresse_depart, adresse_arrivee)
+        trajet.distance_km = round(distance_km, 1)
+        trajet.duree_estimee_min = round(temps_min)
+    except Exception as e:
+        current_app.logger.warning(f"Distance non estimée ({adresse_depart} -> {adresse_arrivee}) : {e}")
+
+    debut, fin = dt, fin_creneau(dt, trajet.duree_estimee_min)
+
+    r = Reservation(
+        vehicule_id=vehicule_id,
+        client_nom=(data.get("client_nom") or "").strip(),
+        client_email=client_email,
+        client_telephone=(data.get("client_telephone") or "").strip(),
+        date_heure=dt,
+        vol_info=(data.get("vol_info") or "").strip(),
+        adresse_depart=adresse_depart,
+        adresse_arrivee=adresse_arrivee,
+        nb_passagers=nb_passagers,
+        nb_valises_23kg=nb_v23,
+        nb_valises_10kg=nb_v10,
+        nb_sieges_bebe=nb_sieges_bebe,
+        poids_enfants=poids_enfants,
+        paiement=(data.get("paiement") or "").strip(),
+        commentaires=(data.get("commentaires") or "").strip(),
+        statut="En attente",
+        trajet=trajet,
+    )
+
+    try:
+        # Véhicule verrouillé jusqu'au commit : pas de double réservation
+        verrouiller_creneau(vehicule_id, debut, fin)
+        r.prix_estime = analytics.estimer_prix(r, v)
         db.session.add(r)
+        analytics.transition(r, None, r.statut)
+        # Emails mis en file dans la même transaction que la réservation
+        enqueue_reservation_emails(r)
         db.session.commit()
+        availability_index.invalidate()
+        response_cache.invalidate("reservations")
         current_app.logger.info(f"✅ Réservation créée: ID {r.id}, Email: {r.client_email}")
+    except CreneauIndisponible as e:
+        db.session.rollback()
+        current_app.logger.info(f"Créneau refusé pour le véhicule {vehicule_id} : {e}")
+        flash("Ce véhicule est déjà réservé sur ce créneau. Choisissez un autre horaire ou un autre véhicule.", "warning")
+        return redirect(url_for("main.reservation_page", vehicule_id=vehicule_id))
     except Exception as e:
+        db.session.rollback()
         current_app.logger.exception(f"Erreur DB réservation: {e}")
         flash("Une erreur est survenue lors de l'enregistrement. Réessayez.", "danger")
         return redirect(url_for("main.reservation_page", vehicule_id=vehicule_id))
 
-    admin_email = current_app.config.get("ADMIN_EMAIL") or os.getenv("ADMIN_EMAIL")
-    if admin_email and "@" in admin_email:
-        try:
-            body_admin = f"""
-Nouvelle réservation pour le véhicule {v.marque} {v.modele}
-
-Nom : {r.client_nom}
-Email : {r.client_email}
-Téléphone : {r.client_telephone}
-Départ : {r.adresse_depart}
-Arrivée : {r.adresse_arrivee}
-Date & Heure : {r.date_heure.strftime('%Y-%m-%d %H:%M')}
-Numéro de vol/train : {r.vol_info or '-'}
-Nombre de passagers : {r.nb_passagers}
-Valises 23 kg : {r.nb_valises_23kg or 0}
-Valises 10 kg : {r.nb_valises_10kg or 0}
-Sièges bébé : {r.nb_sieges_bebe or 0}
-Poids enfants : {r.poids_enfants or '-'}
-Paiement : {r.paiement}
-Commentaires : {r.commentaires or '-'}
-"""
-            send_via_sendgrid_async(admin_email, "Nouvelle réservation - DS Travel", body_admin)
-        except Exception as e:
-            current_app.logger.error(f"Erreur email admin (SendGrid) : {e}")
-            flash("Réservation enregistrée mais l'e-mail admin n'a pas pu partir.", "warning")
-    else:
-        current_app.logger.warning("ADMIN_EMAIL non configuré - pas d'email admin envoyé")
-
-    if r.client_email and "@" in r.client_email:
-        try:
-            body_client = f"""
-Bonjour {r.client_nom},
-
-Nous confirmons la réception de votre réservation pour le véhicule {v.marque} {v.modele}.
-
-Départ : {r.adresse_depart}
-Arrivée : {r.adresse_arrivee}
-Date & Heure : {r.date_heure.strftime('%Y-%m-%d %H:%M')}
-
-Merci d'avoir choisi DS Travel.
-Nous vous recontacterons pour confirmer votre réservation.
-"""
-            send_via_sendgrid_async(r.client_email, "Confirmation de votre réservation - DS Travel", body_client)
-        except Exception as e:
-            current_app.logger.error(f"Erreur email client (SendGrid) : {e}")
-            flash("Réservation enregistrée mais l'e-mail de confirmation n'a pas pu partir.", "warning")
-    else:
-        current_app.logger.warning(f"Email client invalide: {r.client_email} - pas d'email de confirmation")
-
     flash("Réservation enregistrée, nous vous contacterons.", "success")
     return redirect(url_for("main.confirmation_reservation", reservation_id=r.id))
 
@@ -422,19 +478,120 @@ def confirmation_reservation(reservation_id):
 # ========================
 # Administration des réservations
 # ========================
+def filtres_reservations(args):
+    """Filtres de la liste admin (et de l'export) depuis la query string."""
+    return {
+        "statut": (args.get("statut") or "").strip() or None,
+        "du": (args.get("du") or "").strip() or None,
+        "au": (args.get("au") or "").strip() or None,
+        "vehicule_id": to_int(args.get("vehicule_id")),
+    }
+
+def filtrer_reservations(q, filtres):
+    if filtres["statut"]:
+        q = q.filter(Reservation.statut == filtres["statut"])
+    if filtres["vehicule_id"]:
+        q = q.filter(Reservation.vehicule_id == filtres["vehicule_id"])
+    du = parse_date(filtres["du"])
+    if du:
+        q = q.filter(Reservation.date_heure >= du)
+    au = parse_date(filtres["au"])
+    if au:
+        q = q.filter(Reservation.date_heure < au + timedelta(days=1))
+    return q
+
 @main.route("/admin/reservations")
 @admin_required
+@lecture_seule
 def reservations_admin():
-    r = Reservation.query.order_by(Reservation.date_heure.desc()).all()
-    return render_template("admin_reservations.html", reservations=r)
+    """
+    Liste paginée par curseur sur (date_heure, id) décroissants : chaque page
+    coûte une requête indexée, quelle que soit la profondeur de l'historique.
+    """
+    par_page = current_app.config.get("RESERVATIONS_PAR_PAGE", 50)
+    filtres = filtres_reservations(request.args)
+
+    q = filtrer_reservations(
+        Reservation.query
+        .join(Reservation.vehicule)
+        .options(contains_eager(Reservation.vehicule)),
+        filtres,
+    )
+
+    apres = decode_curseur(request.args.get("apres"))
+    avant = decode_curseur(request.args.get("avant"))
+    if avant:
+        # Page précédente : on remonte dans l'ordre croissant puis on inverse
+        dt, rid = avant
+        q = q.filter(or_(Reservation.date_heure > dt,
+                         and_(Reservation.date_heure == dt, Reservation.id > rid)))
+        rows = q.order_by(Reservation.date_heure.asc(), Reservation.id.asc()).limit(par_page + 1).all()
+        plus_recentes = len(rows) > par_page
+        rows = list(reversed(rows[:par_page]))
+        plus_anciennes = True
+    else:
+        if apres:
+            dt, rid = apres
+            q = q.filter(or_(Reservation.date_heure < dt,
+                             and_(Reservation.date_heure == dt, Reservation.id < rid)))
+        rows = q.order_by(Reservation.date_heure.desc(), Reservation.id.desc()).limit(par_page + 1).all()
+        plus_anciennes = len(rows) > par_page
+        rows = rows[:par_page]
+        plus_recentes = apres is not None
+
+    params = {k: v for k, v in filtres.items() if v}
+    page_suivante = page_precedente = None
+    if rows and plus_anciennes:
+        page_suivante = url_for("main.reservations_admin", apres=encode_curseur(rows[-1]), **params)
+    if rows and plus_recentes:
+        page_precedente = url_for("main.reservations_admin", avant=encode_curseur(rows[0]), **params)
+
+    vehicules = (
+        db.session.query(Vehicule.id, Vehicule.marque, Vehicule.modele)
+        .order_by(Vehicule.marque, Vehicule.modele).all()
+    )
+    return render_template(
+        "admin_reservations.html",
+        reservations=rows,
+        filtres=filtres,
+        statuts=STATUTS_RESERVATION,
+        vehicules=vehicules,
+        page_suivante=page_suivante,
+        page_precedente=page_precedente,
+    )
+
+@main.route("/admin/reservations/export")
+@admin_required
+def export_reservations():
+    """
+    Export comptable en flux (?format=csv|ndjson + filtres de la liste) :
+    lecture par paquets et envoi au fil de l'eau, mémoire constante.
+    """
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in export.FORMATS:
+        abort(400, description=f"Format inconnu : {fmt} (csv ou ndjson)")
+    filtres = filtres_reservations(request.args)
+    q = filtrer_reservations(export.requete_export(), filtres)
+    rows = export.lignes(q.order_by(Reservation.date_heure.asc(), Reservation.id.asc()))
+
+    mimetype, ext = export.FORMATS[fmt]
+    nom = f"reservations_{datetime.now():%Y%m%d_%H%M}.{ext}"
+    resp = Response(stream_with_context(export.FLUX[fmt](rows)), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{nom}"'
+    resp.headers["Cache-Control"] = "no-store"
+    # Pas de mise en tampon par un proxy nginx : le client reçoit au fil de l'eau
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
 
 @main.route("/admin/reservation/valider/<int:id>")
 @admin_required
 def valider_reservation(id):
     r = Reservation.query.get_or_404(id)
+    analytics.transition(r, r.statut, "Confirmée")
     r.statut = "Confirmée"
-    r.vehicule.disponible = False
     db.session.commit()
+    availability_index.invalidate()
+    response_cache.invalidate("reservations")
     flash("Réservation confirmée.", "success")
     return redirect(url_for("main.reservations_admin"))
 
@@ -442,9 +599,11 @@ def valider_reservation(id):
 @admin_required
 def annuler_reservation(id):
     r = Reservation.query.get_or_404(id)
+    analytics.transition(r, r.statut, "Annulée")
     r.statut = "Annulée"
-    r.vehicule.disponible = True
     db.session.commit()
+    availability_index.invalidate()
+    response_cache.invalidate("reservations")
     flash("Réservation annulée.", "warning")
     return redirect(url_for("main.reservations_admin"))
 
@@ -458,8 +617,11 @@ def edit_reservation(id):
 @admin_required
 def terminer_reservation(id):
     r = Reservation.query.get_or_404(id)
+    analytics.transition(r, r.statut, "Terminée")
     r.statut = "Terminée"
     db.session.commit()
+    availability_index.invalidate()
+    response_cache.invalidate("reservations")
     flash("Réservation terminée.", "success")
     return redirect(url_for("main.reservations_admin"))
 
@@ -467,11 +629,68 @@ def terminer_reservation(id):
 @admin_required
 def delete_reservation(id):
     r = Reservation.query.get_or_404(id)
+    analytics.transition(r, r.statut, None)
     db.session.delete(r)
     db.session.commit()
+    availability_index.invalidate()
+    response_cache.invalidate("reservations")
     flash("Réservation supprimée.", "success")
     return redirect(url_for("main.reservations_admin"))
 
+# ========================
+# Statistiques
+# ========================
+@main.route("/admin/statistiques")
+@admin_required
+def statistiques_admin():
+    """Tableau de bord lu dans les agrégats de app.analytics (?du=&au=)."""
+    du, au = analytics.periode_defaut()
+    du = (parse_date(request.args.get("du")) or datetime.combine(du, datetime.min.time())).date()
+    au = (parse_date(request.args.get("au")) or datetime.combine(au, datetime.min.time())).date()
+    if au < du:
+        du, au = au, du
+    # Au plus un an par écran
+    du = max(du, au - timedelta(days=365))
+    return render_template(
+        "admin_statistiques.html",
+        stats=analytics.tableau_de_bord(du, au),
+        du=du,
+        au=au,
+        statuts=STATUTS_RESERVATION,
+    )
+
+# ========================
+# Dispatch du jour
+# ========================
+@main.route("/admin/dispatch")
+@admin_required
+@lecture_seule
+def dispatch_admin():
+    """Plan actuel et plan optimisé des réservations d'une journée (?jour=)."""
+    jour = (parse_date(request.args.get("jour")) or datetime.now()).date()
+    d = dispatch.plan_du_jour(jour)
+    ids = set(d.actuel.tournees) | set(d.optimise.tournees)
+    vehicules = {v.id: v for v in Vehicule.query.filter(Vehicule.id.in_(ids))} if ids else {}
+    return render_template("admin_dispatch.html", d=d, jour=jour, vehicules=vehicules)
+
+@main.route("/admin/dispatch/appliquer", methods=["POST"])
+@admin_required
+def appliquer_dispatch():
+    jour = (parse_date(request.form.get("jour")) or datetime.now()).date()
+    try:
+        d = dispatch.appliquer(jour)
+    except CreneauIndisponible as e:
+        current_app.logger.info(f"Dispatch du {jour} refusé : {e}")
+        flash("Le planning a changé entre-temps : plan non appliqué, vérifiez-le à nouveau.", "danger")
+    except dispatch.PlanRefuse as e:
+        flash(f"Plan non appliqué : {e}.", "warning")
+    else:
+        if d.changements:
+            flash(f"{len(d.changements)} réservation(s) réaffectée(s).", "success")
+        else:
+            flash("Le planning est déjà optimal.", "info")
+    return redirect(url_for("main.dispatch_admin", jour=jour.isoformat()))
+
 # ========================
 # Tarifs (Forfaits et Règles)
 # ========================
@@ -480,15 +699,39 @@ def delete_reservation(id):
 def tarifs_admin():
     form_forfait = AddTarifForfaitForm()
     form_regle = AddTarifRegleForm()
+    form_zone = AddZoneTarifForm()
+
+    if request.form.get("form_name") == "zone" and form_zone.validate_on_submit():
+        nom = form_zone.nom.data.strip()
+        lat, lon = form_zone.latitude.data, form_zone.longitude.data
+        if lat is None or lon is None:
+            # Centre par défaut : le lieu dans le gazetteer local
+            lieu = geocoder(nom)
+            lat, lon = (lieu[1], lieu[2]) if lieu else (None, None)
+        canonique = normaliser_adresse(nom)
+        if lat is None:
+            flash("Lieu inconnu du gazetteer : indiquez latitude et longitude.", "warning")
+        elif any(normaliser_adresse(z.nom) == canonique for z in ZoneTarif.query.all()):
+            flash("Une zone existe déjà pour ce lieu.", "warning")
+        else:
+            db.session.add(ZoneTarif(nom=nom, latitude=lat, longitude=lon, rayon_km=form_zone.rayon_km.data))
+            db.session.commit()
+            fare_index.rebuild()
+            response_cache.invalidate("tarifs")
+            flash("Zone ajoutée.", "success")
+        return redirect(url_for("main.tarifs_admin"))
 
     if form_forfait.validate_on_submit() and request.form.get("form_name") == "forfait":
         depart, arrivee = form_forfait.depart.data.strip(), form_forfait.arrivee.data.strip()
+        categorie_id = _categorie_id_depuis_nom(form_forfait.type_vehicule.data)
         doublon = TarifForfait.query.filter(
+            TarifForfait.categorie_id.is_(None) if categorie_id is None
+            else TarifForfait.categorie_id == categorie_id,
             or_(
                 and_(TarifForfait.depart == depart, TarifForfait.arrivee == arrivee),
                 and_(TarifForfait.bidirectionnel.is_(True),
                      TarifForfait.depart == arrivee, TarifForfait.arrivee == depart),
-            )
+            ),
         ).first()
         if doublon:
             flash("Un forfait identique existe déjà.", "warning")
@@ -496,6 +739,7 @@ def tarifs_admin():
             tf = TarifForfait(
                 depart=depart,
                 arrivee=arrivee,
+                categorie_id=categorie_id,
                 prix_cfa=form_forfait.prix_cfa.data,
                 distance_km=form_forfait.distance_km.data,
                 bidirectionnel=form_forfait.bidirectionnel.data,
@@ -503,11 +747,15 @@ def tarifs_admin():
             )
             db.session.add(tf)
             db.session.commit()
+            fare_index.rebuild()
+            places_index.invalidate()
+            response_cache.invalidate("tarifs")
             flash("Tarif forfaitaire ajouté.", "success")
         return redirect(url_for("main.tarifs_admin"))
 
     if form_regle.validate_on_submit() and request.form.get("form_name") == "regle":
         tr = TarifRegle(
+            categorie_id=_categorie_id_depuis_nom(form_regle.type_vehicule.data),
             base=form_regle.base.data,
             prix_km=form_regle.prix_km.data,
             minimum=form_regle.minimum.data or 0,
@@ -517,25 +765,69 @@ def tarifs_admin():
         )
         db.session.add(tr)
         db.session.commit()
+        fare_index.rebuild()
+        response_cache.invalidate("tarifs")
         flash("Règle kilométrique ajoutée.", "success")
         return redirect(url_for("main.tarifs_admin"))
 
     forfaits = TarifForfait.query.order_by(TarifForfait.created_at.desc()).all()
     regles = TarifRegle.query.order_by(TarifRegle.created_at.desc()).all()
+    zones = ZoneTarif.query.order_by(ZoneTarif.nom).all()
     return render_template(
         "admin_tarifs.html",
         form_forfait=form_forfait,
         form_regle=form_regle,
+        form_zone=form_zone,
         forfaits=forfaits,
         regles=regles,
+        zones=zones,
     )
 
+@main.route("/admin/import/<type_>", methods=["GET", "POST"])
+@admin_required
+def import_csv(type_):
+    """Import en masse (véhicules ou forfaits) avec rapport par ligne."""
+    if type_ not in importation.IMPORTEURS:
+        abort(404)
+    form = ImportCSVForm()
+    rapport = None
+    if form.validate_on_submit():
+        rapport = importation.importer(
+            type_,
+            importation.ouvrir(form.fichier.data),
+            lot=current_app.config.get("IMPORT_LOT", importation.LOT_DEFAUT),
+            simulation=form.simulation.data,
+        )
+        flash(rapport.resume(), "warning" if rapport.refusees else "success")
+    return render_template(
+        "admin_import.html",
+        form=form,
+        type_=type_,
+        colonnes=importation.COLONNES[type_],
+        rapport=rapport,
+    )
+
+def _categorie_id_depuis_nom(nom):
+    """Catégorie de véhicule (créée au besoin) pour le champ libre type_vehicule."""
+    nom = (nom or "").strip()
+    if not nom:
+        return None
+    c = CategorieVehicule.query.filter(func.lower(CategorieVehicule.nom) == nom.lower()).first()
+    if not c:
+        c = CategorieVehicule(nom=nom)
+        db.session.add(c)
+        db.session.flush()
+    return c.id
+
 @main.route("/admin/tarifs/forfait/delete/<int:id>")
 @admin_required
 def delete_tarif_forfait(id):
     t = TarifForfait.query.get_or_404(id)
     db.session.delete(t)
     db.session.commit()
+    fare_index.rebuild()
+    places_index.invalidate()
+    response_cache.invalidate("tarifs")
     flash("Forfait supprimé.", "success")
     return redirect(url_for("main.tarifs_admin"))
 
@@ -545,15 +837,31 @@ def delete_tarif_regle(id):
     t = TarifRegle.query.get_or_404(id)
     db.session.delete(t)
     db.session.commit()
+    fare_index.rebuild()
+    response_cache.invalidate("tarifs")
     flash("Règle supprimée.", "success")
     return redirect(url_for("main.tarifs_admin"))
 
+@main.route("/admin/tarifs/zone/delete/<int:id>")
+@admin_required
+def delete_zone_tarif(id):
+    z = ZoneTarif.query.get_or_404(id)
+    db.session.delete(z)
+    db.session.commit()
+    fare_index.rebuild()
+    response_cache.invalidate("tarifs")
+    flash("Zone supprimée.", "success")
+    return redirect(url_for("main.tarifs_admin"))
+
 @main.route("/admin/tarifs/forfait/toggle/<int:id>")
 @admin_required
 def toggle_tarif_forfait(id):
     t = TarifForfait.query.get_or_404(id)
     t.actif = not t.actif
     db.session.commit()
+    fare_index.rebuild()
+    places_index.invalidate()
+    response_cache.invalidate("tarifs")
     flash("Statut du forfait modifié.", "info")
     return redirect(url_for("main.tarifs_admin"))
 
@@ -563,6 +871,8 @@ def toggle_tarif_regle(id):
     t = TarifRegle.query.get_or_404(id)
     t.actif = not t.actif
     db.session.commit()
+    fare_index.rebuild()
+    response_cache.invalidate("tarifs")
     flash("Statut de la règle modifié.", "info")
     return redirect(url_for("main.tarifs_admin"))
 
@@ -577,59 +887,33 @@ def estimation_trajet():
         flash("Veuillez saisir un départ et une arrivée.", "danger")
         return redirect(url_for("main.home"))
 
-    forfait = TarifForfait.query.filter(
-        and_(
-            TarifForfait.actif.is_(True),
-            or_(
-                and_(TarifForfait.depart == depart, TarifForfait.arrivee == arrivee),
-                and_(TarifForfait.bidirectionnel.is_(True),
-                     TarifForfait.depart == arrivee, TarifForfait.arrivee == depart),
-            ),
-        )
-    ).first()
+    date_heure = parse_datetime_local(request.form.get("date_heure")) or datetime.now()
+    categorie = request.form.get("categorie_id") or request.form.get("categorie")
+    try:
+        q = coter(depart, arrivee, date_heure, categorie)
+    except PricingError:
+        flash("Aucun tarif disponible.", "warning")
+        return redirect(url_for("main.home"))
+    except Exception as e:
+        flash(f"Erreur calcul distance : {e}", "danger")
+        return redirect(url_for("main.home"))
+    distance_km, temps_min = _distance_affichee(q)
 
-    if forfait:
-        distance_km = forfait.distance_km
-        temps_min = distance_km * 1.2
-        tarif = f"{forfait.prix_cfa:,.0f} F CFA"
-    else:
-        # NOTE: get_distance_and_time doit exister dans ton projet
-        regle = TarifRegle.query.filter_by(actif=True).first()
-        if not regle:
-            flash("Aucun tarif disponible.", "warning")
-            return redirect(url_for("main.home"))
-        try:
-            distance_km, temps_min = get_distance_and_time(depart, arrivee)  # noqa
-        except Exception as e:
-            flash(f"Erreur calcul distance : {e}", "danger")
-            return redirect(url_for("main.home"))
-        prix = regle.base + regle.prix_km * distance_km
-        if prix < regle.minimum:
-            prix = regle.minimum
-        now = datetime.now()
-        if now.hour >= 22 or now.hour < 6:
-            prix *= regle.coeff_nuit
-        if now.weekday() >= 5:
-            prix *= regle.coeff_weekend
-        distance_km = round(distance_km)
-        temps_min = round(temps_min)
-        tarif = f"{prix:,.0f} F CFA"
-
-    vehicules = Vehicule.query.filter_by(disponible=True).limit(3).all()
     return render_template(
         "home.html",
-        vehicules=vehicules,
+        **contexte_accueil(),
         depart=depart,
         arrivee=arrivee,
         distance_km=distance_km,
         temps_min=temps_min,
-        tarif=tarif,
+        tarif=f"{q.prix:,.0f} F CFA",
     )
 
 # ========================
 # Calcul AJAX (JSON)
 # ========================
 @main.route("/calculer_tarif", methods=["POST"])
+@lecture_seule
 def calculer_tarif():
     data = request.get_json() or {}
     depart = data.get("depart", "").strip()
@@ -637,46 +921,28 @@ def calculer_tarif():
     if not depart or not arrivee:
         return jsonify({"error": "Veuillez indiquer les adresses"}), 400
 
-    forfait = TarifForfait.query.filter(
-        and_(
-            TarifForfait.actif.is_(True),
-            or_(
-                and_(TarifForfait.depart == depart, TarifForfait.arrivee == arrivee),
-                and_(TarifForfait.bidirectionnel.is_(True),
-                     TarifForfait.depart == arrivee, TarifForfait.arrivee == depart),
-            ),
-        )
-    ).first()
-
-    if forfait:
-        distance_km = forfait.distance_km
-        temps_min = round(distance_km * 1.2)
-        prix = forfait.prix_cfa
-    else:
-        regle = TarifRegle.query.filter_by(actif=True).first()
-        if not regle:
-            return jsonify({"error": "Aucun tarif disponible"}), 400
-        try:
-            distance_km, temps_min = get_distance_and_time(depart, arrivee)  # noqa
-        except Exception as e:
-            return jsonify({"error": f"Erreur distance : {e}"}), 500
-        prix = regle.base + regle.prix_km * distance_km
-        if prix < regle.minimum:
-            prix = regle.minimum
-        now = datetime.now()
-        if now.hour >= 22 or now.hour < 6:
-            prix *= regle.coeff_nuit
-        if now.weekday() >= 5:
-            prix *= regle.coeff_weekend
-        distance_km = round(distance_km)
-        temps_min = round(temps_min)
+    date_heure = parse_datetime_local(data.get("date_heure")) or datetime.now()
+    categorie = data.get("categorie_id") or data.get("categorie")
+    try:
+        q = coter(depart, arrivee, date_heure, categorie)
+    except PricingError:
+        return jsonify({"error": "Aucun tarif disponible"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Erreur distance : {e}"}), 500
+    distance_km, temps_min = _distance_affichee(q)
 
     return jsonify({
         "distance_km": distance_km,
         "temps_min": temps_min,
-        "tarif": f"{prix:,.0f} F CFA",
+        "tarif": f"{q.prix:,.0f} F CFA",
     })
 
+def _distance_affichee(q):
+    """Distance/durée arrondies telles qu'affichées au client."""
+    distance_km = round(q.distance_km) if q.distance_km is not None else None
+    temps_min = round(q.temps_min) if q.temps_min is not None else None
+    return distance_km, temps_min
+
 # ========================
 # Debug
 # ========================
@@ -691,12 +957,13 @@ def debug_routes():
 @main.route("/debug/sendgrid")
 def debug_sendgrid():
     try:
-        send_via_sendgrid_async(
+        enqueue_email(
             os.getenv("ADMIN_EMAIL"),
             "Test SendGrid DS Travel",
             "Ceci est un test d'envoi via SendGrid."
         )
-        return "✅ Email (SendGrid) déclenché", 200
+        db.session.commit()
+        return "✅ Email (SendGrid) mis en file", 200
     except Exception as e:
         current_app.logger.exception("Echec test SendGrid")
         return f"❌ Erreur SendGrid : {e}", 500
@@ -748,29 +1015,13 @@ def contact_post():
         sujet = form.sujet.data.strip()
         message = form.message.data.strip()
         try:
-            corps_admin = f"""📩 Nouveau message SD Travel
-
-Nom : {nom}
-Email : {email}
-Sujet : {sujet}
-
-Message :
-{message}
-"""
-            send_via_sendgrid_async(os.getenv("ADMIN_EMAIL"), f"Message du formulaire – {nom}", corps_admin)
-
-            corps_client = f"""Bonjour {nom},
-
-Nous avons bien reçu votre message :
-{sujet}
-{message}
-
-Merci de nous avoir contactés.
-— Équipe SD Travel
-"""
-            send_via_sendgrid_async(email, "Confirmation – SD Travel", corps_client)
+            enqueue_template("contact_admin", current_app.config.get("ADMIN_EMAIL"),
+                             nom=nom, email=email, sujet=sujet, message=message)
+            enqueue_template("contact_confirmation", email, nom=nom, sujet=sujet, message=message)
+            db.session.commit()
             flash(" Message envoyé avec succès. Nous vous répondrons sous peu.", "success")
         except Exception as e:
+            db.session.rollback()
             current_app.logger.error(f"Erreur envoi contact : {e}")
             flash(" Erreur lors de l’envoi. Veuillez réessayer.", "danger")
         return redirect(url_for("main.contact_post"))
@@ -781,6 +1032,7 @@ Merci de nous avoir contactés.
 def contact_page():
     return contact_post()
 @main.route("/cgv")
+@response_cache.page("pages")
 def cgv():
     """Page des Conditions Générales de Vente"""
     return render_template("cgv.html", current_year=datetime.now().year)
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+Schéma de la base : migrations (Flask-Migrate / Alembic, dossier migrations/)
+et vérification des index des requêtes fréquentes.
+
+Mise à jour du schéma, étape du déploiement (plus faite au démarrage des
+workers, voir run.py) :
+    flask schema upgrade        (ou python init_db.py ; reprend aussi une
+                                 base créée avant les migrations)
+Nouvelle migration après modification de app/models/models.py :
+    flask db migrate -m "..."   puis relire le fichier généré
+
+Vérification des index :
+    flask indexes check
+Chaque requête de requetes_chaudes() (mêmes filtres / tris que les routes)
+est passée à EXPLAIN ; la commande affiche l'index retenu par le moteur et
+échoue (code 1) si une table est lue en entier. Sous Postgres les parcours
+séquentiels sont désactivés le temps de l'EXPLAIN (enable_seqscan = off) :
+sur une petite base le planificateur les préfère toujours, on vérifie donc
+qu'un index *utilisable* existe. Sous SQLite on lit EXPLAIN QUERY PLAN
+(« SCAN table » sans « USING INDEX » = lecture complète).
+"""
+import re
+import sys
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from flask_migrate import stamp, upgrade
+from sqlalchemy import and_, inspect, or_, select
+
+from app import db
+from app.models.models import EmailOutbox, Reservation, TarifForfait, Trajet, Vehicule
+
+# Révision correspondant aux tables créées par db.create_all()
+REVISION_INITIALE = "0001"
+
+
+def mettre_a_jour_schema():
+    """
+    Applique les migrations. Une base créée avant les migrations (tables
+    présentes, pas de table alembic_version) est d'abord complétée par
+    create_all puis marquée à la révision initiale.
+    """
+    tables = set(inspect(db.engine).get_table_names())
+    if tables and "alembic_version" not in tables:
+        db.create_all()
+        stamp(revision=REVISION_INITIALE)
+    upgrade()
+
+
+schema_cli = AppGroup("schema", help="Schéma de la base.")
+
+
+@schema_cli.command("upgrade")
+def upgrade_command():
+    """Applique les migrations (base antérieure aux migrations comprise)."""
+    mettre_a_jour_schema()
+    click.echo(f"✅ Tables : {', '.join(sorted(inspect(db.engine).get_table_names()))}")
+
+
+# ========================
+# Requêtes des routes chaudes
+# ========================
+def requetes_chaudes():
+    now = datetime(2026, 1, 1, 12, 0)
+    return {
+        # / : véhicules disponibles (contexte_accueil)
+        "vehicules_disponibles": (
+            "vehicule",
+            select(Vehicule.id).where(Vehicule.disponible == True).limit(6),  # noqa: E712
+        ),
+        # /vehicules-disponibles : véhicules retenus par les index en mémoire
+        "vehicules_recherche": (
+            "vehicule",
+            select(Vehicule.id).where(Vehicule.id.in_([1, 2, 3])),
+        ),
+        # / : derniers forfaits actifs
+        "forfaits_populaires": (
+            "tarif_forfait",
+            select(TarifForfait.id).where(TarifForfait.actif == True)  # noqa: E712
+            .order_by(TarifForfait.created_at.desc()).limit(8),
+        ),
+        # /admin/tarifs : liste
+        "forfaits_admin": (
+            "tarif_forfait",
+            select(TarifForfait.id).order_by(TarifForfait.created_at.desc()),
+        ),
+        # /admin/tarifs : recherche de doublon
+        "forfait_doublon": (
+            "tarif_forfait",
+            select(TarifForfait.id).where(
+                TarifForfait.depart == "Dakar", TarifForfait.arrivee == "AIBD"
+            ),
+        ),
+        # /admin/reservations : page suivante
+        "reservations_page": (
+            "reservation",
+            select(Reservation.id).where(or_(
+                Reservation.date_heure > now,
+                and_(Reservation.date_heure == now, Reservation.id > 10),
+            )).order_by(Reservation.date_heure, Reservation.id).limit(51),
+        ),
+        # /admin/reservations?statut=...
+        "reservations_statut": (
+            "reservation",
+            select(Reservation.id).where(
+                Reservation.statut == "En attente", Reservation.date_heure >= now
+            ).order_by(Reservation.date_heure).limit(51),
+        ),
+        # /admin/reservations?vehicule_id=... et disponibilité d'un véhicule
+        "reservations_vehicule": (
+            "reservation",
+            select(Reservation.id).where(
+                Reservation.vehicule_id == 1, Reservation.date_heure >= now
+            ),
+        ),
+        # Réservation -> trajet
+        "trajet_reservation": (
+            "trajet",
+            select(Trajet.id).where(Trajet.reservation_id == 1),
+        ),
+        # Worker d'emails : messages dus puis relecture par jeton
+        "outbox_dus": (
+            "email_outbox",
+            select(EmailOutbox.id).where(
+                EmailOutbox.statut == "en_attente", EmailOutbox.prochain_essai <= now
+            ),
+        ),
+        "outbox_lot": (
+            "email_outbox",
+            select(EmailOutbox.id).where(EmailOutbox.lot == "x"),
+        ),
+    }
+
+
+# ========================
+# EXPLAIN par moteur
+# ========================
+def _plan_sqlite(conn, sql, table):
+    lignes = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    index = [m.group(1) for l in lignes for m in [re.search(r"USING (?:COVERING )?INDEX (\w+)", l)] if m]
+    complet = any(
+        re.match(rf"SCAN {table}\b", l) and "USING" not in l for l in lignes
+    )
+    return lignes, index, complet
+
+
+def _plan_postgres(conn, sql, table):
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    lignes = [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+    index = [
+        m.group(1) for l in lignes
+        for m in [re.search(r"(?:Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)", l)] if m
+    ]
+    complet = any(f"Seq Scan on {table}" in l for l in lignes)
+    return lignes, index, complet
+
+
+def _plan_mysql(conn, sql, table):
+    rows = conn.exec_driver_sql("EXPLAIN " + sql).mappings().all()
+    lignes = [f"{r['table']}: type={r['type']} key={r['key']}" for r in rows]
+    index = [r["key"] for r in rows if r["table"] == table and r["key"]]
+    complet = any(r["table"] == table and r["type"] == "ALL" for r in rows)
+    return lignes, index, complet
+
+
+PLANS = {"sqlite": _plan_sqlite, "postgresql": _plan_postgres, "mysql": _plan_mysql}
+
+
+def expliquer(nom=None):
+    """[(nom, table, index utilisés, lecture complète ?, plan brut), ...]"""
+    dialecte = db.engine.dialect
+    plan = PLANS.get(dialecte.name)
+    if plan is None:
+        raise click.ClickException(f"EXPLAIN non géré pour {dialecte.name}")
+    resultats = []
+    for cle, (table, stmt) in requetes_chaudes().items():
+        if nom and cle != nom:
+            continue
+        sql = str(stmt.compile(dialect=dialecte, compile_kwargs={"literal_binds": True}))
+        with db.engine.connect() as conn:
+            with conn.begin() as trans:
+                lignes, index, complet = plan(conn, sql, table)
+                trans.rollback()
+        resultats.append((cle, table, index, complet, lignes))
+    return resultats
+
+
+# ========================
+# CLI : flask indexes ...
+# ========================
+indexes_cli = AppGroup("indexes", help="Index des requêtes fréquentes.")
+
+
+@indexes_cli.command("check")
+@click.argument("nom", required=False)
+@click.option("--verbose", "-v", is_flag=True, help="Afficher le plan complet.")
+def check_command(nom, verbose):
+    """EXPLAIN des requêtes chaudes : échoue si une table est lue en entier."""
+    echecs = 0
+    for cle, table, index, complet, lignes in expliquer(nom):
+        if complet:
+            echecs += 1
+            click.echo(f"❌ {cle:24s} lecture complète de {table}")
+        else:
+            click.echo(f"✅ {cle:24s} {', '.join(index) or 'clé primaire'}")
+        if verbose or complet:
+            for l in lignes:
+                click.echo(f"     {l}")
+    if echecs:
+        sys.exit(1)
+
+
+def init_app(app):
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(indexes_cli)
@@ -0,0 +1,167 @@
+"""
+Sessions côté serveur : le cookie ne porte qu'un identifiant aléatoire,
+le contenu est conservé par un store (SESSION_BACKEND) :
+  - "database"   table session_serveur de la base principale,
+  - "filesystem" un fichier par session (SESSION_DIR), partagé par les
+                 workers d'une machine,
+  - "redis"      SESSION_REDIS_URL ; "fakeredis" : faux serveur en mémoire,
+  - "cookie"     cookie signé de Flask (ancien comportement).
+
+Encodage : JSON étiqueté de Flask (tuples, datetime, Markup...) compressé
+par zlib quand c'est plus court, précédé de l'heure d'écriture. Une
+session expire SESSION_TTL secondes après sa dernière écriture ; une
+session lue alors que plus de la moitié de ce délai est écoulée est
+réécrite (expiration glissante sans écriture à chaque requête). Une
+session vide n'est ni stockée ni posée en cookie.
+
+    flask sessions purge     # supprime les sessions expirées (database, filesystem)
+"""
+import re
+import secrets
+import struct
+import time
+import zlib
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+
+from app.sessions.stores import STORES, SessionStore, register_store
+
+__all__ = [
+    "ServerSession", "ServerSessionInterface", "SessionStore",
+    "init_app", "regenerer", "register_store",
+]
+
+TTL_DEFAUT = 7 * 24 * 3600
+# En-tête : heure d'écriture (epoch, secondes), drapeau de compression
+ENTETE = struct.Struct(">IB")
+BRUT, ZLIB = 0, 1
+_SID = re.compile(r"^[A-Za-z0-9_-]{32}$")
+
+
+def encoder(donnees):
+    brut = session_json_serializer.dumps(donnees).encode("utf-8")
+    compresse = zlib.compress(brut, 6)
+    if len(compresse) < len(brut):
+        return ENTETE.pack(int(time.time()), ZLIB) + compresse
+    return ENTETE.pack(int(time.time()), BRUT) + brut
+
+
+def decoder(blob):
+    """(données, heure d'écriture) ; ValueError si le contenu est illisible."""
+    ecrit_le, drapeau = ENTETE.unpack_from(blob)
+    corps = blob[ENTETE.size:]
+    try:
+        if drapeau == ZLIB:
+            corps = zlib.decompress(corps)
+        return session_json_serializer.loads(corps.decode("utf-8")), ecrit_le
+    except (zlib.error, UnicodeDecodeError) as e:
+        raise ValueError(e) from e
+
+
+def _nouvel_identifiant():
+    return secrets.token_urlsafe(24)
+
+
+class ServerSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, nouvelle=False):
+        super().__init__(initial)
+        self.sid = sid or _nouvel_identifiant()
+        self.new = nouvelle
+        self.a_rafraichir = False
+        self.ancien_sid = None
+
+
+class ServerSessionInterface(SessionInterface):
+    session_class = ServerSession
+
+    def __init__(self, store, ttl=TTL_DEFAUT):
+        self.store = store
+        self.ttl = ttl
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not _SID.match(sid):
+            return self.session_class(nouvelle=True)
+        blob = self.store.get(sid)
+        if blob is None:
+            # Expirée ou inconnue : identifiant neuf (pas de fixation de session)
+            return self.session_class(nouvelle=True)
+        try:
+            donnees, ecrit_le = decoder(blob)
+        except (ValueError, struct.error):
+            app.logger.warning(f"⚠️ [SESSION] Contenu illisible, session {sid[:6]}… réinitialisée")
+            return self.session_class(nouvelle=True)
+        session = self.session_class(donnees, sid=sid)
+        session.a_rafraichir = time.time() - ecrit_le > self.ttl / 2
+        return session
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        options = {
+            "domain": self.get_cookie_domain(app),
+            "path": self.get_cookie_path(app),
+            "secure": self.get_cookie_secure(app),
+            "partitioned": self.get_cookie_partitioned(app),
+            "samesite": self.get_cookie_samesite(app),
+            "httponly": self.get_cookie_httponly(app),
+        }
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.ancien_sid:
+            self.store.delete(session.ancien_sid)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, **options)
+                response.vary.add("Cookie")
+            return
+
+        if session.modified or session.a_rafraichir:
+            self.store.set(session.sid, encoder(dict(session)), self.ttl)
+        if session.new or session.ancien_sid or self.should_set_cookie(app, session):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session), **options)
+            response.vary.add("Cookie")
+
+
+def regenerer(session):
+    """
+    Nouvel identifiant pour la session courante (à la connexion admin :
+    un identifiant connu avant la connexion ne donne pas accès à l'admin).
+    Sans effet avec les sessions en cookie signé.
+    """
+    if isinstance(session, ServerSession):
+        session.ancien_sid = session.ancien_sid or (None if session.new else session.sid)
+        session.sid = _nouvel_identifiant()
+        session.modified = True
+
+
+def init_app(app):
+    nom = app.config.get("SESSION_BACKEND", "filesystem")
+    app.cli.add_command(sessions_cli)
+    if nom == "cookie":
+        return
+    if nom not in STORES:
+        raise ValueError(f"SESSION_BACKEND inconnu : {nom}")
+    app.session_interface = ServerSessionInterface(
+        STORES[nom](app.config), app.config.get("SESSION_TTL", TTL_DEFAUT),
+    )
+    app.extensions["sessions"] = app.session_interface
+
+
+# ========================
+# CLI : flask sessions ...
+# ========================
+sessions_cli = AppGroup("sessions", help="Sessions côté serveur.")
+
+
+@sessions_cli.command("purge")
+def purge_command():
+    """Supprime les sessions expirées (Redis les expire lui-même)."""
+    interface = current_app.extensions.get("sessions")
+    if interface is None:
+        raise click.ClickException("SESSION_BACKEND=cookie : rien à purger")
+    click.echo(f"{interface.store.purge()} session(s) expirée(s) supprimée(s)")
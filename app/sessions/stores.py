@@ -0,0 +1,188 @@
+"""
+Stockage des sessions côté serveur.
+
+Un store conserve le contenu encodé (bytes) d'une session sous son
+identifiant, avec une durée de vie : get(sid) -> bytes | None,
+set(sid, donnees, ttl), delete(sid), purge() -> sessions expirées supprimées.
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+
+class SessionStore:
+    name = "base"
+
+    def __init__(self, config=None):
+        self.config = config or {}
+
+    def get(self, sid):
+        raise NotImplementedError
+
+    def set(self, sid, donnees, ttl):
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+    def purge(self):
+        return 0
+
+
+class DatabaseStore(SessionStore):
+    """
+    Table session_serveur (migration 0005), sur la base principale : écrit
+    hors de la transaction de la requête, par une connexion du pool.
+    Les sessions expirées sont ignorées à la lecture et supprimées par
+    flask sessions purge.
+    """
+    name = "database"
+
+    @staticmethod
+    def _table():
+        from app.models.models import SessionServeur
+        return SessionServeur.__table__
+
+    @staticmethod
+    def _engine():
+        from app import db
+        return db.engines[None]
+
+    def get(self, sid):
+        t = self._table()
+        with self._engine().connect() as conn:
+            return conn.execute(
+                select(t.c.donnees).where(t.c.id == sid, t.c.expire_le > datetime.utcnow())
+            ).scalar()
+
+    def set(self, sid, donnees, ttl):
+        t = self._table()
+        valeurs = {"donnees": donnees, "expire_le": datetime.utcnow() + timedelta(seconds=ttl)}
+        engine = self._engine()
+        try:
+            with engine.begin() as conn:
+                if not conn.execute(update(t).where(t.c.id == sid).values(**valeurs)).rowcount:
+                    conn.execute(insert(t).values(id=sid, **valeurs))
+        except IntegrityError:
+            # Insérée entre-temps par une requête concurrente de la même session
+            with engine.begin() as conn:
+                conn.execute(update(t).where(t.c.id == sid).values(**valeurs))
+
+    def delete(self, sid):
+        t = self._table()
+        with self._engine().begin() as conn:
+            conn.execute(delete(t).where(t.c.id == sid))
+
+    def purge(self):
+        t = self._table()
+        with self._engine().begin() as conn:
+            return conn.execute(delete(t).where(t.c.expire_le <= datetime.utcnow())).rowcount
+
+
+class FileSystemStore(SessionStore):
+    """
+    Un fichier par session dans SESSION_DIR, partagé entre les workers d'une
+    même machine. 8 premiers octets : expiration (epoch, millisecondes).
+    """
+    name = "filesystem"
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.folder = self.config.get("SESSION_DIR") or os.path.join(
+            tempfile.gettempdir(), "dstravel_sessions"
+        )
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.folder, sid)
+
+    @staticmethod
+    def _lire(path):
+        with open(path, "rb") as f:
+            expire = int.from_bytes(f.read(8), "big")
+            return expire, f.read()
+
+    def get(self, sid):
+        try:
+            expire, donnees = self._lire(self._path(sid))
+        except FileNotFoundError:
+            return None
+        return donnees if expire > time.time() * 1000 else None
+
+    def set(self, sid, donnees, ttl):
+        expire = int((time.time() + ttl) * 1000)
+        # Écriture atomique : un lecteur voit l'ancien ou le nouveau fichier
+        fd, tmp = tempfile.mkstemp(dir=self.folder, prefix=".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(expire.to_bytes(8, "big") + donnees)
+        os.replace(tmp, self._path(sid))
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def purge(self):
+        n, maintenant = 0, time.time() * 1000
+        for nom in os.listdir(self.folder):
+            if nom.startswith("."):
+                continue
+            path = os.path.join(self.folder, nom)
+            try:
+                if self._lire(path)[0] <= maintenant:
+                    os.remove(path)
+                    n += 1
+            except OSError:
+                pass
+        return n
+
+
+class RedisStore(SessionStore):
+    """
+    Tout client compatible Redis (get / set(ex=) / delete) : redis.Redis
+    (SESSION_REDIS_URL) ou FakeRedis. L'expiration est celle de Redis.
+    """
+    name = "redis"
+    prefix = "dstravel:session:"
+
+    def __init__(self, config=None, client=None):
+        super().__init__(config)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("SESSION_BACKEND=redis : installer le paquet redis")
+            client = redis.Redis.from_url(self.config.get("SESSION_REDIS_URL") or "redis://localhost:6379/0")
+        self.client = client
+
+    def get(self, sid):
+        return self.client.get(self.prefix + sid)
+
+    def set(self, sid, donnees, ttl):
+        self.client.set(self.prefix + sid, donnees, ex=ttl)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class FakeRedisStore(RedisStore):
+    """Store Redis adossé au faux serveur en mémoire (dev, tests ; un processus)."""
+    name = "fakeredis"
+
+    def __init__(self, config=None):
+        from app.cache.fake_redis import FakeRedis
+        super().__init__(config, client=FakeRedis())
+
+
+STORES = {cls.name: cls for cls in (DatabaseStore, FileSystemStore, RedisStore, FakeRedisStore)}
+
+
+def register_store(cls):
+    """Enregistre un store supplémentaire (sélectionnable via SESSION_BACKEND)."""
+    STORES[cls.name] = cls
+    return cls
@@ -0,0 +1,84 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+_ESPACES = re.compile(r"\s+")
+_PONCTUATION = re.compile(r"[^\w\s]")
+_PARENTHESES = re.compile(r"\(([^)]*)\)")
+
+# Suffixes ajoutés par les saisies automatiques (Google Places...)
+_PAYS = ("senegal", "sn")
+
+# Formes courantes -> nom canonique, en plus des alias du gazetteer
+# (app.distance.gazetteer.PLACES). Clés et valeurs sous forme pliée.
+ALIAS = {
+    "aeroport blaise diagne": "aibd",
+    "aeroport international blaise diagne de dakar": "aibd",
+    "aeroport international de dakar": "aibd",
+    "aeroport dakar": "aibd",
+    "dakar aeroport": "aibd",
+    "dakar centre": "dakar plateau",
+    "centre dakar": "dakar plateau",
+    "thies ville": "thies",
+    "mbour ville": "mbour",
+}
+
+
+def plier(value):
+    """
+    Minuscules sans accents ni ponctuation, espaces réduits :
+    " Aéroport  AIBD " -> "aeroport aibd", "Patte d'Oie" -> "patte d oie".
+    """
+    if not value:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value).casefold())
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return _ESPACES.sub(" ", _PONCTUATION.sub(" ", s)).strip()
+
+
+@lru_cache(maxsize=1)
+def table_alias():
+    """Forme pliée -> nom canonique (plié), gazetteer et ALIAS confondus."""
+    # Import tardif : app.distance importe ce module
+    from app.distance.gazetteer import PLACES
+
+    table = {}
+    for nom, (_, _, *alias) in PLACES.items():
+        canonique = plier(nom)
+        for a in (nom, *alias):
+            table.setdefault(plier(a), canonique)
+    table.update(ALIAS)
+    return table
+
+
+def _candidats(value):
+    """Formes à essayer contre la table d'alias, de la plus complète à la plus courte."""
+    s = str(value)
+    yield plier(s)
+    segments = [p for p in (plier(x) for x in s.split(",")) if p]
+    while segments and segments[-1] in _PAYS:
+        segments.pop()
+    if segments:
+        premier = s.split(",")[0]
+        yield " ".join(segments)
+        yield plier(premier)
+        yield plier(_PARENTHESES.sub(" ", premier))
+    for contenu in _PARENTHESES.findall(s):
+        yield plier(contenu)
+
+
+@lru_cache(maxsize=8192)
+def normaliser_adresse(value):
+    """
+    Forme canonique d'une adresse pour les comparaisons (forfaits, cache de
+    distances, statistiques) : casse, accents, ponctuation et espaces
+    ignorés, puis alias résolus vers le nom du lieu ("Aéroport AIBD",
+    "aibd ", "Aéroport International Blaise Diagne (AIBD), Sénégal" -> "aibd").
+    """
+    if not value:
+        return ""
+    alias = table_alias()
+    for candidat in _candidats(value):
+        if candidat in alias:
+            return alias[candidat]
+    return plier(value)
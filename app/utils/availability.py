@@ -0,0 +1,185 @@
+"""
+Disponibilité des véhicules par créneau horaire.
+
+Un véhicule est occupé de date_heure à date_heure + durée du trajet
+(Trajet.duree_estimee_min, sinon DISPONIBILITE_DUREE_DEFAUT_MIN) + tampon
+(DISPONIBILITE_TAMPON_MIN), pour chaque réservation « En attente » ou
+« Confirmée ». Le flag Vehicule.disponible ne signifie plus que « en
+service » (géré par l'admin).
+
+- Lecture (listes, recherche) : index mémoire des créneaux par véhicule,
+  reconstruit comme l'index des tarifs (premier accès, invalidate() après
+  écriture, DISPONIBILITE_INDEX_TTL secondes pour les autres workers),
+  croisé avec l'index des capacités de la flotte (fleet_index).
+- Écriture (réservation) : verrouiller_creneau() relit les créneaux en base
+  sous verrou du véhicule ; deux réservations simultanées du même véhicule
+  sont donc sérialisées et la seconde voit la première.
+"""
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.utils.fleet_index import Besoin, fleet_index
+
+STATUTS_BLOQUANTS = ("En attente", "Confirmée")
+
+DEFAULT_TTL = 60
+DEFAULT_DUREE_MIN = 60
+DEFAULT_TAMPON_MIN = 30
+# Durée maximale d'un trajet : borne la fenêtre relue en base
+DEFAULT_DUREE_MAX_MIN = 24 * 60
+
+
+class CreneauIndisponible(Exception):
+    def __init__(self, reservation_id):
+        super().__init__(f"Créneau déjà réservé (réservation {reservation_id})")
+        self.reservation_id = reservation_id
+
+
+def _cfg(nom, defaut):
+    return current_app.config.get(nom, defaut)
+
+
+def fin_creneau(debut, duree_min=None):
+    """Fin d'occupation d'un véhicule parti à `debut` (durée + tampon)."""
+    duree = duree_min or _cfg("DISPONIBILITE_DUREE_DEFAUT_MIN", DEFAULT_DUREE_MIN)
+    return debut + timedelta(minutes=duree + _cfg("DISPONIBILITE_TAMPON_MIN", DEFAULT_TAMPON_MIN))
+
+
+class Creneaux:
+    """
+    Créneaux [debut, fin) d'un véhicule triés par début ; fins_max[i] est la
+    plus grande fin parmi les i+1 premiers, d'où un test de chevauchement
+    en O(log n) même si des créneaux se recouvrent.
+    """
+    __slots__ = ("debuts", "fins_max", "ids")
+
+    def __init__(self, creneaux):
+        creneaux = sorted(creneaux)
+        self.debuts = [c[0] for c in creneaux]
+        self.ids = [c[2] for c in creneaux]
+        self.fins_max = []
+        fin_max = None
+        for _, fin, _ in creneaux:
+            fin_max = fin if fin_max is None or fin > fin_max else fin_max
+            self.fins_max.append(fin_max)
+
+    def chevauche(self, debut, fin):
+        i = bisect_left(self.debuts, fin)
+        return i > 0 and self.fins_max[i - 1] > debut
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self._creneaux = None
+        self._built_at = None
+        self._lock = Lock()
+
+    def rebuild(self):
+        """Recharge les créneaux à venir depuis la base."""
+        from app.models.models import Reservation, Trajet
+
+        depuis = datetime.now() - timedelta(minutes=_cfg("DISPONIBILITE_DUREE_MAX_MIN", DEFAULT_DUREE_MAX_MIN))
+        rows = (
+            db.session.query(Reservation.id, Reservation.vehicule_id,
+                             Reservation.date_heure, Trajet.duree_estimee_min)
+            .outerjoin(Trajet, Trajet.reservation_id == Reservation.id)
+            .filter(Reservation.statut.in_(STATUTS_BLOQUANTS),
+                    Reservation.date_heure >= depuis)
+        )
+        par_vehicule = {}
+        for rid, vid, debut, duree in rows:
+            par_vehicule.setdefault(vid, []).append((debut, fin_creneau(debut, duree), rid))
+        creneaux = {vid: Creneaux(c) for vid, c in par_vehicule.items()}
+
+        # Remplacement atomique : les lecteurs voient l'ancien ou le nouvel état
+        with self._lock:
+            self._creneaux = creneaux
+            self._built_at = time.monotonic()
+        current_app.logger.info(
+            f"[DISPO] Index reconstruit : {len(creneaux)} véhicule(s) réservé(s), "
+            f"{sum(len(c.debuts) for c in creneaux.values())} créneau(x)"
+        )
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def creneaux(self):
+        built_at = self._built_at
+        ttl = _cfg("DISPONIBILITE_INDEX_TTL", DEFAULT_TTL)
+        if built_at is None or (ttl and time.monotonic() - built_at > ttl):
+            self.rebuild()
+        return self._creneaux
+
+    def est_libre(self, vehicule_id, debut, fin):
+        c = self.creneaux().get(vehicule_id)
+        return c is None or not c.chevauche(debut, fin)
+
+    def available_vehicles(self, start, end=None, passengers=1, luggage=0, besoin=None):
+        """
+        Ids des véhicules en service, adaptés au besoin et libres sur
+        [start, end) (end par défaut : start + durée par défaut), plus petits
+        d'abord. Le tampon est ajouté à `end` comme aux créneaux existants.
+        besoin (fleet_index.Besoin) remplace passengers / luggage (valises 23 kg).
+        """
+        fin = fin_creneau(start) if end is None else end + timedelta(
+            minutes=_cfg("DISPONIBILITE_TAMPON_MIN", DEFAULT_TAMPON_MIN)
+        )
+        if besoin is None:
+            besoin = Besoin(passagers=passengers or 1, valises_23kg=luggage or 0)
+        creneaux = self.creneaux()
+        ids = []
+        for vid in fleet_index.match(besoin):
+            c = creneaux.get(vid)
+            if c is None or not c.chevauche(start, fin):
+                ids.append(vid)
+        return ids
+
+
+availability_index = AvailabilityIndex()
+
+
+def available_vehicles(start, end=None, passengers=1, luggage=0, besoin=None):
+    return availability_index.available_vehicles(start, end, passengers, luggage, besoin)
+
+
+# ========================
+# Contrôle à la réservation
+# ========================
+def verrouiller_creneau(vehicule_id, debut, fin, exclure_id=None):
+    """
+    À appeler dans la transaction de réservation, avant l'insertion.
+    Verrouille le véhicule puis cherche en base un créneau bloquant qui
+    chevauche [debut, fin) ; lève CreneauIndisponible le cas échéant.
+    Le verrou est tenu jusqu'au commit / rollback de l'appelant.
+    """
+    from app.models.models import Reservation, Trajet, Vehicule
+
+    if db.engine.dialect.name == "sqlite":
+        # Pas de SELECT ... FOR UPDATE : une écriture prend le verrou de la base
+        db.session.execute(
+            update(Vehicule).where(Vehicule.id == vehicule_id).values(id=Vehicule.id)
+        )
+    else:
+        db.session.query(Vehicule.id).filter(Vehicule.id == vehicule_id).with_for_update().first()
+
+    depuis = debut - timedelta(minutes=_cfg("DISPONIBILITE_DUREE_MAX_MIN", DEFAULT_DUREE_MAX_MIN))
+    q = (
+        db.session.query(Reservation.id, Reservation.date_heure, Trajet.duree_estimee_min)
+        .outerjoin(Trajet, Trajet.reservation_id == Reservation.id)
+        .filter(Reservation.vehicule_id == vehicule_id,
+                Reservation.statut.in_(STATUTS_BLOQUANTS),
+                Reservation.date_heure >= depuis,
+                Reservation.date_heure < fin)
+    )
+    if exclure_id is not None:
+        q = q.filter(Reservation.id != exclure_id)
+    for rid, date_heure, duree in q:
+        if fin_creneau(date_heure, duree) > debut:
+            raise CreneauIndisponible(rid)
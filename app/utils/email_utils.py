@@ -1,28 +1,20 @@
-from flask import render_template
-from flask_mail import Message
-from app import mail
+from flask import current_app
 
-def envoyer_emails_reservation(reservation, vehicule):
-    try:
-        # Mail client
-        msg_client = Message(
-            subject="Confirmation de votre réservation - SD Travel",
-            recipients=[reservation.client_email]
-        )
-        msg_client.body = render_template("emails/confirmation.txt", reservation=reservation, vehicule=vehicule)
-        msg_client.html = render_template("emails/confirmation.html", reservation=reservation, vehicule=vehicule)
-        mail.send(msg_client)
+from app import db
+from app.emails import enqueue_reservation_emails
 
-        # Mail admin (copie)
-        msg_admin = Message(
-            subject=f"Nouvelle réservation - {reservation.client_nom}",
-            recipients=["admin@sdtravel.com"]  # <-- à adapter
-        )
-        msg_admin.body = render_template("emails/admin_notification.txt", reservation=reservation, vehicule=vehicule)
-        msg_admin.html = render_template("emails/admin_notification.html", reservation=reservation, vehicule=vehicule)
-        mail.send(msg_admin)
 
+def envoyer_emails_reservation(reservation, vehicule=None):
+    """
+    Met en file la confirmation client et la copie admin d'une réservation
+    (gabarits emails/confirmation.* et emails/admin_notification.*).
+    Le rendu et l'envoi sont faits par le worker de la file d'emails.
+    """
+    try:
+        enqueue_reservation_emails(reservation)
+        db.session.commit()
         return True
     except Exception as e:
-        print("Erreur envoi email :", e)
+        db.session.rollback()
+        current_app.logger.error(f"Erreur mise en file emails réservation : {e}")
         return False
@@ -0,0 +1,112 @@
+"""
+Export comptable des réservations (CSV / NDJSON) en flux.
+
+Les lignes sont lues par paquets (yield_per : curseur serveur sur
+PostgreSQL) et sérialisées une à une : la mémoire reste constante quelle
+que soit la taille de l'export et le premier octet part immédiatement.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from app import db
+from app.models.models import Reservation, Trajet, Vehicule
+
+# (en-tête, colonne)
+COLONNES = [
+    ("reservation_id", Reservation.id),
+    ("date_heure", Reservation.date_heure),
+    ("statut", Reservation.statut),
+    ("client_nom", Reservation.client_nom),
+    ("client_email", Reservation.client_email),
+    ("client_telephone", Reservation.client_telephone),
+    ("adresse_depart", Reservation.adresse_depart),
+    ("adresse_arrivee", Reservation.adresse_arrivee),
+    ("vol_info", Reservation.vol_info),
+    ("nb_passagers", Reservation.nb_passagers),
+    ("nb_valises_23kg", Reservation.nb_valises_23kg),
+    ("nb_valises_10kg", Reservation.nb_valises_10kg),
+    ("nb_sieges_bebe", Reservation.nb_sieges_bebe),
+    ("paiement", Reservation.paiement),
+    ("prix_estime", Reservation.prix_estime),
+    ("vehicule_id", Vehicule.id),
+    ("immatriculation", Vehicule.immatriculation),
+    ("vehicule", Vehicule.marque + " " + Vehicule.modele),
+    ("type_vehicule", Vehicule.type),
+    ("distance_km", Trajet.distance_km),
+    ("duree_estimee_min", Trajet.duree_estimee_min),
+]
+ENTETES = [nom for nom, _ in COLONNES]
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+PAQUET = 1000
+
+
+def requete_export():
+    """Tuples (pas d'objets ORM) : réservation + véhicule + trajet éventuel."""
+    return (
+        db.session.query(*[col.label(nom) for nom, col in COLONNES])
+        .select_from(Reservation)
+        .join(Vehicule, Reservation.vehicule_id == Vehicule.id)
+        .outerjoin(Trajet, Trajet.reservation_id == Reservation.id)
+    )
+
+
+def _valeur(v):
+    return v.isoformat(sep=" ") if isinstance(v, datetime) else v
+
+
+# Début de cellule interprété comme une formule par Excel / LibreOffice
+FORMULE = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cellule(v):
+    """Valeur CSV ; les textes saisis par les clients ne deviennent jamais des formules."""
+    if v is None:
+        return ""
+    if isinstance(v, str) and v.startswith(FORMULE):
+        return "'" + v
+    return _valeur(v)
+
+
+def lignes(q, paquet=PAQUET):
+    """Itère les résultats par paquets de `paquet` lignes."""
+    return q.execution_options(yield_per=paquet)
+
+
+def flux_csv(rows, par_morceau=500):
+    # BOM : accents lisibles à l'ouverture directe dans Excel
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter=";")
+    writer.writerow(ENTETES)
+    yield "\ufeff" + buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    # Un morceau HTTP par `par_morceau` lignes plutôt qu'un par ligne
+    for i, row in enumerate(rows, 1):
+        writer.writerow([_cellule(v) for v in row])
+        if i % par_morceau == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def flux_ndjson(rows, par_morceau=500):
+    morceau = []
+    for row in rows:
+        morceau.append(json.dumps(dict(zip(ENTETES, map(_valeur, row))), ensure_ascii=False))
+        if len(morceau) == par_morceau:
+            yield "\n".join(morceau) + "\n"
+            morceau = []
+    if morceau:
+        yield "\n".join(morceau) + "\n"
+
+
+FLUX = {"csv": flux_csv, "ndjson": flux_ndjson}
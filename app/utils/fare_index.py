@@ -0,0 +1,68 @@
+"""
+Index mémoire des tarifs (forfaits, règles kilométriques, catégories).
+
+Les routes de devis (/calculer_tarif, /estimation, /api/quotes/batch)
+consultent le jeu de tarifs compilé au lieu d'interroger la base à chaque
+appel. Il est reconstruit :
+  - au premier accès,
+  - après chaque modification admin des tarifs (rebuild() explicite),
+  - périodiquement (FARE_INDEX_TTL secondes) pour rattraper les
+    modifications faites par un autre worker gunicorn.
+"""
+import time
+from threading import Lock
+
+from flask import current_app
+
+from app.pricing.engine import build_ruleset
+
+DEFAULT_TTL = 300
+
+
+class FareIndex:
+    def __init__(self):
+        self._ruleset = None
+        self._built_at = None
+        self._lock = Lock()
+
+    def rebuild(self):
+        """Recharge forfaits et règles actifs, catégories et zones depuis la base."""
+        from app.models.models import CategorieVehicule, TarifForfait, TarifRegle, ZoneTarif
+
+        forfaits = (
+            TarifForfait.query.filter(TarifForfait.actif.is_(True))
+            .order_by(TarifForfait.id)
+            .all()
+        )
+        regles = (
+            TarifRegle.query.filter(TarifRegle.actif.is_(True))
+            .order_by(TarifRegle.id)
+            .all()
+        )
+        categories = CategorieVehicule.query.all()
+        zones = ZoneTarif.query.order_by(ZoneTarif.id).all()
+        ruleset = build_ruleset(forfaits, regles, categories, zones)
+
+        # Remplacement atomique : les lecteurs voient l'ancien ou le nouvel état
+        with self._lock:
+            self._ruleset = ruleset
+            self._built_at = time.monotonic()
+        current_app.logger.info(
+            f"[TARIFS] Index reconstruit : {len(ruleset.forfaits)} paires, "
+            f"{len(ruleset.regles)} règle(s) active(s), {len(ruleset.zones)} zone(s)"
+        )
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def ruleset(self):
+        """Jeu de tarifs compilé courant (reconstruit si absent ou expiré)."""
+        built_at = self._built_at
+        ttl = current_app.config.get("FARE_INDEX_TTL", DEFAULT_TTL)
+        if built_at is None or (ttl and time.monotonic() - built_at > ttl):
+            self.rebuild()
+        return self._ruleset
+
+
+fare_index = FareIndex()
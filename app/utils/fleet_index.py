@@ -0,0 +1,174 @@
+"""
+Index mémoire des capacités de la flotte (passagers, bagages, sièges bébé).
+
+Un tableau NumPy par capacité, trié par (passagers, bagages, id) : les
+véhicules assez grands pour le groupe forment un suffixe (searchsorted),
+filtré puis rendu dans l'ordre — le plus petit véhicule adapté d'abord.
+Reconstruit comme l'index des tarifs (premier accès, invalidate() après
+modification de la flotte, FLEET_INDEX_TTL secondes).
+"""
+import math
+import time
+from collections import namedtuple
+from threading import Lock
+
+import numpy as np
+from flask import current_app
+
+from app import db
+
+DEFAULT_TTL = 300
+
+# Encombrement d'une valise (litres), pour les véhicules dont seul le
+# volume du coffre est renseigné
+VOLUME_VALISE_23KG = 90
+VOLUME_VALISE_10KG = 40
+# Valises 23 kg supplémentaires avec un coffre de toit
+VALISES_COFFRE_DE_TOIT = 2
+# Capacité inconnue (champ non renseigné) : pas de limite
+ILLIMITE = np.iinfo(np.int32).max
+
+Besoin = namedtuple("Besoin", "passagers valises_23kg valises_10kg sieges_bebe", defaults=(1, 0, 0, 0))
+
+
+def besoin_depuis(data):
+    """Besoin à partir des champs du formulaire de réservation (dict de chaînes)."""
+    def entier(cle, defaut=0):
+        try:
+            return max(int(str(data.get(cle) or "").strip() or defaut), 0)
+        except ValueError:
+            return defaut
+    return Besoin(
+        passagers=max(entier("nb_passagers", 1), 1),
+        valises_23kg=entier("nb_valises_23kg"),
+        valises_10kg=entier("nb_valises_10kg"),
+        sieges_bebe=entier("nb_sieges_bebe"),
+    )
+
+
+def _valises_equivalentes(besoin):
+    """Bagages du besoin en valises 23 kg (deux 10 kg = une 23 kg)."""
+    return besoin.valises_23kg + math.ceil(besoin.valises_10kg / 2)
+
+
+def demande(besoin):
+    """(passagers, valises 23 kg, volume, sièges bébé) requis, comme capacites()."""
+    volume = besoin.valises_23kg * VOLUME_VALISE_23KG + besoin.valises_10kg * VOLUME_VALISE_10KG
+    return besoin.passagers, _valises_equivalentes(besoin), volume, besoin.sieges_bebe
+
+
+def _entier(value):
+    # Les champs modifiés depuis le tableau de bord arrivent en chaînes
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def capacites(v):
+    """(passagers, valises 23 kg, volume coffre, sièges bébé) d'un véhicule."""
+    valises = _entier(v.nb_valises)
+    volume = _entier(v.volume_coffre_bagages)
+    if v.coffre_de_toit:
+        if valises:
+            valises += VALISES_COFFRE_DE_TOIT
+        if volume:
+            volume += VALISES_COFFRE_DE_TOIT * VOLUME_VALISE_23KG
+    return (
+        _entier(v.capacite_passagers),
+        valises or ILLIMITE,
+        volume or ILLIMITE,
+        _entier(v.nb_sieges_bebe),
+    )
+
+
+def motif_refus(caps, besoin):
+    """Message d'erreur si le véhicule ne convient pas, sinon None."""
+    passagers, valises, volume, sieges = caps
+    _, valises_demandees, volume_demande, _ = demande(besoin)
+    if besoin.passagers > passagers:
+        return f"Ce véhicule accueille au plus {passagers} passager(s)."
+    if valises_demandees > valises or volume_demande > volume:
+        return "Ce véhicule ne peut pas transporter tous vos bagages."
+    if besoin.sieges_bebe > sieges:
+        return f"Ce véhicule dispose de {sieges} siège(s) bébé."
+    return None
+
+
+Flotte = namedtuple("Flotte", "ids passagers valises volume sieges en_service position")
+
+
+class FleetIndex:
+    def __init__(self):
+        self._flotte = None
+        self._built_at = None
+        self._lock = Lock()
+
+    def rebuild(self):
+        """Recharge les capacités de tous les véhicules depuis la base."""
+        from app.models.models import Vehicule
+
+        rows = []
+        for v in db.session.query(Vehicule):
+            p, va, vo, s = capacites(v)
+            rows.append((p, va, vo, s, bool(v.disponible), v.id))
+        rows.sort(key=lambda r: (r[0], r[1], r[2], r[5]))
+        cols = list(zip(*rows)) or [()] * 6
+        flotte = Flotte(
+            ids=np.array(cols[5], dtype=np.int64),
+            passagers=np.array(cols[0], dtype=np.int32),
+            valises=np.array(cols[1], dtype=np.int32),
+            volume=np.array(cols[2], dtype=np.int32),
+            sieges=np.array(cols[3], dtype=np.int32),
+            en_service=np.array(cols[4], dtype=bool),
+            position={vid: i for i, vid in enumerate(cols[5])},
+        )
+
+        # Remplacement atomique : les lecteurs voient l'ancien ou le nouvel état
+        with self._lock:
+            self._flotte = flotte
+            self._built_at = time.monotonic()
+        current_app.logger.info(f"[FLOTTE] Index reconstruit : {len(rows)} véhicule(s)")
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def flotte(self):
+        built_at = self._built_at
+        ttl = current_app.config.get("FLEET_INDEX_TTL", DEFAULT_TTL)
+        if built_at is None or (ttl and time.monotonic() - built_at > ttl):
+            self.rebuild()
+        return self._flotte
+
+    def match(self, besoin=Besoin()):
+        """Ids des véhicules en service adaptés au besoin, plus petit d'abord."""
+        f = self.flotte()
+        debut = int(np.searchsorted(f.passagers, besoin.passagers, side="left"))
+        _, valises, volume, _ = demande(besoin)
+        ok = (
+            f.en_service[debut:]
+            & (f.valises[debut:] >= valises)
+            & (f.volume[debut:] >= volume)
+            & (f.sieges[debut:] >= besoin.sieges_bebe)
+        )
+        return f.ids[debut:][ok].tolist()
+
+    def refus(self, vehicule_id, besoin, vehicule=None):
+        """
+        Motif de refus d'une réservation de `vehicule_id` pour ce besoin (ou
+        None), lu dans l'index ; `vehicule` (déjà chargé par l'appelant) sert
+        de repli pour un véhicule ajouté depuis la dernière reconstruction.
+        """
+        f = self.flotte()
+        i = f.position.get(vehicule_id)
+        if i is None:
+            if vehicule is None:
+                return None
+            caps = capacites(vehicule)
+        else:
+            caps = (int(f.passagers[i]), int(f.valises[i]), int(f.volume[i]), int(f.sieges[i]))
+        return motif_refus(caps, besoin)
+
+
+fleet_index = FleetIndex()
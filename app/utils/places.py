@@ -0,0 +1,155 @@
+"""
+Index mémoire des lieux connus pour l'autocomplétion (/api/places?q=).
+
+Sources : extrémités des forfaits actifs, adresses des réservations passées
+et gazetteer local. Chaque lieu est rangé sous sa forme canonique
+(normaliser_adresse) ; plusieurs saisies d'un même lieu ("AIBD",
+"Aéroport AIBD") n'en font qu'un, affiché sous son nom du gazetteer ou
+sa forme la plus fréquente.
+
+Recherche par préfixe de mots : tous les mots (pliés) de tous les libellés
+sont triés dans un tableau ; un préfixe donne, par bisect, la tranche de
+mots qui le prolongent (équivalent d'un parcours de trie), puis les autres
+mots de la requête filtrent les candidats. Rechargé comme les autres index
+(invalidate() après écriture, PLACES_INDEX_TTL secondes sinon).
+"""
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import func, union_all
+
+from app.utils.adresses import normaliser_adresse, plier, table_alias
+
+DEFAULT_TTL = 300
+
+# Poids de classement : un lieu couvert par un forfait passe devant
+POIDS_FORFAIT = 1000
+POIDS_GAZETTEER = 1
+
+
+class Lieu:
+    __slots__ = ("libelle", "canonique", "poids", "forfait", "mots")
+
+    def __init__(self, libelle, canonique, poids, forfait, mots):
+        self.libelle = libelle
+        self.canonique = canonique
+        self.poids = poids
+        self.forfait = forfait
+        self.mots = mots
+
+    def as_dict(self):
+        return {"label": self.libelle, "canonique": self.canonique, "forfait": self.forfait}
+
+
+class PlaceIndex:
+    def __init__(self):
+        # (lieux, [(mot plié, indice du lieu)] trié, mots seuls pour bisect),
+        # remplacé d'un bloc à chaque reconstruction
+        self._donnees = None
+        self._built_at = None
+        self._lock = Lock()
+
+    def rebuild(self):
+        from app import db
+        from app.distance.gazetteer import PLACES
+        from app.models.models import Reservation, TarifForfait
+
+        poids = Counter()
+        formes = defaultdict(Counter)   # canonique -> {libellé saisi: occurrences}
+        forfaits = set()
+
+        def ajouter(libelle, n):
+            libelle = (libelle or "").strip()
+            canonique = normaliser_adresse(libelle)
+            if not canonique:
+                return None
+            poids[canonique] += n
+            formes[canonique][libelle] += n
+            return canonique
+
+        for depart, arrivee in db.session.query(TarifForfait.depart, TarifForfait.arrivee).filter_by(actif=True):
+            for libelle in (depart, arrivee):
+                forfaits.add(ajouter(libelle, POIDS_FORFAIT))
+
+        adresses = union_all(
+            db.select(Reservation.adresse_depart.label("adresse")),
+            db.select(Reservation.adresse_arrivee.label("adresse")),
+        ).subquery()
+        for adresse, n in db.session.execute(
+            db.select(adresses.c.adresse, func.count()).group_by(adresses.c.adresse)
+        ):
+            ajouter(adresse, n)
+
+        # Lieux du gazetteer affichés sous leur nom (accents compris)
+        noms = {}
+        for nom in PLACES:
+            noms[ajouter(nom, POIDS_GAZETTEER)] = nom
+
+        # Alias connus de chaque lieu : "aer" trouve aussi AIBD (aéroport...)
+        alias = defaultdict(set)
+        for forme, canonique in table_alias().items():
+            alias[canonique].update(forme.split())
+
+        # Lieux rangés par pertinence : l'indice d'un lieu est son rang
+        classes = sorted(poids.items(), key=lambda kv: (-kv[1], kv[0]))
+        lieux = []
+        mots = []
+        for canonique, n in classes:
+            libelle = noms.get(canonique) or formes[canonique].most_common(1)[0][0]
+            # Mots du libellé affiché, des saisies et des alias du lieu
+            termes = set(canonique.split()) | alias.get(canonique, set())
+            for forme in formes[canonique]:
+                termes.update(plier(forme).split())
+            mots.extend((m, len(lieux)) for m in termes)
+            lieux.append(Lieu(libelle, canonique, n, canonique in forfaits, termes))
+        mots.sort()
+
+        with self._lock:
+            self._donnees = (lieux, mots, [m for m, _ in mots])
+            self._built_at = time.monotonic()
+        current_app.logger.info(f"📍 Index des lieux : {len(lieux)} lieu(x), {len(mots)} mot(s)")
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _ensure(self):
+        ttl = current_app.config.get("PLACES_INDEX_TTL", DEFAULT_TTL)
+        built_at = self._built_at
+        if built_at is None or (ttl and time.monotonic() - built_at > ttl):
+            self.rebuild()
+
+    @staticmethod
+    def _prefixe(mots, cles, prefixe):
+        """Indices des lieux dont un mot commence par `prefixe`."""
+        i = bisect_left(cles, prefixe)
+        trouves = set()
+        while i < len(cles) and cles[i].startswith(prefixe):
+            trouves.add(mots[i][1])
+            i += 1
+        return trouves
+
+    def search(self, q, limit=8):
+        """Lieux dont chaque mot de `q` préfixe un mot du libellé, les plus utilisés d'abord."""
+        termes = plier(q).split()
+        if not termes:
+            return []
+        self._ensure()
+        lieux, mots, cles = self._donnees
+        # Le plus long préfixe est le plus sélectif : il fournit les candidats
+        termes.sort(key=len, reverse=True)
+        resultats = []
+        # Indices = rangs : les premiers candidats valides sont les meilleurs
+        for i in sorted(self._prefixe(mots, cles, termes[0])):
+            lieu = lieux[i]
+            if all(any(m.startswith(t) for m in lieu.mots) for t in termes[1:]):
+                resultats.append(lieu)
+                if len(resultats) == limit:
+                    break
+        return resultats
+
+
+places_index = PlaceIndex()
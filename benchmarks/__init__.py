@@ -0,0 +1,17 @@
+"""
+Banc de charge de bout en bout sur un jeu de données synthétique.
+
+    python -m benchmarks seed --reservations 100000
+    python -m benchmarks run                          # client de test Flask
+    python -m benchmarks run --gunicorn --workers 4   # vrai serveur HTTP local
+    python -m benchmarks compare avant.json apres.json
+
+La base visée est BENCH_DATABASE_URL (option --base ; défaut
+instance/bench.db), jamais celle de l'application. Les emails partent vers
+le faux SendGrid local (app.emails.fake_sendgrid) : aucun accès réseau.
+
+Chaque scénario (devis, reservation, admin, accueil) rejoue des requêtes
+réalistes contre l'application réelle et mesure p50/p95/p99, débit et
+requêtes SQL par requête (lues sur /metrics). Les résultats sont écrits en
+JSON (instance/benchmarks/ par défaut) pour comparer les exécutions.
+"""
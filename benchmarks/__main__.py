@@ -0,0 +1,141 @@
+"""python -m benchmarks seed|run|compare (voir benchmarks/__init__.py)."""
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import click
+
+from benchmarks.rapport import charger, comparer, enregistrer, tableau
+from benchmarks.runner import RACINE
+
+BASE_DEFAUT = f"sqlite:///{RACINE / 'instance' / 'bench.db'}"
+
+
+def _application(base, **env):
+    """Application configurée sur la base de bench (variables lues à l'import de config)."""
+    os.environ.update(DATABASE_URL=base, **env)
+    (RACINE / "instance").mkdir(exist_ok=True)
+    from app import create_app
+    return create_app()
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RACINE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.group()
+@click.option("--base", envvar="BENCH_DATABASE_URL", default=BASE_DEFAUT, show_default=True,
+              help="Base de données du banc (recréée par seed).")
+@click.pass_context
+def cli(ctx, base):
+    """Banc de charge DS Travel."""
+    ctx.obj = base
+
+
+@cli.command()
+@click.option("--reservations", default=10_000, show_default=True)
+@click.option("--vehicules", default=50, show_default=True)
+@click.option("--jours", default=365, show_default=True, help="Période couverte par les réservations.")
+@click.option("--graine", default=42, show_default=True)
+@click.option("--oui", is_flag=True, help="Ne pas demander confirmation.")
+@click.pass_obj
+def seed(base, reservations, vehicules, jours, graine, oui):
+    """Recrée la base du banc et la remplit de données synthétiques."""
+    if not oui:
+        click.confirm(f"Toutes les tables de {base} seront recréées. Continuer ?", abort=True)
+    app = _application(base)
+    from benchmarks.seed import peupler
+    with app.app_context():
+        peupler(reservations, vehicules, jours, graine, log=click.echo)
+
+
+@cli.command()
+@click.option("--scenarios", default="devis,reservation,admin,accueil", show_default=True)
+@click.option("--requetes", default=500, show_default=True, help="Requêtes mesurées par scénario.")
+@click.option("--concurrence", default=8, show_default=True, help="Clients simultanés.")
+@click.option("--echauffement", default=20, show_default=True)
+@click.option("--gunicorn", "avec_gunicorn", is_flag=True, help="Serveur gunicorn local au lieu du client de test.")
+@click.option("--workers", default=2, show_default=True, help="Workers gunicorn.")
+@click.option("--graine", default=42, show_default=True)
+@click.option("--sortie", type=click.Path(dir_okay=False), help="Fichier JSON (défaut : instance/benchmarks/).")
+@click.pass_obj
+def run(base, scenarios, requetes, concurrence, echauffement, avec_gunicorn, workers, graine, sortie):
+    """Joue les scénarios et enregistre p50/p95/p99, débit et requêtes SQL."""
+    from app.emails.fake_sendgrid import FakeSendGrid
+    from benchmarks.runner import ClientFlask, ClientHTTP, Gunicorn, executer
+    from benchmarks.scenarios import SCENARIOS, contexte
+
+    noms = [s.strip() for s in scenarios.split(",") if s.strip()]
+    inconnus = [s for s in noms if s not in SCENARIOS]
+    if inconnus:
+        raise click.BadParameter(f"scénario(s) inconnu(s) : {', '.join(inconnus)}", param_hint="--scenarios")
+
+    with FakeSendGrid() as sendgrid:
+        # Emails réellement envoyés par le worker, mais au faux SendGrid local
+        env = {
+            "SENDGRID_API_URL": sendgrid.url, "SENDGRID_API_KEY": "bench",
+            "EMAIL_WORKER_INPROCESS": "1", "ADMIN_EMAIL": "admin@exemple.sn",
+        }
+        app = _application(base, **env)
+        from app import db
+        from app.models.models import Reservation, Vehicule
+        from benchmarks.seed import purger
+        with app.app_context():
+            purger()
+            vehicules = [i for (i,) in db.session.query(Vehicule.id)]
+            nb_reservations = Reservation.query.count()
+        if not vehicules:
+            raise click.ClickException("Base vide : lancer d'abord python -m benchmarks seed")
+        ctx = contexte(vehicules)
+
+        resultats = {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "mode": "gunicorn" if avec_gunicorn else "client",
+            "workers": workers if avec_gunicorn else None,
+            "python": platform.python_version(),
+            "donnees": {"vehicules": len(vehicules), "reservations": nb_reservations},
+            "scenarios": {},
+        }
+
+        def jouer(fabrique):
+            for nom in noms:
+                click.echo(f"▶ {nom} : {requetes} requêtes, {concurrence} client(s)…")
+                resultats["scenarios"][nom] = executer(
+                    fabrique, SCENARIOS[nom], ctx, requetes, concurrence, echauffement, graine,
+                )
+
+        if avec_gunicorn:
+            with Gunicorn(env=dict(env, DATABASE_URL=base), workers=workers) as serveur:
+                jouer(lambda: ClientHTTP(serveur.url))
+        else:
+            jouer(lambda: ClientFlask(app))
+        resultats["emails_recus"] = len(sendgrid.messages)
+
+    click.echo(tableau(resultats["scenarios"]))
+    chemin = sortie or RACINE / "instance" / "benchmarks" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    click.echo(f"Résultats : {enregistrer(resultats, chemin)}")
+
+
+@cli.command()
+@click.argument("avant", type=click.Path(exists=True, dir_okay=False))
+@click.argument("apres", type=click.Path(exists=True, dir_okay=False))
+@click.option("--tolerance", default=0.2, show_default=True, help="Écart toléré (0.2 = 20 %).")
+def compare(avant, apres, tolerance):
+    """Compare deux exécutions ; code de sortie 1 en cas de régression."""
+    lignes, regressions = comparer(charger(avant), charger(apres), tolerance)
+    click.echo("\n".join(lignes))
+    if regressions:
+        click.echo(f"Régression : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,62 @@
+"""Affichage et comparaison des résultats (fichiers JSON de python -m benchmarks run)."""
+import json
+from pathlib import Path
+
+COLONNES = ("rps", "p50_ms", "p95_ms", "p99_ms", "requetes_sql", "echecs")
+
+
+def tableau(scenarios):
+    lignes = [f"{'scénario':<12}" + "".join(f"{c:>14}" for c in COLONNES)]
+    for nom, r in scenarios.items():
+        lignes.append(f"{nom:<12}" + "".join(f"{_fmt(r.get(c)):>14}" for c in COLONNES))
+    return "\n".join(lignes)
+
+
+def _fmt(v):
+    return "-" if v is None else f"{v:g}"
+
+
+def enregistrer(resultats, chemin):
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    chemin.write_text(json.dumps(resultats, ensure_ascii=False, indent=2), encoding="utf-8")
+    return chemin
+
+
+def charger(chemin):
+    return json.loads(Path(chemin).read_text(encoding="utf-8"))
+
+
+def comparer(avant, apres, tolerance=0.2):
+    """
+    Écarts par scénario commun aux deux exécutions. Régression : p95 en
+    hausse ou débit en baisse de plus de `tolerance` (0.2 = 20 %).
+    Retourne (lignes de texte, liste des scénarios en régression).
+    """
+    lignes = [f"{'scénario':<12}{'rps':>22}{'p95_ms':>24}{'requetes_sql':>20}"]
+    regressions = []
+    for nom, b in apres["scenarios"].items():
+        a = avant["scenarios"].get(nom)
+        if not a:
+            continue
+        d_rps = _ecart(a["rps"], b["rps"])
+        d_p95 = _ecart(a["p95_ms"], b["p95_ms"])
+        regression = (d_p95 is not None and d_p95 > tolerance) or (d_rps is not None and d_rps < -tolerance)
+        if regression:
+            regressions.append(nom)
+        lignes.append(
+            f"{nom:<12}"
+            f"{_fmt(a['rps']):>8} → {_fmt(b['rps']):<6}{_pct(d_rps):>6}"
+            f"{_fmt(a['p95_ms']):>10} → {_fmt(b['p95_ms']):<6}{_pct(d_p95):>6}"
+            f"{_fmt(a.get('requetes_sql')):>10} → {_fmt(b.get('requetes_sql')):<6}"
+            + ("  ⚠️ régression" if regression else "")
+        )
+    return lignes, regressions
+
+
+def _ecart(a, b):
+    return (b - a) / a if a and b is not None else None
+
+
+def _pct(d):
+    return "" if d is None else f"{d:+.0%}"
@@ -0,0 +1,177 @@
+"""
+Exécution des scénarios contre l'application réelle, au choix :
+  - client de test Flask, dans le processus (aucun réseau),
+  - serveur gunicorn local (vraie pile HTTP, plusieurs workers).
+
+Chaque fil d'exécution a sa propre session (cookies, jeton CSRF, connexion
+admin au besoin). Les requêtes SQL par requête sont lues sur /metrics avant
+et après le scénario ; avec plusieurs workers gunicorn, la collecte ne voit
+qu'un worker : le ratio est alors un échantillon.
+"""
+import itertools
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+RACINE = Path(__file__).resolve().parent.parent
+
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+_SQL = re.compile(r'^dstravel_db_queries_per_request_(sum|count)\{endpoint="([^"]+)"\} (\S+)$', re.M)
+
+
+class ClientFlask:
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def envoyer(self, methode, url, json=None, data=None, headers=None):
+        r = self._client.open(url, method=methode, json=json, data=data, headers=headers)
+        return r.status_code, r.headers.get("Location"), r.get_data(as_text=True)
+
+
+class ClientHTTP:
+    def __init__(self, base):
+        self.base = base
+        self._session = requests.Session()
+
+    def envoyer(self, methode, url, json=None, data=None, headers=None):
+        r = self._session.request(
+            methode, self.base + url, json=json, data=data, headers=headers,
+            allow_redirects=False, timeout=60,
+        )
+        return r.status_code, r.headers.get("Location"), r.text
+
+
+def preparer(client, admin=False):
+    """Jeton CSRF de la session (+ connexion admin) ; retourne les en-têtes à envoyer."""
+    _, _, page = client.envoyer("GET", "/login")
+    jeton = _CSRF.search(page).group(1)
+    if admin:
+        client.envoyer("POST", "/login", data={"csrf_token": jeton, "username": "admin", "password": "admin123"})
+    return {"X-CSRFToken": jeton}
+
+
+def requetes_sql(client):
+    """{endpoint: (somme, nombre)} de l'histogramme des requêtes SQL par requête."""
+    _, _, texte = client.envoyer("GET", "/metrics")
+    mesures = {}
+    for champ, endpoint, valeur in _SQL.findall(texte):
+        somme, nombre = mesures.get(endpoint, (0.0, 0))
+        mesures[endpoint] = (float(valeur), nombre) if champ == "sum" else (somme, int(valeur))
+    return mesures
+
+
+def executer(fabrique, scenario, ctx, n=500, concurrence=8, echauffement=20, graine=42):
+    """
+    Joue `n` requêtes du scénario avec `concurrence` fils ; retourne le
+    résumé (latences en ms, débit, échecs, requêtes SQL par requête).
+    """
+    # Échauffement (index mémoire, caches) hors mesure
+    sonde = fabrique()
+    entetes = preparer(sonde, scenario.admin)
+    rng = random.Random(-graine)
+    for _ in range(echauffement):
+        req = scenario.requete(rng, ctx)
+        sonde.envoyer(req.methode, req.url, json=req.json, data=req.data, headers=entetes)
+    sql_avant = requetes_sql(sonde).get(scenario.endpoint, (0.0, 0))
+
+    latences = np.zeros(n)
+    echecs = [0] * concurrence
+    compteur = itertools.count()
+    depart = threading.Barrier(concurrence + 1)
+
+    def travail(k):
+        client = fabrique()
+        entetes = preparer(client, scenario.admin)
+        rng = random.Random(graine * 1000 + k)
+        depart.wait()
+        while True:
+            i = next(compteur)
+            if i >= n:
+                return
+            req = scenario.requete(rng, ctx)
+            t = time.perf_counter()
+            try:
+                status, location, _ = client.envoyer(req.methode, req.url, json=req.json, data=req.data, headers=entetes)
+                ok = scenario.succes(status, location)
+            except Exception:
+                ok = False
+            latences[i] = time.perf_counter() - t
+            if not ok:
+                echecs[k] += 1
+
+    fils = [threading.Thread(target=travail, args=(k,), daemon=True) for k in range(concurrence)]
+    for f in fils:
+        f.start()
+    depart.wait()
+    t0 = time.perf_counter()
+    for f in fils:
+        f.join()
+    duree = time.perf_counter() - t0
+
+    somme, nombre = requetes_sql(sonde).get(scenario.endpoint, (0.0, 0))
+    nombre -= sql_avant[1]
+    p50, p95, p99 = np.percentile(latences, [50, 95, 99]) * 1000
+    return {
+        "requetes": n,
+        "echecs": sum(echecs),
+        "concurrence": concurrence,
+        "duree_s": round(duree, 3),
+        "rps": round(n / duree, 1) if duree else None,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(latences.max()) * 1000, 2),
+        "requetes_sql": round((somme - sql_avant[0]) / nombre, 1) if nombre else None,
+    }
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Gunicorn:
+    """Serveur gunicorn local le temps d'un bloc with (url dans .url)."""
+
+    def __init__(self, env, workers=2, threads=1, port=None):
+        self.port = port or port_libre()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.commande = [
+            sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", str(threads),
+            "-b", f"127.0.0.1:{self.port}", "--log-level", "warning", "app:create_app(prechauffer=True)",
+        ]
+        self.env = dict(os.environ, **env)
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.commande, cwd=RACINE, env=self.env)
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn arrêté au démarrage (code {self.process.returncode})")
+            try:
+                # Prêt une fois le préchauffage terminé (gabarits, pool, index)
+                if requests.get(self.url + "/readyz", timeout=10).status_code == 200:
+                    return self
+                time.sleep(0.2)
+            except requests.RequestException:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError("gunicorn ne répond pas après 30 s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
@@ -0,0 +1,107 @@
+"""
+Scénarios de charge : chaque scénario fabrique la requête suivante à partir
+d'un générateur aléatoire et du contexte (véhicules, date de référence),
+et dit si la réponse est un succès.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from app.distance.gazetteer import PLACES
+from benchmarks.seed import EMAIL_BENCH
+
+Requete = namedtuple("Requete", "methode url json data", defaults=(None, None))
+
+LIEUX = list(PLACES)
+STATUTS = ("", "", "En attente", "Confirmée", "Terminée", "Annulée")
+
+
+class Scenario:
+    nom = None
+    endpoint = None       # endpoint Flask (requêtes SQL lues sur /metrics)
+    admin = False
+    codes = (200,)
+
+    def requete(self, rng, ctx):
+        raise NotImplementedError
+
+    def succes(self, status, location):
+        return status in self.codes
+
+
+class Devis(Scenario):
+    """Rafale de devis AJAX (forfaits, zones et tarif kilométrique)."""
+    nom = "devis"
+    endpoint = "main.calculer_tarif"
+    codes = (200, 400)   # 400 : aucun tarif pour la paire, réponse normale
+
+    def requete(self, rng, ctx):
+        return Requete("POST", "/calculer_tarif", json={
+            "depart": "AIBD" if rng.random() < 0.3 else rng.choice(LIEUX),
+            "arrivee": rng.choice(LIEUX),
+            "date_heure": (ctx["maintenant"] + timedelta(days=rng.randint(1, 60))).strftime("%Y-%m-%dT%H:%M"),
+            "categorie": rng.choice(("", "Berline", "SUV", "Van")),
+        })
+
+
+class Reservation(Scenario):
+    """
+    Rafale de réservations sur des créneaux lointains tirés au hasard
+    (collisions rares) ; un créneau déjà pris renvoie vers la page du véhicule.
+    Les réservations d'un run sont supprimées au début du suivant.
+    """
+    nom = "reservation"
+    endpoint = "main.reserver_vehicule"
+    codes = (302,)
+
+    def requete(self, rng, ctx):
+        dt = ctx["maintenant"] + timedelta(days=400 + rng.randrange(3 * 365), minutes=rng.randrange(24 * 60))
+        return Requete("POST", f"/reserver/{rng.choice(ctx['vehicules'])}", data={
+            "client_nom": "Client Bench", "client_email": EMAIL_BENCH,
+            "client_telephone": "770000000", "date_heure": dt.strftime("%Y-%m-%dT%H:%M"),
+            "adresse_depart": rng.choice(LIEUX), "adresse_arrivee": "AIBD",
+            "nb_passagers": "1", "nb_valises_23kg": "1", "nb_valises_10kg": "0",
+            "nb_sieges_bebe": "0", "paiement": "Espèces",
+        })
+
+    def succes(self, status, location):
+        return status == 302 and "/reservation/confirmation/" in (location or "")
+
+
+class Admin(Scenario):
+    """Consultation de la liste admin : filtres, période et pages profondes."""
+    nom = "admin"
+    endpoint = "main.reservations_admin"
+    admin = True
+
+    def requete(self, rng, ctx):
+        params = {}
+        if rng.random() < 0.5:
+            params["statut"] = rng.choice(STATUTS)
+        if rng.random() < 0.3:
+            params["vehicule_id"] = rng.choice(ctx["vehicules"])
+        if rng.random() < 0.2:
+            du = ctx["maintenant"].date() - timedelta(days=rng.randrange(1, 300))
+            params["du"], params["au"] = du.isoformat(), (du + timedelta(days=7)).isoformat()
+        if rng.random() < 0.4:
+            # Page profonde : curseur tiré dans l'historique
+            dt = ctx["maintenant"] - timedelta(days=rng.randrange(1, 300))
+            params["apres"] = f"{dt.isoformat()}_{10 ** 9}"
+        params = {k: v for k, v in params.items() if v != ""}
+        return Requete("GET", "/admin/reservations" + ("?" + urlencode(params) if params else ""))
+
+
+class Accueil(Scenario):
+    """Trafic public : page d'accueil (cache des pages compris)."""
+    nom = "accueil"
+    endpoint = "main.home"
+
+    def requete(self, rng, ctx):
+        return Requete("GET", "/")
+
+
+SCENARIOS = {s.nom: s() for s in (Devis, Reservation, Admin, Accueil)}
+
+
+def contexte(vehicules):
+    return {"vehicules": vehicules, "maintenant": datetime.now()}
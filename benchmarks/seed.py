@@ -0,0 +1,160 @@
+"""
+Jeu de données synthétique : catégories, flotte, forfaits, règles
+kilométriques et réservations (10k à 1M), reproductible (graine).
+
+Insertion par paquets d'INSERT multi-lignes, identifiants attribués ici
+(les trajets référencent leur réservation sans relecture), puis
+reconstruction des agrégats de statistiques.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from app import analytics, db
+from app.distance.backends import haversine_km
+from app.distance.gazetteer import PLACES
+from app.models.models import (
+    CategorieVehicule, EmailOutbox, Reservation, TarifForfait, TarifRegle, Trajet, Vehicule,
+)
+
+PAQUET = 10_000
+
+# Adresse des réservations passées par le scénario "reservation"
+EMAIL_BENCH = "bench@exemple.sn"
+
+# type -> (passagers, valises, prix de base, prix au km)
+TYPES = {
+    "Berline": (4, 3, 8000, 450),
+    "SUV": (6, 5, 10000, 550),
+    "Van": (8, 8, 14000, 650),
+    "Minibus": (15, 15, 20000, 800),
+}
+MODELES = [
+    ("Toyota", "Corolla"), ("Toyota", "Land Cruiser"), ("Hyundai", "Tucson"),
+    ("Peugeot", "508"), ("Mercedes", "Vito"), ("Renault", "Trafic"),
+    ("Kia", "Sorento"), ("Ford", "Transit"),
+]
+STATUTS = ("Terminée", "Confirmée", "En attente", "Annulée")
+POIDS_STATUTS = (55, 20, 15, 10)
+
+# Extrémités des forfaits : lieux les plus demandés
+POLES = [
+    "AIBD", "Dakar Plateau", "Almadies", "Ngor", "Mermoz", "Ouakam", "Saly",
+    "Mbour", "Thiès", "Diamniadio", "Rufisque", "Lac Rose", "Saint-Louis",
+]
+
+
+def _km(a, b):
+    (lat1, lon1, *_), (lat2, lon2, *_) = PLACES[a], PLACES[b]
+    return haversine_km(lat1, lon1, lat2, lon2) * 1.35
+
+
+def _inserer(table, lignes):
+    for i in range(0, len(lignes), PAQUET):
+        db.session.execute(table.insert(), lignes[i:i + PAQUET])
+
+
+def peupler(reservations=10_000, vehicules=50, jours=365, graine=42, log=print):
+    """
+    Recrée toutes les tables et les remplit. Les réservations sont réparties
+    sur `jours` jours (80 % passés, 20 % à venir), 30 % d'entre elles au
+    départ ou à destination de l'AIBD. Retourne le nombre de lignes par table.
+    """
+    rng = random.Random(graine)
+    debut = time.perf_counter()
+    db.drop_all()
+    db.create_all()
+
+    categories = {nom: i for i, nom in enumerate(TYPES, 1)}
+    _inserer(CategorieVehicule.__table__, [{"id": i, "nom": nom} for nom, i in categories.items()])
+
+    flotte = []
+    for i in range(1, vehicules + 1):
+        type_ = rng.choice(list(TYPES))
+        marque, modele = rng.choice(MODELES)
+        passagers, valises, _, _ = TYPES[type_]
+        flotte.append({
+            "id": i, "immatriculation": f"DK-{1000 + i}-BN", "marque": marque, "modele": modele,
+            "type": type_, "capacite_passagers": passagers, "nb_valises": valises,
+            "nb_sieges_bebe": rng.randint(0, 2), "coffre_de_toit": False, "disponible": True,
+        })
+    _inserer(Vehicule.__table__, flotte)
+
+    forfaits = []
+    for i, a in enumerate(POLES):
+        for b in POLES[i + 1:]:
+            for nom, cid in categories.items():
+                _, _, base, prix_km = TYPES[nom]
+                km = _km(a, b)
+                forfaits.append({
+                    "depart": a, "arrivee": b, "categorie_id": cid,
+                    "prix_cfa": int(round((base + prix_km * km * 0.9) / 500) * 500),
+                    "distance_km": round(km, 1), "bidirectionnel": True, "actif": True,
+                })
+    _inserer(TarifForfait.__table__, forfaits)
+    _inserer(TarifRegle.__table__, [
+        {"categorie_id": cid, "base": TYPES[nom][2], "prix_km": TYPES[nom][3], "minimum": 10000,
+         "coeff_nuit": 1.2, "coeff_weekend": 1.1, "actif": True}
+        for nom, cid in categories.items()
+    ])
+    db.session.commit()
+
+    lieux = list(PLACES)
+    maintenant = datetime.now().replace(second=0, microsecond=0)
+    origine = maintenant - timedelta(days=int(jours * 0.8))
+    minutes = jours * 24 * 60
+    n = 0
+    while n < reservations:
+        lot_r, lot_t = [], []
+        for rid in range(n + 1, min(n + PAQUET, reservations) + 1):
+            v = flotte[rng.randrange(len(flotte))]
+            a = "AIBD" if rng.random() < 0.3 else rng.choice(lieux)
+            b = rng.choice(lieux)
+            if rng.random() < 0.5:
+                a, b = b, a
+            km = _km(a, b) or 3.0
+            _, _, base, prix_km = TYPES[v["type"]]
+            lot_r.append({
+                "id": rid, "vehicule_id": v["id"],
+                "client_nom": f"Client {rid}", "client_email": f"client{rid}@exemple.sn",
+                "client_telephone": f"77{rid:07d}",
+                "date_heure": origine + timedelta(minutes=rng.randrange(minutes)),
+                "adresse_depart": a, "adresse_arrivee": b,
+                "nb_passagers": rng.randint(1, v["capacite_passagers"]),
+                "nb_valises_23kg": rng.randint(0, 2), "nb_valises_10kg": rng.randint(0, 2),
+                "nb_sieges_bebe": 0, "paiement": rng.choice(("Espèces", "Wave", "Orange Money")),
+                "statut": rng.choices(STATUTS, POIDS_STATUTS)[0],
+                "prix_estime": int(base + prix_km * km),
+            })
+            lot_t.append({
+                "adresse_depart": a, "adresse_arrivee": b, "distance_km": round(km, 1),
+                "duree_estimee_min": round(km / 40 * 60), "reservation_id": rid,
+            })
+        _inserer(Reservation.__table__, lot_r)
+        _inserer(Trajet.__table__, lot_t)
+        db.session.commit()
+        n += len(lot_r)
+        log(f"  {n} réservation(s)")
+
+    analytics.rebuild()
+    comptes = {
+        "categories": len(categories), "vehicules": len(flotte), "forfaits": len(forfaits),
+        "reservations": reservations,
+    }
+    log(f"Jeu de données prêt en {time.perf_counter() - debut:.1f} s : {comptes}")
+    return comptes
+
+
+def purger():
+    """
+    Supprime ce qu'a écrit un run précédent (réservations du scénario
+    "reservation", file d'emails) : chaque run part du même jeu de données.
+    """
+    n = 0
+    for r in Reservation.query.filter_by(client_email=EMAIL_BENCH):
+        analytics.transition(r, r.statut, None)
+        db.session.delete(r)
+        n += 1
+    EmailOutbox.query.delete()
+    db.session.commit()
+    return n
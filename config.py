@@ -17,6 +17,97 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pool de connexions par processus (app/database.py) ; connexions ouvertes
+    # au plus : workers gunicorn × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '5'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+    # Durée maximale d'une instruction, Postgres (ms, 0 = sans limite)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+
+    # Réplica en lecture (routes @lecture_seule) ; après une écriture, le
+    # visiteur lit la base principale pendant DB_REPLICA_DELAI secondes
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith("postgres://"):
+        DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+    DB_REPLICA_DELAI = int(os.getenv('DB_REPLICA_DELAI', '10'))
+
+    # Index mémoire des tarifs : rechargement périodique (secondes, 0 = jamais)
+    # pour rattraper les modifications faites depuis un autre worker
+    FARE_INDEX_TTL = int(os.getenv('FARE_INDEX_TTL', '300'))
+
+    # Disponibilité par créneau : durée d'un trajet sans estimation, marge
+    # entre deux courses d'un même véhicule (minutes), rechargement de l'index
+    DISPONIBILITE_DUREE_DEFAUT_MIN = int(os.getenv('DISPONIBILITE_DUREE_DEFAUT_MIN', '60'))
+    DISPONIBILITE_TAMPON_MIN = int(os.getenv('DISPONIBILITE_TAMPON_MIN', '30'))
+    DISPONIBILITE_INDEX_TTL = int(os.getenv('DISPONIBILITE_INDEX_TTL', '60'))
+
+    # Index mémoire des capacités de la flotte : rechargement périodique (secondes)
+    FLEET_INDEX_TTL = int(os.getenv('FLEET_INDEX_TTL', '300'))
+
+    # Dispatch du jour (/admin/dispatch) : coût d'un véhicule mis en service
+    # (en km à vide), trajet à vide supposé quand une adresse est inconnue
+    # (km), dépôt de départ et de retour des véhicules (adresse, facultatif)
+    DISPATCH_COUT_VEHICULE_KM = float(os.getenv('DISPATCH_COUT_VEHICULE_KM', '50'))
+    DISPATCH_KM_INCONNU = float(os.getenv('DISPATCH_KM_INCONNU', '10'))
+    DISPATCH_BASE = os.getenv('DISPATCH_BASE')
+
+    # Index mémoire des lieux (autocomplétion /api/places) : rechargement (secondes)
+    PLACES_INDEX_TTL = int(os.getenv('PLACES_INDEX_TTL', '300'))
+
+    # Cache des pages publiques : "memory" (par processus), "filesystem"
+    # (partagé sur la machine), "redis" (RESPONSE_CACHE_URL), "fakeredis", "none"
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '300'))
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '512'))
+    RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR')
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL')
+
+    # Fichiers statiques : URL à empreinte + Cache-Control immutable (secondes),
+    # copies gzip/br dans ASSETS_CACHE_DIR (défaut : dossier temporaire)
+    ASSETS_FINGERPRINT = os.getenv('ASSETS_FINGERPRINT', '1') == '1'
+    ASSETS_MAX_AGE = int(os.getenv('ASSETS_MAX_AGE', str(365 * 24 * 3600)))
+    ASSETS_CACHE_DIR = os.getenv('ASSETS_CACHE_DIR')
+
+    # Statistiques : heures de service par véhicule et par jour (taux d'occupation)
+    STATS_HEURES_SERVICE = int(os.getenv('STATS_HEURES_SERVICE', '12'))
+
+    # Mesures (/metrics, format Prometheus) : accès sans session admin depuis
+    # ces adresses ou avec "Authorization: Bearer METRICS_TOKEN" ; alerte N+1
+    # au-delà de METRICS_SEUIL_REQUETES_SQL requêtes SQL par requête (0 = jamais)
+    METRICS_IPS = tuple(ip.strip() for ip in os.getenv('METRICS_IPS', '127.0.0.1,::1').split(',') if ip.strip())
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_SEUIL_REQUETES_SQL = int(os.getenv('METRICS_SEUIL_REQUETES_SQL', '30'))
+
+    # Démarrage à froid (app/demarrage.py) : préchauffage au démarrage du
+    # processus (run.py l'active), en tâche de fond sauf PRECHAUFFAGE_SYNCHRONE=1
+    PRECHAUFFAGE = os.getenv('PRECHAUFFAGE', '0') == '1'
+    PRECHAUFFAGE_SYNCHRONE = os.getenv('PRECHAUFFAGE_SYNCHRONE', '0') == '1'
+    PRECHAUFFAGE_CONNEXIONS = int(os.getenv('PRECHAUFFAGE_CONNEXIONS', '2'))
+    PRECHAUFFAGE_PAGES = tuple(p.strip() for p in os.getenv('PRECHAUFFAGE_PAGES', '/').split(',') if p.strip())
+
+    # Sessions (app/sessions) : "filesystem" (SESSION_DIR, défaut : dossier
+    # temporaire), "database" (table session_serveur), "redis"
+    # (SESSION_REDIS_URL), "fakeredis", "cookie" (cookie signé de Flask) ;
+    # expiration après SESSION_TTL secondes sans écriture, brouillons de
+    # réservation gardés : les SESSION_BROUILLONS_MAX plus récents
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'filesystem')
+    SESSION_TTL = int(os.getenv('SESSION_TTL', str(7 * 24 * 3600)))
+    SESSION_DIR = os.getenv('SESSION_DIR')
+    SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL')
+    SESSION_BROUILLONS_MAX = int(os.getenv('SESSION_BROUILLONS_MAX', '5'))
+
+    # Taille de page de /admin/reservations
+    RESERVATIONS_PAR_PAGE = int(os.getenv('RESERVATIONS_PAR_PAGE', '50'))
+
+    # Import CSV (véhicules, forfaits) : lignes par transaction
+    IMPORT_LOT = int(os.getenv('IMPORT_LOT', '1000'))
+
+    # Nombre maximum de trajets par appel à /api/quotes/batch
+    QUOTES_BATCH_MAX = int(os.getenv('QUOTES_BATCH_MAX', '1000'))
+
     # ======================
     # ✉️ Config Mail
     # ======================
@@ -31,7 +122,35 @@ class Config:
     MAIL_SUPPRESS_SEND = os.getenv('MAIL_SUPPRESS_SEND', '1') == '1'
     ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', '')
 
+    # ======================
+    # 📬 File d'envoi (SendGrid)
+    # ======================
+    SENDGRID_API_KEY = (os.getenv('SENDGRID_API_KEY') or '').strip()
+    # Surchargeable pour pointer vers le faux serveur local (flask emails fake-sendgrid)
+    SENDGRID_API_URL = os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com')
+    # 1 = worker démarré dans chaque processus web ; 0 = worker autonome (flask emails worker)
+    EMAIL_WORKER_INPROCESS = os.getenv('EMAIL_WORKER_INPROCESS', '1') == '1'
+    EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', '4'))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '6'))
+    EMAIL_RETRY_BASE = float(os.getenv('EMAIL_RETRY_BASE', '30'))
+    EMAIL_POLL_INTERVAL = float(os.getenv('EMAIL_POLL_INTERVAL', '5'))
+    # Fenêtre de regroupement (s) et taille max d'un lot (≤ 1000 personalizations)
+    EMAIL_BATCH_WINDOW = float(os.getenv('EMAIL_BATCH_WINDOW', '2'))
+    EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '1000'))
+
     # ======================
     # 🔑 Google Maps
     # ======================
     GOOGLE_MAPS_KEY = os.getenv('GOOGLE_MAPS_KEY', '')
+
+    # ======================
+    # 📏 Distances
+    # ======================
+    # "haversine" (gazetteer local, hors-ligne) ou "google" (Distance Matrix)
+    DISTANCE_BACKEND = os.getenv('DISTANCE_BACKEND', 'haversine')
+    DISTANCE_CACHE_SIZE = int(os.getenv('DISTANCE_CACHE_SIZE', '2048'))
+    DISTANCE_CACHE_TTL = int(os.getenv('DISTANCE_CACHE_TTL', '86400'))
+    # Échecs passagers (réseau, quota, clé) : réessayés après ce délai
+    DISTANCE_ERREUR_TTL = int(os.getenv('DISTANCE_ERREUR_TTL', '60'))
+    DISTANCE_ROAD_FACTOR = float(os.getenv('DISTANCE_ROAD_FACTOR', '1.35'))
+    DISTANCE_SPEED_KMH = float(os.getenv('DISTANCE_SPEED_KMH', '40'))
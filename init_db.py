@@ -1,9 +1,10 @@
-from app import create_app, db
+from app import create_app
+from app.schema import mettre_a_jour_schema
 
 app = create_app()
 
+# Migrations (migrations/versions) ; une base créée par l'ancien
+# db.create_all() est reprise automatiquement
 with app.app_context():
-    db.create_all()
+    mettre_a_jour_schema()
     print("Base de données initialisée.")
-
-
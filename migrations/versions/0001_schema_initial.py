@@ -0,0 +1,168 @@
+"""schema initial
+
+Tables telles que créées jusqu'ici par db.create_all(). Une base existante
+créée par create_all est marquée à cette révision (flask db stamp 0001, fait
+automatiquement par init_db.py) avant d'appliquer les suivantes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 01:53:55.938893
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+
+    op.create_table('admin',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(length=100), nullable=False),
+    sa.Column('prenom', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('mot_de_passe', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('categorie_vehicule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom')
+    )
+    op.create_table('distance_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('depart_norm', sa.String(length=200), nullable=False),
+    sa.Column('arrivee_norm', sa.String(length=200), nullable=False),
+    sa.Column('distance_km', sa.Float(), nullable=False),
+    sa.Column('duree_min', sa.Float(), nullable=False),
+    sa.Column('source', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('depart_norm', 'arrivee_norm', name='uq_distance_cache_paire')
+    )
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('destinataire', sa.String(length=180), nullable=False),
+    sa.Column('expediteur', sa.String(length=180), nullable=False),
+    sa.Column('gabarit', sa.String(length=100), nullable=True),
+    sa.Column('contexte', sa.Text(), nullable=True),
+    sa.Column('sujet', sa.String(length=255), nullable=True),
+    sa.Column('corps_texte', sa.Text(), nullable=True),
+    sa.Column('corps_html', sa.Text(), nullable=True),
+    sa.Column('substitutions', sa.Text(), nullable=True),
+    sa.Column('statut', sa.String(length=20), nullable=False),
+    sa.Column('tentatives', sa.Integer(), nullable=False),
+    sa.Column('prochain_essai', sa.DateTime(), nullable=True),
+    sa.Column('verrou_jusqua', sa.DateTime(), nullable=True),
+    sa.Column('lot', sa.String(length=32), nullable=True),
+    sa.Column('derniere_erreur', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('envoye_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('vehicule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('immatriculation', sa.String(length=100), nullable=False),
+    sa.Column('marque', sa.String(length=100), nullable=False),
+    sa.Column('modele', sa.String(length=100), nullable=False),
+    sa.Column('caracteristiques_techniques', sa.Text(), nullable=True),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('capacite_passagers', sa.Integer(), nullable=False),
+    sa.Column('volume_coffre_bagages', sa.Integer(), nullable=True),
+    sa.Column('volume_coffre_rabattus', sa.Integer(), nullable=True),
+    sa.Column('nb_sieges_bebe', sa.Integer(), nullable=True),
+    sa.Column('nb_valises', sa.Integer(), nullable=True),
+    sa.Column('coffre_de_toit', sa.Boolean(), nullable=True),
+    sa.Column('details_coffre_toit', sa.Text(), nullable=True),
+    sa.Column('disponible', sa.Boolean(), nullable=True),
+    sa.Column('image', sa.String(length=200), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('immatriculation')
+    )
+    op.create_table('notification',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.String(length=255), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.Column('admin_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['admin_id'], ['admin.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reservation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehicule_id', sa.Integer(), nullable=False),
+    sa.Column('client_nom', sa.String(length=100), nullable=False),
+    sa.Column('client_email', sa.String(length=120), nullable=False),
+    sa.Column('client_telephone', sa.String(length=20), nullable=False),
+    sa.Column('date_heure', sa.DateTime(), nullable=False),
+    sa.Column('adresse_depart', sa.String(length=200), nullable=False),
+    sa.Column('adresse_arrivee', sa.String(length=200), nullable=False),
+    sa.Column('vol_info', sa.String(length=100), nullable=True),
+    sa.Column('nb_passagers', sa.Integer(), nullable=True),
+    sa.Column('nb_valises_23kg', sa.Integer(), nullable=True),
+    sa.Column('nb_valises_10kg', sa.Integer(), nullable=True),
+    sa.Column('nb_sieges_bebe', sa.Integer(), nullable=True),
+    sa.Column('poids_enfants', sa.String(length=100), nullable=True),
+    sa.Column('paiement', sa.String(length=50), nullable=True),
+    sa.Column('commentaires', sa.Text(), nullable=True),
+    sa.Column('statut', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['vehicule_id'], ['vehicule.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('tarif_forfait',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('depart', sa.String(length=200), nullable=False),
+    sa.Column('arrivee', sa.String(length=200), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=True),
+    sa.Column('prix_cfa', sa.Integer(), nullable=False),
+    sa.Column('distance_km', sa.Float(), nullable=True),
+    sa.Column('bidirectionnel', sa.Boolean(), nullable=True),
+    sa.Column('actif', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['categorie_id'], ['categorie_vehicule.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('tarif_regle',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('categorie_id', sa.Integer(), nullable=True),
+    sa.Column('base', sa.Integer(), nullable=False),
+    sa.Column('prix_km', sa.Integer(), nullable=False),
+    sa.Column('minimum', sa.Integer(), nullable=True),
+    sa.Column('coeff_nuit', sa.Float(), nullable=True),
+    sa.Column('coeff_weekend', sa.Float(), nullable=True),
+    sa.Column('actif', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['categorie_id'], ['categorie_vehicule.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('trajet',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('adresse_depart', sa.String(length=200), nullable=False),
+    sa.Column('adresse_arrivee', sa.String(length=200), nullable=False),
+    sa.Column('distance_km', sa.Float(), nullable=True),
+    sa.Column('duree_estimee_min', sa.Integer(), nullable=True),
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['reservation_id'], ['reservation.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('trajet')
+    op.drop_table('tarif_regle')
+    op.drop_table('tarif_forfait')
+    op.drop_table('reservation')
+    op.drop_table('notification')
+    op.drop_table('vehicule')
+    op.drop_table('email_outbox')
+    op.drop_table('distance_cache')
+    op.drop_table('categorie_vehicule')
+    op.drop_table('admin')
@@ -0,0 +1,62 @@
+"""index des requêtes fréquentes
+
+Index composites et partiels des chemins chauds (accueil, recherche de
+véhicules, forfaits, listing admin des réservations, file d'emails).
+Les index déjà présents (bases créées par create_all après leur ajout au
+modèle) sont ignorés. Vérification : flask indexes check
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 02:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# (table, nom, colonnes, prédicat partiel ou None)
+# MySQL ne connaît pas les index partiels : le prédicat y est ignoré.
+INDEX = [
+    ('vehicule', 'ix_vehicule_disponible_capacite', ['capacite_passagers'], 'disponible'),
+    ('reservation', 'ix_reservation_date_heure_id', ['date_heure', 'id'], None),
+    ('reservation', 'ix_reservation_statut_date_heure', ['statut', 'date_heure'], None),
+    ('reservation', 'ix_reservation_vehicule_date_heure', ['vehicule_id', 'date_heure'], None),
+    ('trajet', 'ix_trajet_reservation_id', ['reservation_id'], None),
+    ('tarif_forfait', 'ix_tarif_forfait_depart_arrivee', ['depart', 'arrivee', 'actif'], None),
+    ('tarif_forfait', 'ix_tarif_forfait_created_at', ['created_at'], None),
+    ('tarif_forfait', 'ix_tarif_forfait_actif_created_at', ['created_at'], 'actif'),
+    ('email_outbox', 'ix_email_outbox_statut_prochain_essai', ['statut', 'prochain_essai'], None),
+    ('email_outbox', 'ix_email_outbox_lot', ['lot'], None),
+]
+
+
+def _existants(table):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for table, nom, colonnes, booleen in INDEX:
+        if nom in _existants(table):
+            continue
+        kw = {}
+        if booleen:
+            # Même forme que les requêtes : filter_by(x=True) donne "x = 1"
+            # sous SQLite, "x = true" (normalisé en "x") sous Postgres
+            kw = {
+                'postgresql_where': sa.text(booleen),
+                'sqlite_where': sa.text(f'{booleen} = 1'),
+            }
+        op.create_index(nom, table, colonnes, unique=False, **kw)
+
+
+def downgrade():
+    for table, nom, colonnes, booleen in reversed(INDEX):
+        if nom in _existants(table):
+            op.drop_index(nom, table_name=table)
@@ -0,0 +1,62 @@
+"""statistiques des reservations
+
+Agrégats stat_jour / stat_trajet_mois (app.analytics) et devis indicatif
+reservation.prix_estime. Les agrégats d'une base existante se remplissent
+avec : flask stats rebuild
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 03:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _inspecteur():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    # Tables déjà créées par create_all (base antérieure aux migrations) : ignorées
+    tables = set(_inspecteur().get_table_names())
+    if 'stat_jour' not in tables:
+        op.create_table('stat_jour',
+        sa.Column('jour', sa.Date(), nullable=False),
+        sa.Column('vehicule_id', sa.Integer(), nullable=False),
+        sa.Column('statut', sa.String(length=50), nullable=False),
+        sa.Column('nb', sa.Integer(), nullable=False),
+        sa.Column('minutes', sa.Integer(), nullable=False),
+        sa.Column('km', sa.Float(), nullable=False),
+        sa.Column('ca_estime', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('jour', 'vehicule_id', 'statut')
+        )
+    if 'stat_trajet_mois' not in tables:
+        op.create_table('stat_trajet_mois',
+        sa.Column('mois', sa.String(length=7), nullable=False),
+        sa.Column('depart', sa.String(length=200), nullable=False),
+        sa.Column('arrivee', sa.String(length=200), nullable=False),
+        sa.Column('statut', sa.String(length=50), nullable=False),
+        sa.Column('nb', sa.Integer(), nullable=False),
+        sa.Column('km', sa.Float(), nullable=False),
+        sa.Column('ca_estime', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('mois', 'depart', 'arrivee', 'statut')
+        )
+    colonnes = {c['name'] for c in _inspecteur().get_columns('reservation')}
+    if 'prix_estime' not in colonnes:
+        with op.batch_alter_table('reservation', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('prix_estime', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('reservation', schema=None) as batch_op:
+        batch_op.drop_column('prix_estime')
+    op.drop_table('stat_trajet_mois')
+    op.drop_table('stat_jour')
@@ -0,0 +1,39 @@
+"""zones des forfaits
+
+Table zone_tarif (app.pricing.zones) : centre + rayon rattachant les
+adresses géocodées proches à une extrémité de forfait.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 05:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Table déjà créée par create_all : ignorée
+    if 'zone_tarif' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('zone_tarif',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nom', sa.String(length=200), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('rayon_km', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nom')
+    )
+
+
+def downgrade():
+    op.drop_table('zone_tarif')
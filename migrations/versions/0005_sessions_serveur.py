@@ -0,0 +1,39 @@
+"""sessions côté serveur
+
+Table session_serveur (app.sessions, SESSION_BACKEND=database) : contenu
+encodé des sessions, le cookie ne portant que l'identifiant.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 09:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Table déjà créée par create_all : ignorée
+    if 'session_serveur' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('session_serveur',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('donnees', sa.LargeBinary(), nullable=False),
+    sa.Column('expire_le', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('session_serveur', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_session_serveur_expire_le'), ['expire_le'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('session_serveur', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_session_serveur_expire_le'))
+    op.drop_table('session_serveur')
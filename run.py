@@ -1,18 +1,32 @@
-# run.py
 import os
+
+import click
 from dotenv import load_dotenv
-from app import create_app, db
-from sqlalchemy import inspect
+from app import create_app
+from app.demarrage import prechauffage
+from app.schema import mettre_a_jour_schema
 
 # 🔹 Charger le fichier .env avant tout
 load_dotenv()
 
-app = create_app()
+# Préchauffage lancé plus bas, après l'éventuelle mise à jour du schéma
+app = create_app(prechauffer=False)
+
+# 🔹 Sous une commande flask (db, schema, stats ...) : ni migration ni préchauffage
+sous_cli = click.get_current_context(silent=True) is not None
+
+# 🔹 Le schéma n'est plus mis à jour à l'import (chaque worker gunicorn
+# refaisait la réflexion de la base) : étape explicite du déploiement,
+#   flask --app run schema upgrade   (ou python init_db.py)
+# sauf serveur de développement (python run.py) ou SCHEMA_AU_DEMARRAGE=1
+if not sous_cli and (__name__ == "__main__" or os.environ.get("SCHEMA_AU_DEMARRAGE") == "1"):
+    with app.app_context():
+        mettre_a_jour_schema()
 
-# 🔹 Créer les tables si besoin
-with app.app_context():
-    db.create_all()
-    print(" Tables créées :", inspect(db.engine).get_table_names())
+# 🔹 Gabarits, connexions et index prêts avant le premier visiteur
+# (/healthz et /readyz répondent 200 une fois terminé)
+if not sous_cli:
+    prechauffage.demarrer(app)
 
 if __name__ == "__main__":
     # 🔹 Mode debug = voir les logs dans le terminal
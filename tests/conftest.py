@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+import pytest
+
+# config.Config lit DATABASE_URL à l'import : base jetable avant tout import de l'app
+_fd, _BASE = tempfile.mkstemp(suffix=".db")
+os.close(_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_BASE}"
+
+from app import create_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app(prechauffer=False)
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, EMAIL_WORKER_INPROCESS=False)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if os.path.exists(_BASE):
+        os.remove(_BASE)
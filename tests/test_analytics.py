@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from app import analytics, db
+from app.models.models import Reservation, StatJour, Vehicule
+
+
+def _vehicule():
+    v = Vehicule(immatriculation="DK-1", marque="Toyota", modele="Corolla", type="Berline",
+                 capacite_passagers=4, image="x.jpg")
+    db.session.add(v)
+    db.session.flush()
+    return v
+
+
+def test_rebuild_estime_les_devis_manquants(app):
+    """Réservation antérieure à prix_estime (migration 0003) : rebuild la reprend."""
+    v = _vehicule()
+    db.session.add(Reservation(
+        vehicule_id=v.id, client_nom="Awa", client_email="awa@example.sn",
+        client_telephone="770000000", date_heure=datetime(2030, 1, 1, 10, 0),
+        adresse_depart="Dakar Plateau", adresse_arrivee="AIBD",
+        statut="Confirmée", prix_estime=None,
+    ))
+    db.session.commit()
+
+    assert analytics.rebuild(paquet=1) == 1
+
+    stats = StatJour.query.filter_by(statut="Confirmée").all()
+    assert sum(s.nb for s in stats) == 1
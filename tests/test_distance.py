@@ -0,0 +1,27 @@
+import requests
+
+from app.distance import DistanceError, distance_provider
+from app.distance.backends import GoogleMapsBackend
+
+
+def test_google_injoignable_erreur_passagere(app, monkeypatch):
+    backend = GoogleMapsBackend({"GOOGLE_MAPS_KEY": "x"})
+
+    def panne(*args, **kwargs):
+        raise requests.ConnectionError("réseau coupé")
+
+    monkeypatch.setattr(backend.http, "get", panne)
+    try:
+        backend.distance_and_time("Dakar Plateau", "AIBD")
+    except DistanceError as e:
+        assert not e.definitif
+    else:
+        raise AssertionError("DistanceError attendue")
+
+
+def test_adresse_longue_relue_en_base(app):
+    """Clé > 200 caractères : la ligne écrite est retrouvée à la lecture."""
+    longue = "Rue " + "x" * 300
+    cle = (longue.lower(), "aibd")
+    distance_provider.store.set(cle, (12.0, 20.0), source="test")
+    assert distance_provider.store.get(cle) == (12.0, 20.0)
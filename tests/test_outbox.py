@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.emails.outbox import enqueue_email
+from app.emails.worker import OutboxWorker
+from app.models.models import EmailOutbox
+
+
+@pytest.fixture
+def worker(app, monkeypatch):
+    app.config.update(SENDGRID_API_KEY="x", EMAIL_BATCH_WINDOW=0)
+    w = OutboxWorker(app)
+    envois = []
+    monkeypatch.setattr(w.client, "send", lambda payload: envois.append(payload) or 202)
+    w.envois = envois
+    yield w
+    w.stop()
+
+
+def test_lot_repris_par_un_autre_worker_non_renvoye(app, worker):
+    """Verrou expiré puis email réclamé ailleurs : l'ancien lot ne l'envoie pas."""
+    enqueue_email("awa@example.sn", "Sujet", "Bonjour")
+    db.session.commit()
+
+    rows = worker._claim(10)
+    ancien, ids = rows[0].lot, [m.id for m in rows]
+    db.session.query(EmailOutbox).update({"verrou_jusqua": datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    assert worker._claim(10)[0].lot != ancien
+
+    worker.send_batch(ids, ancien)
+    assert worker.envois == []
+    assert EmailOutbox.query.one().statut == "envoi"
+
+
+def test_drain_envoie_et_marque(app, worker):
+    for i in range(3):
+        enqueue_email(f"c{i}@example.sn", "Sujet", "Bonjour -nom-", substitutions={"-nom-": f"C{i}"})
+    db.session.commit()
+
+    worker.drain()
+
+    assert len(worker.envois) == 1
+    assert len(worker.envois[0]["personalizations"]) == 3
+    assert {m.statut for m in EmailOutbox.query} == {"envoye"}
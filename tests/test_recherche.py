@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models.models import Reservation, Vehicule
+from app.routes.main import parse_datetime_local
+
+
+@pytest.fixture
+def flotte(app):
+    v = Vehicule(immatriculation="DK-1", marque="Toyota", modele="Corolla", type="Berline",
+                 capacite_passagers=4, nb_valises=3, volume_coffre_bagages=450, image="x.jpg")
+    db.session.add(v)
+    db.session.flush()
+    db.session.add(Reservation(
+        vehicule_id=v.id, client_nom="Awa", client_email="awa@example.sn",
+        client_telephone="770000000", date_heure=datetime(2030, 1, 1, 9, 0),
+        adresse_depart="Dakar Plateau", adresse_arrivee="AIBD", statut="Confirmée",
+    ))
+    db.session.commit()
+    return v
+
+
+@pytest.mark.parametrize("heure", ["10:00Z", "10:00+02:00"])
+def test_heure_avec_fuseau(app, flotte, heure):
+    """Une heure avec fuseau ne casse pas la comparaison aux créneaux (naïfs)."""
+    assert parse_datetime_local(f"2030-01-01T{heure}").tzinfo is None
+
+    client = app.test_client()
+    assert client.get("/vehicules-disponibles", query_string={"date": "2030-01-01", "heure": heure}).status_code == 200
+    assert client.get("/reservation", query_string={"date": "2030-01-01", "heure": heure}).status_code == 200